@@ -0,0 +1,84 @@
+"""Бенчмарк canvas-отрисовки таймлайна против дерева Flet-элементов
+
+Для проекта заданной длины строит таймлайн в режимах "widgets" и "canvas"
+и сравнивает число элементов (команд протокола Flet), объём сериализованного
+обновления страницы и время кадра (построение + сериализация). Страница
+подменяется заглушкой.
+
+Запуск: python -m benchmarks.bench_canvas_timeline [--minutes 1 10 60] [--tracks 4]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import soundfile as sf
+from flet.core.protocol import CommandEncoder
+
+from src.UI.ui_components import TrackManager
+from src.core.waveform import WaveformPeakStore, peaks_for_clip
+from src.managers.controllers import AudioEditorController
+
+
+def payload(control):
+    """(число команд, байт JSON) для добавления control на страницу"""
+    commands = control._build_add_commands()
+    return len(commands), len(json.dumps(commands, cls=CommandEncoder))
+
+
+def build_timeline(path, render_mode, minutes, num_tracks, pixels_per_second):
+    editor = AudioEditorController()
+    page = MagicMock()
+    page.width = 1600
+    manager = TrackManager(editor, page, render_mode=render_mode)
+    while len(editor.project.tracks) < num_tracks:
+        manager.add_track()
+    for i in range(int(minutes * 60 / 5)):
+        editor.add_audio_clip(i % num_tracks, path, (i // num_tracks) * 5000 * num_tracks, f"c{i}")
+    editor.project._update_duration()
+    peaks_for_clip(editor.project.tracks[0].clips[0])
+    manager.time_ruler.pixels_per_second = pixels_per_second
+    return editor, manager
+
+
+def frame(manager):
+    """Полная перерисовка: линейка, дорожки и сериализация результата"""
+    started = time.perf_counter()
+    manager.time_ruler.update_ruler()
+    manager.update_all_visualizations()
+    commands, size = payload(manager.get_track_list_container())
+    if manager.render_mode == "widgets":
+        ruler_commands, ruler_size = payload(manager.time_ruler.build())
+        commands, size = commands + ruler_commands, size + ruler_size
+    return commands, size, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 10, 60])
+    parser.add_argument("--tracks", type=int, default=4)
+    parser.add_argument("--zoom", type=float, default=100, help="пикселей в секунду")
+    args = parser.parse_args()
+
+    # Пики пишутся во временный каталог, а не в ~/.sigmaudio/peaks
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            patch('src.core.waveform.default_peak_store', WaveformPeakStore(os.path.join(tmp_dir, "peaks"))):
+        path = os.path.join(tmp_dir, "clip.wav")
+        rng = np.random.default_rng(0)
+        sf.write(path, (rng.standard_normal((5 * 44100, 2)) * 3000).astype(np.int16), 44100, subtype='PCM_16')
+
+        print(f"{'минут':>6s} {'режим':>8s} {'элементов':>10s} {'объём':>10s} {'кадр':>9s}")
+        for minutes in args.minutes:
+            for render_mode in ("widgets", "canvas"):
+                editor, manager = build_timeline(path, render_mode, minutes, args.tracks, args.zoom)
+                frame(manager)
+                commands, size, elapsed = frame(manager)
+                print(f"{minutes:6.0f} {render_mode:>8s} {commands:10d} {size / 1024:7.0f} КБ {elapsed:6.1f} мс")
+                editor.cleanup()
+
+
+if __name__ == "__main__":
+    main()
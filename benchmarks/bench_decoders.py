@@ -0,0 +1,66 @@
+"""Бенчмарк декодирования по форматам: libsndfile напрямую против pydub/ffmpeg
+
+Для каждого формата записывает стерео-файл заданной длины и сравнивает
+время SoundfileDecoder и прежнего пути через AudioSegment.from_file (который
+для всего, кроме WAV, запускает ffmpeg и читает промежуточный WAV).
+
+Запуск: python -m benchmarks.bench_decoders [--seconds 120] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from src.core.decoders import FfmpegDecoder, SoundfileDecoder
+
+FORMATS = (
+    ("wav", "WAV", "PCM_16"),
+    ("flac", "FLAC", "PCM_16"),
+    ("ogg", "OGG", "VORBIS"),
+    ("aiff", "AIFF", "PCM_16"),
+)
+
+
+def best_time(decoder, path, file_format, repeat):
+    """Минимальное время декодирования из repeat попыток (мс) или None, если декодер не справился"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            decoder.decode(path, file_format)
+        except Exception:
+            return None
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal((int(args.seconds * 44100), 2)) * 3000).astype(np.int16)
+    decoders = (SoundfileDecoder(), FfmpegDecoder())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{args.seconds:.0f} с стерео 44100 Гц")
+        print(f"{'формат':>7s} {'soundfile':>12s} {'ffmpeg':>12s} {'ускорение':>10s}")
+        for ext, container, subtype in FORMATS:
+            path = os.path.join(tmp_dir, f"bench.{ext}")
+            with sf.SoundFile(path, 'w', 44100, 2, format=container, subtype=subtype) as f:
+                for start in range(0, len(audio), 44100):
+                    f.write(audio[start:start + 44100])
+            native, ffmpeg = (best_time(decoder, path, ext, args.repeat) for decoder in decoders)
+            ffmpeg_text = f"{ffmpeg:9.1f} мс" if ffmpeg is not None else "недоступен"
+            speedup = f"{ffmpeg / native:9.1f}×" if ffmpeg is not None and native else ""
+            print(f"{ext:>7s} {native:9.1f} мс {ffmpeg_text:>12s} {speedup:>10s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Бенчмарк движка воспроизведения: прежний расчёт в мс против целых кадров
+
+Рендерит час материала (минутные клипы подряд на нескольких дорожках)
+блоками по 50 мс так же, как поток воспроизведения, и выводит время на
+блок и расхождение между пройденным временем и числом записанных кадров.
+Для сравнения берётся прежняя реализация микширования в миллисекундах
+(legacy_mix_audio_chunk из bench_mixer), а не текущий режим "ms", который
+тоже микширует через mix_frames_into. При частоте, на которой 50 мс —
+нецелое число кадров (22050 Гц), прежний расчёт отстаёт на полкадра за блок.
+
+Запуск: python -m benchmarks.bench_engine [--minutes 60] [--tracks 4] [--rate 22050]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.bench_mixer import legacy_mix_audio_chunk
+from src.core.models import AudioClip, Project, Track
+
+CHUNK_MS = 50
+
+
+def build_project(path, minutes, tracks, rate):
+    project = Project(sample_rate=rate, channels=2, engine="frames")
+    for t in range(tracks):
+        track = Track(f"T{t}", volume=0.8)
+        for minute in range(minutes):
+            track.add_clip(AudioClip(path, start_time=minute * 60000, target_rate=rate))
+        project.add_track(track)
+        for clip in track.clips:
+            clip.samples  # данные загружены до замера, как после фоновой загрузки
+    return project
+
+
+def run_legacy(project):
+    """Прежний цикл в миллисекундах; возвращает (блоков, секунд, расхождение в кадрах)"""
+    frame_bytes = project.sample_width * project.channels
+    position = written = chunks = 0
+    started = time.perf_counter()
+    while position < project.duration:
+        chunk_ms = min(CHUNK_MS, project.duration - position)
+        written += len(legacy_mix_audio_chunk(project, position, chunk_ms)) // frame_bytes
+        position += chunk_ms
+        chunks += 1
+    elapsed = time.perf_counter() - started
+    drift = position * project.sample_rate / 1000 - written
+    return chunks, elapsed, drift
+
+
+def run(project):
+    """Цикл движка frames; возвращает (блоков, секунд, расхождение в кадрах)"""
+    position, end = project._position_of(0), project._position_of(project.duration)
+    written = chunks = 0
+    started = time.perf_counter()
+    while position < end:
+        chunk_end = project._chunk_end(position, CHUNK_MS)
+        written += len(project._render_chunk(position, chunk_end))
+        position = chunk_end
+        chunks += 1
+    elapsed = time.perf_counter() - started
+    drift = project._time_of(position) * project.sample_rate / 1000 - written
+    return chunks, elapsed, drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--tracks", type=int, default=4)
+    parser.add_argument("--rate", type=int, default=22050)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rng = np.random.default_rng(0)
+        path = os.path.join(tmp_dir, "minute.wav")
+        sf.write(path, (rng.standard_normal((60 * args.rate, 2)) * 3000).astype(np.int16), args.rate,
+                 subtype='PCM_16')
+
+        print(f"{args.minutes} мин × {args.tracks} дорожек, {args.rate} Гц, блоки по {CHUNK_MS} мс")
+        project = build_project(path, args.minutes, args.tracks, args.rate)
+        for name, runner in (("legacy ms", run_legacy), ("frames", run)):
+            chunks, elapsed, drift = runner(project)
+            print(f"  {name:>9s}: {elapsed * 1e6 / chunks:7.1f} мкс/блок  "
+                  f"расхождение {drift:8.0f} кадров ({drift * 1000 / args.rate:.1f} мс)")
+        project.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Бенчмарк офлайн-рендера экспорта в зависимости от числа потоков
+
+Рендерит синтетический проект через AudioExporter.render_to_array с разным
+workers и проверяет, что результат бит-в-бит совпадает с последовательным.
+
+Запуск: python -m benchmarks.bench_export [--tracks 60] [--seconds 60]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from src.core.audio_exporter import AudioExporter
+from src.core.models import AudioClip, Project, Track
+
+
+def build_project(tmp_dir, num_tracks, seconds, sample_rate=44100):
+    """Проект из num_tracks дорожек, на каждой — клип длиной seconds"""
+    rng = np.random.default_rng(0)
+    project = Project(sample_rate=sample_rate)
+    for t in range(num_tracks):
+        path = os.path.join(tmp_dir, f"track{t}.wav")
+        noise = (rng.standard_normal((int(seconds * sample_rate), 2)) * 0.05).astype(np.float32)
+        sf.write(path, noise, sample_rate, subtype='PCM_16')
+        track = Track(f"T{t}", volume=0.8)
+        track.add_clip(AudioClip(path, start_time=0))
+        project.add_track(track)
+    project.duration = seconds * 1000
+    return project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=60)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        project = build_project(tmp_dir, args.tracks, args.seconds)
+        print(f"{args.tracks} дорожек × {args.seconds:.0f} с, {os.cpu_count()} ядер")
+
+        reference = None
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            exporter = AudioExporter(project, workers=workers)
+            started = time.perf_counter()
+            audio, _ = exporter.render_to_array()
+            elapsed = time.perf_counter() - started
+
+            if reference is None:
+                reference, baseline = audio.tobytes(), elapsed
+            identical = audio.tobytes() == reference
+            print(f"  workers={workers:<3d} {elapsed:7.2f} с  ускорение {baseline / elapsed:5.2f}×  "
+                  f"{'бит-в-бит' if identical else 'РАСХОЖДЕНИЕ'}")
+        project.cleanup()
+
+
+if __name__ == "__main__":
+    main()
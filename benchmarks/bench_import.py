@@ -0,0 +1,54 @@
+"""Бенчмарк добавления клипов: чтение заголовка против полного декодирования
+
+Для нескольких длинных файлов измеряет время, за которое клипы появляются
+на дорожке (AudioClip строится по заголовку), и отдельно время декодирования
+PCM, которое теперь происходит при первом использовании клипа.
+
+Запуск: python -m benchmarks.bench_import [--files 10] [--minutes 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from src.core.audio_cache import DecodedAudioCache
+from src.core.models import AudioClip
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--rate", type=int, default=48000, help="частота файлов (проект — 44100)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal((int(args.minutes * 60 * args.rate), 2)) * 3000).astype(np.int16)
+        paths = []
+        for i in range(args.files):
+            paths.append(os.path.join(tmp_dir, f"clip{i}.wav"))
+            sf.write(paths[-1], audio, args.rate, subtype='PCM_16')
+
+        cache = DecodedAudioCache(memory_budget=0)
+        started = time.perf_counter()
+        clips = [AudioClip(path, cache=cache, target_rate=44100) for path in paths]
+        probed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for clip in clips:
+            clip.samples
+        decoded = time.perf_counter() - started
+
+        print(f"{args.files} файлов по {args.minutes:.0f} мин, {args.rate} → 44100 Гц")
+        print(f"  клипы на дорожке  {probed * 1000:8.1f} мс")
+        print(f"  декодирование PCM {decoded * 1000:8.1f} мс (в фоне / при первом использовании)")
+        for clip in clips:
+            clip.close()
+
+
+if __name__ == "__main__":
+    main()
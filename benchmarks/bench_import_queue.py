@@ -0,0 +1,63 @@
+"""Бенчмарк очереди импорта в зависимости от числа потоков-декодеров
+
+Импортирует пачку файлов на дорожку через ImportQueue и измеряет время
+до размещения последнего клипа. Файлы записываются с частотой 48 кГц,
+поэтому кроме чтения каждый проходит передискретизацию в частоту проекта.
+Перед каждым прогоном кэш декодированного аудио очищается.
+
+Запуск: python -m benchmarks.bench_import_queue [--files 100] [--seconds 20] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from src.core.audio_cache import default_audio_cache
+from src.core.import_queue import ImportQueue
+
+
+def run(paths, workers):
+    queue = ImportQueue(workers=workers)
+    placed = []
+    started = time.perf_counter()
+    job = queue.submit(paths, placed.append, target_rate=44100)
+    job.wait()
+    elapsed = time.perf_counter() - started
+    queue.shutdown(wait=True)
+
+    order_ok = [clip.file_path for clip in placed] == paths
+    for clip in placed:
+        clip.close()
+    default_audio_cache.clear()
+    return elapsed, len(placed), order_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rng = np.random.default_rng(0)
+        paths = []
+        for i in range(args.files):
+            audio = (rng.standard_normal((int(args.seconds * 48000), 2)) * 3000).astype(np.int16)
+            paths.append(os.path.join(tmp_dir, f"clip{i:03d}.wav"))
+            sf.write(paths[-1], audio, 48000, subtype='PCM_16')
+
+        print(f"{args.files} файлов по {args.seconds:.0f} с, 48000 → 44100 Гц")
+        baseline = None
+        for workers in args.workers:
+            elapsed, placed, order_ok = run(paths, workers)
+            baseline = baseline or elapsed
+            print(f"  потоков {workers:2d}: {elapsed:7.2f} с  ускорение {baseline / elapsed:4.1f}×  "
+                  f"клипов {placed}{'' if order_ok else ' (порядок нарушен!)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Бенчмарк микшера реального времени
+
+Сравнивает прежний байтовый микшер (попарное сложение int16 с клиппингом
+после каждого клипа) с AudioMixer на float32-шине. Пропускная способность
+выражается в «клипо-потоках» (дорожки × активные клипы), смикшированных
+за одну секунду реального времени.
+
+Запуск: python -m benchmarks.bench_mixer [--tracks 16] [--clips 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from src.core.models import AudioClip, Project, Track
+
+CHUNK_MS = 50
+
+
+def legacy_mix_audio_chunk(project, start_time, chunk_duration_ms):
+    """Прежняя реализация Project._mix_audio_chunk (для сравнения)"""
+    active_tracks = [track for track in project.tracks if not track.muted]
+    if not active_tracks:
+        return project._generate_silence(chunk_duration_ms)
+
+    target_bytes = int(project.sample_rate * project.sample_width * project.channels * chunk_duration_ms / 1000)
+    mixed_data = None
+
+    for track in active_tracks:
+        for clip in track.get_active_clips(start_time, chunk_duration_ms):
+            clip_position = start_time - clip.start_time
+            if clip_position < 0:
+                continue
+
+            audio_chunk = clip.get_audio_chunk(clip_position, chunk_duration_ms)
+            if audio_chunk:
+                if clip.volume != 1.0 or track.volume != 1.0:
+                    audio_array = np.frombuffer(audio_chunk, dtype=np.int16)
+                    audio_chunk = (audio_array * clip.volume * track.volume).astype(np.int16).tobytes()
+
+                if mixed_data is None:
+                    mixed_data = bytes(audio_chunk)
+                else:
+                    arr1 = np.frombuffer(mixed_data, dtype=np.int16)
+                    arr2 = np.frombuffer(audio_chunk, dtype=np.int16)
+                    min_len = min(len(arr1), len(arr2))
+                    mixed = np.clip(arr1[:min_len] + arr2[:min_len], -32768, 32767).astype(np.int16)
+                    mixed_data = mixed.tobytes()
+
+    if mixed_data is None:
+        return project._generate_silence(chunk_duration_ms)
+    if len(mixed_data) < target_bytes:
+        mixed_data += b'\x00' * (target_bytes - len(mixed_data))
+    return mixed_data[:target_bytes]
+
+
+def build_project(tmp_dir, num_tracks, clips_per_track, clip_seconds=10.0, sample_rate=44100):
+    """Создаёт проект, где на каждой дорожке clips_per_track наложенных клипов"""
+    rng = np.random.default_rng(0)
+    path = os.path.join(tmp_dir, "noise.wav")
+    noise = (rng.standard_normal((int(clip_seconds * sample_rate), 2)) * 0.1).astype(np.float32)
+    sf.write(path, noise, sample_rate, subtype='PCM_16')
+
+    project = Project(sample_rate=sample_rate, channels=2)
+    for t in range(num_tracks):
+        track = Track(f"T{t}", volume=0.8)
+        for c in range(clips_per_track):
+            track.add_clip(AudioClip(path, start_time=0, volume=0.9, name=f"C{c}"))
+        project.add_track(track)
+        for clip in track.clips:
+            clip.samples  # данные загружены до замера, как после фоновой загрузки
+    return project, clip_seconds * 1000
+
+
+def measure(mix_fn, project, span_ms):
+    """Возвращает (секунд аудио, секунд стенного времени)"""
+    position = 0
+    started = time.perf_counter()
+    while position + CHUNK_MS <= span_ms:
+        mix_fn(project, position, CHUNK_MS)
+        position += CHUNK_MS
+    return position / 1000, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=16)
+    parser.add_argument("--clips", type=int, default=4, help="наложенных клипов на дорожку")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        project, span_ms = build_project(tmp_dir, args.tracks, args.clips, args.seconds)
+        streams = args.tracks * args.clips
+
+        results = {
+            "legacy (int16 bytes)": measure(legacy_mix_audio_chunk, project, span_ms),
+            "AudioMixer (float32 bus)": measure(lambda p, s, d: p._mix_audio_chunk(s, d), project, span_ms),
+        }
+        project.cleanup()
+
+    print(f"{args.tracks} дорожек × {args.clips} клипов, блок {CHUNK_MS} мс, {args.seconds:.0f} с аудио")
+    baseline = None
+    for name, (audio_sec, wall_sec) in results.items():
+        realtime = audio_sec / wall_sec
+        throughput = streams * realtime
+        baseline = baseline or throughput
+        print(f"  {name:26s} {realtime:8.1f}× реального времени, "
+              f"{throughput:10.0f} клипо-потоков/с ({throughput / baseline:.2f}×)")
+
+
+if __name__ == "__main__":
+    main()
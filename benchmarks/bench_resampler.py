@@ -0,0 +1,58 @@
+"""Бенчмарк полифазного ресемплера против линейной интерполяции np.interp
+
+Измеряет скорость передискретизации стерео-сигнала и подавление наложения:
+тон выше новой частоты Найквиста должен быть отфильтрован, а не отражён.
+
+Запуск: python -m benchmarks.bench_resampler [--seconds 60] [--src 48000] [--dst 44100]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.core.resampler import resample
+
+
+def interp_resample(samples, src_rate, dst_rate):
+    """Прежний путь экспорта: линейная интерполяция по каждому каналу"""
+    positions = np.arange(len(samples) * dst_rate // src_rate) * src_rate / dst_rate
+    grid = np.arange(len(samples))
+    return np.stack([np.interp(positions, grid, samples[:, ch]) for ch in range(samples.shape[1])], axis=-1)
+
+
+def level_db(signal, reference):
+    """Уровень signal относительно reference (дБ), без краевых эффектов"""
+    edge = len(signal) // 10
+    signal = signal[edge:-edge]
+    return 20 * np.log10(np.sqrt(np.mean(signal ** 2)) / np.sqrt(np.mean(reference ** 2)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--src", type=int, default=48000)
+    parser.add_argument("--dst", type=int, default=44100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal((int(args.seconds * args.src), 2)) * 3000).astype(np.int16)
+    print(f"{args.seconds:.0f} с стерео, {args.src} → {args.dst} Гц")
+
+    for name, func in (("np.interp", interp_resample), ("полифазный", resample)):
+        started = time.perf_counter()
+        func(audio, args.src, args.dst)
+        elapsed = time.perf_counter() - started
+        print(f"  {name:<11s} {elapsed:6.2f} с  ({args.seconds / elapsed:6.1f}× реального времени)")
+
+    nyquist = min(args.src, args.dst) / 2
+    print("Подавление тона выше частоты Найквиста:")
+    for freq in (nyquist * 1.02, nyquist * 1.07):
+        t = np.arange(args.src) / args.src
+        tone = (0.5 * np.sin(2 * np.pi * freq * t))[:, None]
+        linear = level_db(interp_resample(tone, args.src, args.dst), tone)
+        polyphase = level_db(resample(tone.astype(np.float32), args.src, args.dst), tone)
+        print(f"  {freq:8.0f} Гц  np.interp {linear:7.1f} дБ  полифазный {polyphase:7.1f} дБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Бенчмарк задержки перерисовки таймлайна после правки в зависимости от числа клипов
+
+Сравнивает прежнюю полную перестройку (очистка Stack и создание
+DraggableClip для каждого клипа) с синхронизацией через ClipViewRegistry
+после перемещения одного клипа и после изменения масштаба. Страница
+подменяется заглушкой, поэтому измеряется только работа на стороне Python.
+
+Запуск: python -m benchmarks.bench_timeline [--clips 50 100 200 400] [--tracks 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import soundfile as sf
+
+from src.UI.drag_drop import DraggableClip
+from src.UI.ui_components import TrackManager
+from src.core.waveform import WaveformPeakStore
+from src.managers.controllers import AudioEditorController
+
+
+def build_manager(path, num_clips, num_tracks):
+    """TrackManager с num_clips клипами, разложенными по num_tracks дорожкам"""
+    editor = AudioEditorController()
+    page = MagicMock()
+    page.width = 1600
+    manager = TrackManager(editor, page)
+    while len(editor.project.tracks) < num_tracks:
+        manager.add_track()
+    for i in range(num_clips):
+        editor.add_audio_clip(i % num_tracks, path, (i // num_tracks) * 1000, f"c{i}")
+    editor.project._update_duration()
+    manager.time_ruler.calculate_ruler_width()
+    manager.update_all_visualizations()
+    return editor, manager
+
+
+def legacy_rebuild(editor, manager):
+    """Прежний update_all_visualizations: все клипы создаются заново"""
+    for track, stack in zip(editor.project.tracks, manager.track_clips_visualizations):
+        stack.controls.clear()
+        for clip in track.clips:
+            stack.controls.append(DraggableClip(clip, track, manager.time_ruler, editor).build())
+
+
+def timed(func, repeats=5):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--tracks", type=int, default=4)
+    args = parser.parse_args()
+
+    # Пики пишутся во временный каталог, а не в ~/.sigmaudio/peaks
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            patch('src.core.waveform.default_peak_store', WaveformPeakStore(os.path.join(tmp_dir, "peaks"))):
+        path = os.path.join(tmp_dir, "clip.wav")
+        sf.write(path, np.zeros((44100, 2), dtype=np.int16), 44100, subtype='PCM_16')
+
+        print(f"{'клипов':>7s} {'полная перестройка':>19s} {'перемещение':>12s} {'масштаб':>9s}")
+        for num_clips in args.clips:
+            editor, manager = build_manager(path, num_clips, args.tracks)
+            track = editor.project.tracks[0]
+            clip = track.clips[0]
+
+            full = timed(lambda: legacy_rebuild(editor, manager))
+            manager.update_all_visualizations()
+
+            def move():
+                track.move_clip(clip, clip.start_time + 10)
+                manager.update_all_visualizations()
+
+            def zoom():
+                manager.time_ruler.pixels_per_second = 150 if manager.time_ruler.pixels_per_second == 100 else 100
+                manager.update_all_visualizations()
+
+            print(f"{num_clips:7d} {full:16.1f} мс {timed(move):9.1f} мс {timed(zoom):6.1f} мс")
+            editor.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import flet as ft
+import flet.canvas as cv
+
+from src.UI.clip_views import TimelineViewport
+
+RULER_HEIGHT = 40
+TRACK_HEIGHT = 60
+TRACK_GAP = 10
+WAVEFORM_STEP_PX = 2
+
+
+def _px(value):
+    """Округляет координату, чтобы не раздувать сериализацию"""
+    return round(float(value), 1)
+
+
+class CanvasTimelineRenderer:
+    """Отрисовка таймлайна примитивами flet.canvas
+
+    Линейка, деления, дорожки, клипы, волновые формы и курсор
+    воспроизведения рисуются на одном Canvas: все деления — один Path,
+    прямоугольники клипов дорожки — один Path из Rect, волновые формы
+    дорожки — ещё один Path. Подписи (cv.Text) и все остальные фигуры
+    строятся только для окна видимости, поэтому объём обновления страницы
+    не зависит от длины проекта. Курсор — отдельная фигура, которую
+    set_playhead() сдвигает без перерисовки остального.
+
+    Перетаскивание клипов обрабатывается одним GestureDetector поверх
+    Canvas с поиском клипа под указателем.
+    """
+
+    def __init__(self, editor, time_ruler, viewport=None, on_clip_moved=None):
+        self.editor = editor
+        self.time_ruler = time_ruler
+        self.viewport = viewport or TimelineViewport(time_ruler)
+        self.on_clip_moved = on_clip_moved
+        self.playhead_ms = 0
+        self._drag = None
+
+        self.playhead = cv.Line(0, 0, 0, 0, paint=ft.Paint(color=ft.Colors.RED_400, stroke_width=2))
+        self.canvas = cv.Canvas(shapes=[], height=self.height)
+        self.gesture_detector = ft.GestureDetector(
+            content=self.canvas,
+            on_pan_start=self._on_pan_start,
+            on_pan_update=self._on_pan_update,
+            on_pan_end=self._on_pan_end,
+            drag_interval=30,
+        )
+
+    @property
+    def height(self):
+        return RULER_HEIGHT + len(self.editor.project.tracks) * (TRACK_HEIGHT + TRACK_GAP)
+
+    def track_top(self, track_index):
+        return RULER_HEIGHT + track_index * (TRACK_HEIGHT + TRACK_GAP)
+
+    def render(self):
+        """Перестраивает фигуры для текущего окна видимости и масштаба"""
+        start_ms, end_ms = self.viewport.refresh()
+        shapes = self._ruler_shapes(start_ms, end_ms)
+        for track_index, track in enumerate(self.editor.project.tracks):
+            shapes.extend(self._track_shapes(track_index, track, start_ms, end_ms))
+
+        self._place_playhead()
+        shapes.append(self.playhead)
+
+        self.canvas.shapes = shapes
+        self.canvas.width = self.time_ruler.ruler_width
+        self.canvas.height = self.height
+        return self.canvas
+
+    def _ruler_shapes(self, start_ms, end_ms):
+        """Фон линейки, основные и промежуточные деления, подписи секунд"""
+        pixels_per_second = self.time_ruler.pixels_per_second
+        total_duration_sec = max(10, self.editor.project.duration / 1000)
+        seconds_step = self.time_ruler._calculate_optimal_step()
+        first_second = int(start_ms / 1000) // seconds_step * seconds_step
+        last_second = min(total_duration_sec, end_ms / 1000)
+
+        major, minor, labels = [], [], []
+        label_style = ft.TextStyle(size=10, color=ft.Colors.WHITE, weight=ft.FontWeight.BOLD)
+        for second in range(first_second, int(last_second) + 1, seconds_step):
+            x = _px(second * pixels_per_second)
+            major += [cv.Path.MoveTo(x, 0), cv.Path.LineTo(x, 15)]
+            labels.append(cv.Text(x + 2, 17, f"{second}s", label_style))
+
+            if seconds_step > 1 and pixels_per_second >= 100:
+                for sub_second in range(second + 1, min(second + seconds_step, int(last_second) + 1)):
+                    sub_x = _px(sub_second * pixels_per_second)
+                    minor += [cv.Path.MoveTo(sub_x, 0), cv.Path.LineTo(sub_x, 8)]
+
+        start_px = _px(self.time_ruler.time_to_pixels(start_ms))
+        width_px = _px(self.time_ruler.time_to_pixels(end_ms - start_ms))
+        return [
+            cv.Rect(start_px, 0, width_px, RULER_HEIGHT, paint=ft.Paint(color=ft.Colors.GREY_800)),
+            cv.Path(major, paint=ft.Paint(color=ft.Colors.WHITE, stroke_width=2, style=ft.PaintingStyle.STROKE)),
+            cv.Path(minor, paint=ft.Paint(color=ft.Colors.GREY_400, stroke_width=1, style=ft.PaintingStyle.STROKE)),
+            *labels,
+        ]
+
+    def _track_shapes(self, track_index, track, start_ms, end_ms):
+        """Фон дорожки, прямоугольники клипов, их волновые формы и названия"""
+        top = self.track_top(track_index)
+        start_px = self.time_ruler.time_to_pixels(start_ms)
+        end_px = self.time_ruler.time_to_pixels(end_ms)
+
+        rects, waves, names = [], [], []
+        name_style = ft.TextStyle(size=10, color=ft.Colors.WHITE)
+        for clip in track.get_clips_in_range(start_ms, end_ms):
+            x0 = self.time_ruler.time_to_pixels(clip.start_time)
+            x1 = self.time_ruler.time_to_pixels(clip.start_time + clip.duration)
+            rects.append(cv.Path.Rect(_px(x0), top, _px(max(1, x1 - x0)), TRACK_HEIGHT, border_radius=3))
+            names.append(cv.Text(_px(max(x0, start_px) + 4), top + 2, clip.name, name_style,
+                                 max_lines=1, max_width=max(1, _px(x1 - max(x0, start_px) - 8))))
+            waves.extend(self._waveform_elements(clip, max(x0, start_px), min(x1, end_px), top + 14))
+
+        shapes = [
+            cv.Rect(_px(start_px), top, _px(end_px - start_px), TRACK_HEIGHT,
+                    paint=ft.Paint(color=ft.Colors.GREY_700)),
+            cv.Path(rects, paint=ft.Paint(color=ft.Colors.BLUE_700)),
+            cv.Path(waves, paint=ft.Paint(color=ft.Colors.BLUE_100)),
+            cv.Path(rects, paint=ft.Paint(color=ft.Colors.GREY_500, stroke_width=2, style=ft.PaintingStyle.STROKE)),
+        ]
+        return shapes + names
+
+    def _waveform_elements(self, clip, x0, x1, top):
+        """Контур min/max волновой формы видимой части клипа"""
+        count = int((x1 - x0) / WAVEFORM_STEP_PX)
+        if count < 2:
+            return []
+        try:
+            from src.core.waveform import peaks_for_clip
+            peaks = peaks_for_clip(clip, on_ready=lambda peaks: self._on_peaks_ready())
+        except Exception:
+            return []
+        if peaks is None:
+            return []
+
+        offset_ms = clip.trim_start - clip.start_time
+        columns = peaks.columns(self.time_ruler.pixels_to_time(x0) + offset_ms,
+                                self.time_ruler.pixels_to_time(x1) + offset_ms, count)
+        half = (TRACK_HEIGHT - 16) / 2
+        mid = top + half
+        xs = [_px(x0 + i * WAVEFORM_STEP_PX) for i in range(count)]
+
+        elements = [cv.Path.MoveTo(xs[0], _px(mid - columns[0, 1] * half))]
+        elements += [cv.Path.LineTo(x, _px(mid - y * half)) for x, y in zip(xs[1:], columns[1:, 1].tolist())]
+        elements += [cv.Path.LineTo(x, _px(mid - y * half)) for x, y in zip(xs[::-1], columns[::-1, 0].tolist())]
+        elements.append(cv.Path.Close())
+        return elements
+
+    def _on_peaks_ready(self):
+        """Дорисовывает волновые формы, пики которых досчитались в фоне"""
+        self.render()
+        try:
+            if self.canvas.page:
+                self.canvas.update()
+        except Exception:
+            pass
+
+    def _place_playhead(self):
+        x = _px(self.time_ruler.time_to_pixels(self.playhead_ms))
+        self.playhead.x1 = self.playhead.x2 = x
+        self.playhead.y1 = 0
+        self.playhead.y2 = self.height
+
+    def set_playhead(self, time_ms, push=True):
+        """Сдвигает курсор воспроизведения, обновляя только его фигуру"""
+        self.playhead_ms = time_ms
+        self._place_playhead()
+        if push and self.playhead.page:
+            self.playhead.update()
+
+    def clip_at(self, x, y):
+        """Возвращает (track, clip) под точкой canvas или (None, None)"""
+        track_index = int((y - RULER_HEIGHT) // (TRACK_HEIGHT + TRACK_GAP))
+        tracks = self.editor.project.tracks
+        if y < RULER_HEIGHT or not 0 <= track_index < len(tracks):
+            return None, None
+        if y - self.track_top(track_index) > TRACK_HEIGHT:
+            return None, None
+
+        time_ms = self.time_ruler.pixels_to_time(x)
+        clips = tracks[track_index].get_clips_in_range(time_ms, time_ms + 1)
+        return (tracks[track_index], clips[-1]) if clips else (None, None)
+
+    def _on_pan_start(self, e: ft.DragStartEvent):
+        track, clip = self.clip_at(e.local_x, e.local_y)
+        if clip is not None:
+            self._drag = (track, clip, self.time_ruler.pixels_to_time(e.local_x) - clip.start_time)
+
+    def _on_pan_update(self, e: ft.DragUpdateEvent):
+        if self._drag is None:
+            return
+        track, clip, grab_offset = self._drag
+        new_time_ms = max(0, self.time_ruler.pixels_to_time(e.local_x) - grab_offset)
+        track.move_clip(clip, new_time_ms)
+        self.render()
+        if self.canvas.page:
+            self.canvas.update()
+
+    def _on_pan_end(self, e: ft.DragEndEvent):
+        if self._drag is None:
+            return
+        clip = self._drag[1]
+        self._drag = None
+        self.editor.project._update_duration()
+        if self.on_clip_moved:
+            self.on_clip_moved(clip)
+
+    def build(self):
+        self.render()
+        return self.gesture_detector
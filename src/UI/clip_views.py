@@ -0,0 +1,163 @@
+from src.UI.drag_drop import DraggableClip
+
+MAX_POOLED_VIEWS = 64
+
+
+class ClipViewRegistry:
+    """Реестр визуальных элементов клипов, живущих между перерисовками
+
+    Для каждого клипа хранится его DraggableClip и снимок состояния
+    (позиция, длительность, обрезание, масштаб). sync() сравнивает
+    дорожку с реестром: новые клипы создаются, удалённые убираются из
+    Stack, а у изменившихся только пересчитывается геометрия. Остальные
+    элементы не трогаются, поэтому page.update() отправляет лишь разницу.
+
+    Если передано окно (window), материализуются только клипы, пересекающие
+    его; элементы ушедших из окна клипов складываются в пул и
+    переназначаются новым клипам при прокрутке.
+    """
+
+    def __init__(self, time_ruler, editor=None, on_drag_end_callback=None, on_state_changed=None):
+        self.time_ruler = time_ruler
+        self.editor = editor
+        self.on_drag_end_callback = on_drag_end_callback
+        self.on_state_changed = on_state_changed
+        self._views = {}
+        self._pool = []
+        self.created = 0
+        self.recycled = 0
+        self.relaid = 0
+        self.removed = 0
+
+    def _snapshot(self, clip, window=None):
+        # видимая часть клипа входит в снимок: волновая форма строится только для неё
+        visible = None
+        if window is not None:
+            visible = (max(window[0], clip.start_time), min(window[1], clip.start_time + clip.duration))
+        return (clip.start_time, clip.duration, clip.trim_start, clip.trim_end,
+                self.time_ruler.pixels_per_second, visible)
+
+    def view_for(self, clip):
+        """DraggableClip клипа или None, если клип ещё не отображён"""
+        entry = self._views.get(id(clip))
+        return entry[1] if entry and entry[0] is clip else None
+
+    def reset_counters(self):
+        self.created = self.recycled = self.relaid = self.removed = 0
+
+    def sync(self, track, stack, window=None):
+        """Приводит содержимое stack к клипам дорожки, затрагивая только изменения
+
+        window — (start_ms, end_ms) видимой области с запасом или None для всех клипов.
+        """
+        clips = track.clips if window is None else track.get_clips_in_range(*window)
+        wanted = {id(clip): clip for clip in clips}
+        if window is not None:
+            for clip, view, _, _ in self._views.values():
+                if view.is_dragging and view.track is track:
+                    wanted[id(clip)] = clip
+
+        for control in list(stack.controls):
+            key = getattr(control, 'data', None)
+            entry = self._views.get(key)
+            owned = entry is not None and entry[3] is control
+            if owned and wanted.get(key) is entry[0]:
+                continue
+            stack.controls.remove(control)
+            if owned:
+                self._release(self._views.pop(key))
+            self.removed += 1
+
+        present = {id(control) for control in stack.controls}
+        for key, clip in wanted.items():
+            entry = self._views.get(key)
+            snapshot = self._snapshot(clip, window)
+
+            if entry is None or id(entry[3]) not in present:
+                view = self._acquire(clip, track, window)
+                control = view.build()
+                control.data = key
+                stack.controls.append(control)
+                self._views[key] = [clip, view, snapshot, control]
+            elif entry[2] != snapshot:
+                view = entry[1]
+                view.window_ms = window
+                view.layout(rebuild_waveform=not view.is_trimming)
+                entry[2] = snapshot
+                self.relaid += 1
+
+    def _acquire(self, clip, track, window=None):
+        """Берёт элемент из пула или создаёт новый"""
+        if self._pool:
+            view = self._pool.pop()
+            view.rebind(clip, track, window)
+            self.recycled += 1
+            return view
+
+        self.created += 1
+        return DraggableClip(clip, track, self.time_ruler, self.editor,
+                             self.on_drag_end_callback, self.on_state_changed, window)
+
+    def _release(self, entry):
+        if len(self._pool) < MAX_POOLED_VIEWS and not entry[1].is_dragging:
+            self._pool.append(entry[1])
+
+    def materialized(self):
+        """Количество клипов, для которых сейчас существуют элементы"""
+        return len(self._views)
+
+    def forget(self, stack):
+        """Убирает все элементы stack из реестра (например, при удалении дорожки)"""
+        for control in stack.controls:
+            key = getattr(control, 'data', None)
+            entry = self._views.get(key)
+            if entry is not None and entry[3] is control:
+                del self._views[key]
+        stack.controls.clear()
+
+
+class TimelineViewport:
+    """Видимая область горизонтальной прокрутки дорожки
+
+    Хранит позицию прокрутки и ширину области в пикселях и выдаёт окно
+    материализации в миллисекундах: видимая область плюс margin_px с каждой
+    стороны. Окно пересчитывается, только когда видимая область подходит к
+    его краю ближе чем на половину запаса, поэтому мелкая прокрутка не
+    вызывает синхронизацию.
+    """
+
+    def __init__(self, time_ruler, width_px=1200, margin_px=None):
+        self.time_ruler = time_ruler
+        self.scroll_px = 0
+        self.width_px = width_px
+        self.margin_px = margin_px
+        self._window = None
+
+    @property
+    def margin(self):
+        return self.width_px if self.margin_px is None else self.margin_px
+
+    def refresh(self):
+        """Пересчитывает окно материализации вокруг текущей прокрутки"""
+        start_px = max(0, self.scroll_px - self.margin)
+        end_px = self.scroll_px + self.width_px + self.margin
+        self._window = (self.time_ruler.pixels_to_time(start_px), self.time_ruler.pixels_to_time(end_px))
+        return self._window
+
+    def window_ms(self):
+        """Текущее окно материализации (start_ms, end_ms)"""
+        return self._window or self.refresh()
+
+    def scroll_to(self, pixels, width_px=None):
+        """Запоминает прокрутку, возвращает True, если окно пора пересчитать"""
+        self.scroll_px = max(0, pixels or 0)
+        if width_px:
+            self.width_px = width_px
+        if self._window is None:
+            return True
+
+        guard = self.margin / 2
+        start_ms, end_ms = self._window
+        visible_start = self.time_ruler.pixels_to_time(max(0, self.scroll_px - guard))
+        visible_end = self.time_ruler.pixels_to_time(self.scroll_px + self.width_px + guard)
+        return visible_start < start_ms or visible_end > end_ms
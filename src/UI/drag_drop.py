@@ -71,57 +71,59 @@ class ClipBorderHandle:
                 self.on_trim_callback(self.clip)
 
             if self.draggable_clip_ref:
-                self.draggable_clip_ref.update_on_trim()
+                self.draggable_clip_ref.update_on_trim(rebuild_waveform=False)
 
     def _on_pan_end(self, e: ft.DragEndEvent):
         self.is_dragging = False
         self.handle.opacity = 0.7
+        if self.draggable_clip_ref:
+            self.draggable_clip_ref.update_on_trim()
+        preload = getattr(self.clip, 'preload', None)
+        if preload:
+            preload()
 
     def build(self):
         return self.gesture_detector
 
 
 class DraggableClip:
-    """Класс для создания перетаскиваемого аудио клипа с поддержкой обрезания"""
+    """Класс для создания перетаскиваемого аудио клипа с поддержкой обрезания
+
+    Волновая форма строится только для части клипа внутри window_ms (окна
+    материализации дорожки). Пока тянется ручка обрезания, готовый контур
+    лишь сдвигается и обрезается контейнером, а перестраивается один раз —
+    когда ручку отпустили.
+    """
 
     CLIP_MIN_WIDTH = 10
 
-    def __init__(self, clip, track, time_ruler, editor=None, on_drag_end_callback=None, on_state_changed=None):
+    def __init__(self, clip, track, time_ruler, editor=None, on_drag_end_callback=None, on_state_changed=None,
+                 window_ms=None):
         self.clip = clip
         self.track = track
         self.time_ruler = time_ruler
+        self.window_ms = window_ms
+        self.waveform_holder = None
+        self._waveform_trim_start = 0
         self.editor = editor
         self.on_drag_end_callback = on_drag_end_callback
         self.on_state_changed = on_state_changed
         self.is_dragging = False
         self.original_left = 0
 
-        if not hasattr(self.clip, 'trim_start'):
-            self.clip.trim_start = 0
-        if not hasattr(self.clip, 'trim_end'):
-            self.clip.trim_end = 0
-        if not hasattr(self.clip, 'original_duration'):
-            self.clip.original_duration = self.clip.duration
-        if not hasattr(self.clip, 'original_start_time'):
-            self.clip.original_start_time = self.clip.start_time
+        self._ensure_clip_attrs()
+        self.peaks = None
 
         try:
-            try:
-                from src.core.audio_visualizer import AudioWaveform
-                waveform = AudioWaveform(clip.filepath, width=100, height=30, color=ft.Colors.BLUE_400)
-                clip_visualization = waveform.build()
-            except:
-                clip_visualization = ft.Container(
-                    content=ft.Text(clip.name, size=10, color=ft.Colors.WHITE),
-                    bgcolor=ft.Colors.BLUE_400,
-                )
-
             clip_start_pixels = time_ruler.time_to_pixels(clip.start_time)
             clip_width_pixels = time_ruler.time_to_pixels(clip.duration)
             clip_width_pixels = max(self.CLIP_MIN_WIDTH, clip_width_pixels)
             clip_content_width = clip_width_pixels - ClipBorderHandle.HANDLE_WIDTH
             clip_content_width = max(self.CLIP_MIN_WIDTH, clip_content_width)
 
+            self.peaks = self._load_peaks()
+            clip_visualization = self._build_waveform(clip_content_width)
+
             self.clip_container = ft.Container(
                 content=clip_visualization,
                 width=clip_content_width,
@@ -129,6 +131,7 @@ class DraggableClip:
                 border=ft.border.all(2, ft.Colors.GREY_500),
                 border_radius=3,
                 bgcolor=ft.Colors.BLUE_700,
+                clip_behavior=ft.ClipBehavior.HARD_EDGE,
                 tooltip=self._get_tooltip(),
             )
 
@@ -210,6 +213,81 @@ class DraggableClip:
 
             self.main_stack = None
 
+    def _ensure_clip_attrs(self):
+        if not hasattr(self.clip, 'trim_start'):
+            self.clip.trim_start = 0
+        if not hasattr(self.clip, 'trim_end'):
+            self.clip.trim_end = 0
+        if not hasattr(self.clip, 'original_duration'):
+            self.clip.original_duration = self.clip.duration
+        if not hasattr(self.clip, 'original_start_time'):
+            self.clip.original_start_time = self.clip.start_time
+
+    def _load_peaks(self):
+        """Пики из кэша; если их ещё нет, они считаются в фоне, а клип пока рисуется без волны"""
+        clip = self.clip
+        try:
+            from src.core.waveform import peaks_for_clip
+            return peaks_for_clip(clip, on_ready=lambda peaks: self._on_peaks_ready(clip, peaks))
+        except Exception:
+            return None
+
+    def _on_peaks_ready(self, clip, peaks):
+        if self.clip is not clip:
+            return
+        self.peaks = peaks
+        try:
+            self.update_on_trim()
+        except Exception:
+            pass
+
+    @property
+    def is_trimming(self):
+        """Тянется ли сейчас одна из ручек обрезания"""
+        return bool(self.main_stack) and (self.left_border.is_dragging or self.right_border.is_dragging)
+
+    def rebind(self, clip, track, window_ms=None):
+        """Переназначает готовый элемент другому клипу (переиспользование при прокрутке)"""
+        self.clip = clip
+        self.track = track
+        self.window_ms = window_ms
+        self.is_dragging = False
+        self._ensure_clip_attrs()
+        self.peaks = self._load_peaks()
+        if self.main_stack:
+            for handle in (self.left_border, self.right_border):
+                handle.clip = clip
+                handle.is_dragging = False
+                handle.original_clip_duration = clip.duration
+        self.layout()
+
+    def _visible_px(self, width):
+        """Пиксели (x0, x1) содержимого клипа, попадающие в window_ms, или None — все"""
+        if self.window_ms is None:
+            return None
+        start_ms, end_ms = self.window_ms
+        x0 = self.time_ruler.time_to_pixels(start_ms - self.clip.start_time)
+        x1 = self.time_ruler.time_to_pixels(end_ms - self.clip.start_time)
+        return max(0, x0), min(width, x1)
+
+    def _build_waveform(self, width):
+        """Рисует видимую (после обрезания и в окне дорожки) часть волновой формы клипа"""
+        self._waveform_trim_start = self.clip.trim_start
+        self.waveform_holder = None
+        if self.peaks is None:
+            return ft.Container(
+                content=ft.Text(self.clip.name, size=10, color=ft.Colors.WHITE),
+                bgcolor=ft.Colors.BLUE_400,
+            )
+
+        from src.core.audio_visualizer import AudioWaveform
+        waveform = AudioWaveform(self.clip.file_path, width=width, height=30, color=ft.Colors.BLUE_400,
+                                 start_ms=self.clip.trim_start,
+                                 end_ms=self.clip.trim_start + self.clip.duration,
+                                 peaks=self.peaks, visible_px=self._visible_px(width))
+        self.waveform_holder = ft.Container(content=waveform.build(), left=0, top=0, width=width, height=30)
+        return ft.Stack([self.waveform_holder], width=width, height=30)
+
     def _get_tooltip(self):
         return (
             f"{self.clip.name}\n"
@@ -241,9 +319,8 @@ class DraggableClip:
                 new_time_ms = max_clip_end_time - self.clip.duration
                 new_time_ms = max(0, new_time_ms)
 
-            self.clip.start_time = new_time_ms
             self.clip.original_start_time = new_time_ms
-            self.clip.update_end_time()
+            self.track.move_clip(self.clip, new_time_ms)
 
             new_pos = self.time_ruler.time_to_pixels(self.clip.start_time)
             self.spacer_left.width = new_pos
@@ -264,22 +341,39 @@ class DraggableClip:
         if self.on_state_changed:
             self.on_state_changed("trimmed")
 
-    def update_on_trim(self):
+    def layout(self, rebuild_waveform=True):
+        """Пересчитывает геометрию клипа по текущему масштабу без пересоздания элементов
+
+        rebuild_waveform=False (во время обрезания) не перестраивает контур
+        волновой формы, а только сдвигает уже построенный вслед за левой ручкой.
+        """
         clip_width_pixels = self.time_ruler.time_to_pixels(self.clip.duration)
         clip_width_pixels = max(self.CLIP_MIN_WIDTH, clip_width_pixels)
         clip_start_pixels = self.time_ruler.time_to_pixels(self.clip.start_time)
 
         self.spacer_left.width = clip_start_pixels
+        self.clip_container.tooltip = self._get_tooltip()
+
+        if not self.main_stack:
+            self.clip_container.width = clip_width_pixels
+            return
+
         clip_content_width = clip_width_pixels - ClipBorderHandle.HANDLE_WIDTH
         clip_content_width = max(self.CLIP_MIN_WIDTH, clip_content_width)
         self.clip_container.width = clip_content_width
-        self.clip_container.tooltip = self._get_tooltip()
+        if rebuild_waveform:
+            self.clip_container.content = self._build_waveform(clip_content_width)
+        elif self.waveform_holder is not None:
+            self.waveform_holder.left = -self.time_ruler.time_to_pixels(self.clip.trim_start - self._waveform_trim_start)
+            self.clip_container.content.width = clip_content_width
 
-        if self.main_stack:
-            self.main_stack.width = clip_width_pixels + ClipBorderHandle.HANDLE_WIDTH
-            if len(self.main_stack.controls) >= 3:
-                right_border_container = self.main_stack.controls[2]
-                right_border_container.left = clip_width_pixels - ClipBorderHandle.HANDLE_WIDTH
+        self.main_stack.width = clip_width_pixels + ClipBorderHandle.HANDLE_WIDTH
+        if len(self.main_stack.controls) >= 3:
+            right_border_container = self.main_stack.controls[2]
+            right_border_container.left = clip_width_pixels - ClipBorderHandle.HANDLE_WIDTH
+
+    def update_on_trim(self, rebuild_waveform=True):
+        self.layout(rebuild_waveform)
 
         if hasattr(self.spacer_left, 'page') and self.spacer_left.page:
             self.spacer_left.update()
@@ -289,17 +383,7 @@ class DraggableClip:
             self.main_stack.update()
 
     def update_position(self):
-        clip_start_pixels = self.time_ruler.time_to_pixels(self.clip.start_time)
-        clip_width_pixels = self.time_ruler.time_to_pixels(self.clip.duration)
-        clip_width_pixels = max(self.CLIP_MIN_WIDTH, clip_width_pixels)
-
-        self.spacer_left.width = clip_start_pixels
-        self.clip_container.width = clip_width_pixels
-
-        if self.main_stack:
-            self.main_stack.width = clip_width_pixels + ClipBorderHandle.HANDLE_WIDTH * 2
-
-        self.clip_container.tooltip = self._get_tooltip()
+        self.layout()
 
     def build(self):
         return self.main_container
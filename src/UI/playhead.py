@@ -0,0 +1,102 @@
+import flet as ft
+
+
+class PlayheadOverlay:
+    """Единый курсор воспроизведения поверх всех дорожек
+
+    Вместо прогресс-слайдера на каждой дорожке позиция показывается одной
+    вертикальной линией; в кадре меняется только её свойство left.
+    Перемотка по клику и перетаскиванию на любой дорожке идёт через общие
+    методы seek_at/begin_drag/drag_to/end_drag: координата x берётся в
+    системе содержимого дорожки, поэтому не зависит от прокрутки.
+    """
+
+    def __init__(self, editor, time_ruler, left_offset=0, color=ft.Colors.RED_400):
+        self.editor = editor
+        self.time_ruler = time_ruler
+        self.left_offset = left_offset
+        self.scroll_px = 0
+        self.time_ms = 0
+        self.is_dragging = False
+        self.was_playing = False
+        self.line = ft.Container(width=2, bgcolor=color, left=left_offset, top=0, bottom=0)
+
+    def _place(self):
+        x = self.time_ruler.time_to_pixels(self.time_ms) - self.scroll_px
+        self.line.left = self.left_offset + x
+        self.line.visible = x >= 0
+
+    def set_time(self, time_ms):
+        """Переносит курсор на time_ms без отправки на страницу"""
+        if self.is_dragging:
+            return
+        self.time_ms = time_ms
+        self._place()
+
+    def set_scroll(self, scroll_px):
+        """Учитывает горизонтальную прокрутку дорожек"""
+        self.scroll_px = max(0, scroll_px or 0)
+        self._place()
+
+    def _percent_at(self, x):
+        time_ms = self.time_ruler.pixels_to_time(max(0, x))
+        duration = self.editor.project.duration
+        return max(0, min(1, time_ms / duration)) if duration > 0 else 0
+
+    def _push(self):
+        try:
+            if self.line.page:
+                self.line.update()
+        except Exception:
+            pass
+
+    def seek_at(self, x):
+        """Перематывает на точку x (пиксели содержимого дорожки)"""
+        percent = self._percent_at(x)
+        self.time_ms = percent * self.editor.project.duration
+        self._place()
+        self._push()
+        self.editor.set_playback_position(percent, seeking=False)
+
+    def begin_drag(self):
+        self.is_dragging = True
+        self.was_playing = self.editor.is_playing()
+        if self.was_playing:
+            self.editor.project.paused = True
+
+    def drag_to(self, x):
+        if not self.is_dragging:
+            return
+        self.time_ms = self._percent_at(x) * self.editor.project.duration
+        self._place()
+        self._push()
+
+    def end_drag(self):
+        if not self.is_dragging:
+            return
+        self.is_dragging = False
+        duration = self.editor.project.duration
+        self.editor.set_playback_position(self.time_ms / duration if duration > 0 else 0, seeking=True)
+        self.editor.project.seeking = False
+        if self.was_playing:
+            self.editor.project.playing = True
+            self.editor.project.paused = False
+        self.was_playing = False
+
+
+class SeekStrip:
+    """Полоса перемотки дорожки без собственного индикатора прогресса"""
+
+    def __init__(self, overlay, height=15):
+        self.overlay = overlay
+        self.gesture_detector = ft.GestureDetector(
+            content=ft.Container(expand=True, height=height, bgcolor=ft.Colors.GREY_600,
+                                 border_radius=height / 2),
+            on_tap_down=lambda e: e.local_x is not None and overlay.seek_at(e.local_x),
+            on_pan_start=lambda e: overlay.begin_drag(),
+            on_pan_update=lambda e: e.local_x is not None and overlay.drag_to(e.local_x),
+            on_pan_end=lambda e: overlay.end_drag(),
+        )
+
+    def build(self):
+        return self.gesture_detector
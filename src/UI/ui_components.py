@@ -5,7 +5,10 @@ import os
 from pathlib import Path
 import platform
 
-from src.UI.drag_drop import create_draggable_clip_visualization
+from src.UI.canvas_timeline import CanvasTimelineRenderer, RULER_HEIGHT, TRACK_GAP, TRACK_HEIGHT
+from src.UI.clip_views import ClipViewRegistry, TimelineViewport
+from src.UI.playhead import PlayheadOverlay, SeekStrip
+from src.UI.ui_scheduler import DEFAULT_UI_FPS, UiUpdateScheduler
 from src.core.audio_exporter import AudioExporter
 from src.UI.file_dialog import FileDialog
 
@@ -115,11 +118,13 @@ class SyncSlider:
                 self.editor.project.paused = False
             self.was_playing = False
 
-    def _update_visual_progress(self, percent):
-        """Обновляет визуальный прогресс"""
+    def _update_visual_progress(self, percent, push=True):
+        """Обновляет визуальный прогресс; push=False только меняет ширину без отправки на страницу"""
         container_width = self._get_container_width()
         progress_width = percent * container_width
         self.progress_container.width = progress_width
+        if not push:
+            return
         try:
             if hasattr(self.progress_container, 'page') and self.progress_container.page:
                 self.progress_container.update()
@@ -128,10 +133,10 @@ class SyncSlider:
         except Exception:
             pass
 
-    def set_position(self, position, visual_only=False):
+    def set_position(self, position, visual_only=False, push=True):
         """Устанавливает позицию слайдера (от внешних источников)"""
         if not self.is_dragging or visual_only:
-            self._update_visual_progress(position)
+            self._update_visual_progress(position, push)
 
     def build(self):
         """Возвращает собранный слайдер"""
@@ -208,11 +213,18 @@ class TimeRuler:
         return self.ruler_width
 
     def update_ruler(self):
-        """Обновляет линейку с правильными расчетами"""
+        """Обновляет линейку с правильными расчетами
+
+        В canvas-режиме деления рисует CanvasTimelineRenderer, здесь
+        пересчитывается только ширина.
+        """
         if not self.size_manager.page:
             return
 
         total_width = self.calculate_ruler_width()
+        if getattr(self.track_manager, 'canvas_timeline', None):
+            return
+
         markers = []
         total_duration_sec = max(10, self.editor.project.duration / 1000)
         seconds_step = self._calculate_optimal_step()
@@ -350,13 +362,48 @@ class ScrollSyncManager:
                     pass
         self.is_syncing = False
 
+    def scroll_all_to(self, source_id, offset):
+        """Прокручивает все контролы, кроме источника, к абсолютной позиции"""
+        if self.is_syncing:
+            return
+        self.is_syncing = True
+        for control_id, control in self.scroll_controls.items():
+            if control_id != source_id:
+                try:
+                    control.scroll_to(offset=offset, duration=0)
+                except Exception:
+                    pass
+        self.is_syncing = False
+
 
 class TrackManager:
-    """Класс для управления дорожками и UI компонентами"""
-
-    def __init__(self, editor, page):
+    """Класс для управления дорожками и UI компонентами
+
+    render_mode="widgets" строит таймлайн из отдельных Flet-элементов
+    (клип — DraggableClip), render_mode="canvas" рисует линейку и все
+    дорожки на одном Canvas через CanvasTimelineRenderer.
+
+    playhead_mode="sliders" даёт каждой дорожке свой прогресс-слайдер,
+    playhead_mode="overlay" — один курсор PlayheadOverlay поверх всех
+    дорожек, прокрутка которых при этом синхронизируется. В canvas-режиме
+    курсор всегда одна фигура Canvas.
+    """
+
+    RENDER_MODES = ("widgets", "canvas")
+    PLAYHEAD_MODES = ("sliders", "overlay")
+    # Смещение содержимого дорожки: рамка, отступ, заголовок и промежуток
+    TRACK_CONTENT_LEFT = 1 + 10 + 150 + 10
+
+    def __init__(self, editor, page, render_mode="widgets", ui_fps=DEFAULT_UI_FPS, playhead_mode="sliders"):
+        if render_mode not in self.RENDER_MODES:
+            raise ValueError(f"Неизвестный режим отрисовки: {render_mode}")
+        if playhead_mode not in self.PLAYHEAD_MODES:
+            raise ValueError(f"Неизвестный режим курсора: {playhead_mode}")
         self.editor = editor
         self.page = page
+        self.render_mode = render_mode
+        self.playhead_mode = playhead_mode
+        self.ui_scheduler = UiUpdateScheduler(page, fps=ui_fps)
         self.size_manager = SizeManager(page)
         self.scroll_sync = ScrollSyncManager()
         self.size_manager.update_sizes()
@@ -366,9 +413,11 @@ class TrackManager:
         self.track_clips_visualizations = []
         self.track_scroll_controls = []
         self.track_listviews = []
+        self.track_viewports = []
+        self.track_marker_stacks = []
 
         self.tracks_column = ft.Column(
-            spacing=10,
+            spacing=0 if render_mode == "canvas" else 10,
             scroll=ft.ScrollMode.AUTO,
             expand=True,
         )
@@ -377,6 +426,25 @@ class TrackManager:
 
         self.time_ruler = TimeRuler(editor, self.size_manager, self)
         self.size_manager.time_ruler = self.time_ruler
+        self.clip_views = ClipViewRegistry(
+            self.time_ruler,
+            editor=self.editor,
+            on_drag_end_callback=self._on_clip_drag_end,
+            on_state_changed=self._on_clip_state_changed,
+        )
+        self._markers_keys = {}
+        self.canvas_timeline = None
+        self._canvas_container = None
+        if render_mode == "canvas":
+            self.canvas_timeline = CanvasTimelineRenderer(
+                editor,
+                self.time_ruler,
+                TimelineViewport(self.time_ruler, width_px=self.size_manager.track_clips_width or 1200),
+                on_clip_moved=self._on_clip_drag_end,
+            )
+        self.playhead_overlay = None
+        if render_mode == "widgets" and playhead_mode == "overlay":
+            self.playhead_overlay = PlayheadOverlay(editor, self.time_ruler, left_offset=self.TRACK_CONTENT_LEFT)
         self.main_slider = self.time_ruler.slider
         self.main_slider.on_position_changed = self._on_all_sliders_changed
         self.editor.set_ui_update_callback(self._on_playback_position_changed)
@@ -421,6 +489,16 @@ class TrackManager:
             color=ft.Colors.WHITE,
         )
 
+        self._import_jobs = []
+        self.import_progress = ft.ProgressBar(width=200, value=0)
+        self.import_text = ft.Text("", size=12)
+        self.import_status = ft.Row([
+            self.import_progress,
+            self.import_text,
+            ft.IconButton(ft.Icons.CLOSE, icon_size=16, tooltip="Отменить импорт",
+                          on_click=lambda e: self.cancel_imports()),
+        ], visible=False)
+
     def _on_files_selected(self, file_paths):
         """Обработчик выбора файлов для добавления в дорожку"""
         if hasattr(self, '_current_track_index') and file_paths:
@@ -428,27 +506,43 @@ class TrackManager:
         self._current_track_index = None
 
     def _add_clips_to_track(self, track_index, file_paths):
-        """Добавляет клипы в указанную дорожку в конец"""
-        if 0 <= track_index < len(self.editor.project.tracks):
-            track = self.editor.project.tracks[track_index]
-
-            if track.clips:
-                last_clip_end = max(clip.end_time for clip in track.clips)
-            else:
-                last_clip_end = 0
-
-            current_start_time = last_clip_end
-            added_clips = []
+        """Добавляет клипы в конец дорожки через фоновую очередь импорта
+
+        Клипы появляются по мере декодирования в порядке выбора; прогресс
+        и кнопка отмены показываются рядом с кнопкой экспорта.
+        """
+        job = self.editor.import_clips(
+            track_index,
+            file_paths,
+            on_clip_added=lambda clip: self.ui_scheduler.submit("import_clips", self._apply_imported_clips),
+            on_progress=lambda done, total, path, ok: self.ui_scheduler.submit(
+                "import_progress", self._apply_import_progress),
+            on_complete=lambda job: self.ui_scheduler.submit("import_progress", self._apply_import_progress),
+        )
+        if job is not None:
+            self._import_jobs.append(job)
+            self.ui_scheduler.submit("import_progress", self._apply_import_progress)
+        return job
 
-            for file_path in file_paths:
-                clip_name = os.path.splitext(os.path.basename(file_path))
-                clip = self.editor.add_audio_clip(track_index, file_path, current_start_time, clip_name)
-                if clip:
-                    current_start_time = clip.end_time
-                    added_clips.append(clip)
+    def _apply_imported_clips(self):
+        """Показывает клипы, размещённые очередью импорта с прошлого кадра"""
+        self.time_ruler.update_ruler()
+        self.update_all_visualizations()
 
-            if added_clips:
-                self.update_all_visualizations()
+    def _apply_import_progress(self):
+        """Обновляет индикатор импорта по всем незавершённым пачкам"""
+        self._import_jobs = [job for job in self._import_jobs if not job.finished]
+        total = sum(job.total for job in self._import_jobs)
+        done = sum(job.done for job in self._import_jobs)
+        self.import_status.visible = total > 0
+        self.import_progress.value = done / total if total else 0
+        self.import_text.value = f"Импорт {done}/{total}" if total else ""
+
+    def cancel_imports(self):
+        """Отменяет все незавершённые импорты"""
+        for job in self._import_jobs:
+            job.cancel()
+        self.ui_scheduler.submit("import_progress", self._apply_import_progress)
 
     def _open_file_dialog_for_track(self, track_index):
         """Открывает диалог выбора файлов для конкретной дорожки"""
@@ -471,22 +565,27 @@ class TrackManager:
         threading.Thread(target=reset_border, daemon=True).start()
 
     def _on_playback_position_changed(self, progress):
-        """Обновляет все слайдеры при изменении позиции воспроизведения"""
-        def update_ui():
-            for slider in self.sync_sliders:
-                slider.set_position(progress)
-            if hasattr(self, 'main_slider'):
-                self.main_slider.set_position(progress)
-            if self.page:
-                self.page.update()
+        """Планирует обновление слайдеров и курсора в ближайший кадр планировщика"""
+        self.ui_scheduler.submit("position", lambda: self._apply_playback_position(progress))
 
-        if self.page:
-            self.page.run_thread(update_ui)
+    def _apply_playback_position(self, progress):
+        """Переносит позицию на слайдеры и курсор без отдельных update()"""
+        for slider in self.sync_sliders:
+            slider.set_position(progress, push=False)
+        if hasattr(self, 'main_slider'):
+            self.main_slider.set_position(progress, push=False)
+        if self.canvas_timeline:
+            self.canvas_timeline.set_playhead(self.editor.project.current_time, push=False)
+        if self.playhead_overlay:
+            self.playhead_overlay.set_time(self.editor.project.current_time)
 
     def _on_all_sliders_changed(self, position, visual_only=False):
         """Синхронизирует все слайдеры при изменении любого из них"""
         for slider in self.sync_sliders:
             slider.set_position(position, visual_only)
+        if self.playhead_overlay:
+            self.playhead_overlay.set_time(position * self.editor.project.duration)
+            self.playhead_overlay._push()
 
     def _initialize_default_tracks(self):
         """Создает начальные дорожки с клипами"""
@@ -514,9 +613,45 @@ class TrackManager:
         if self.page:
             self.page.update()
 
+    def _create_track_header(self, track, index):
+        """Заголовок дорожки для canvas-режима; высота совпадает со строкой дорожки на Canvas"""
+        return ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Text(track.name, size=12, weight="bold"),
+                    ft.IconButton(
+                        ft.Icons.ADD,
+                        icon_size=16,
+                        on_click=lambda e, idx=index: self._open_file_dialog_for_track(idx),
+                        tooltip="Добавить файл"
+                    ),
+                ], spacing=0, height=30),
+                ft.Slider(
+                    min=0,
+                    max=100,
+                    value=track.volume * 100,
+                    width=150,
+                    height=30,
+                    on_change=lambda e: self.on_track_volume_change(index, e.control.value)
+                ),
+            ], spacing=0),
+            width=150,
+            height=TRACK_HEIGHT,
+            margin=ft.margin.only(bottom=TRACK_GAP),
+        )
+
     def _create_track_ui(self, track, index):
         """Создает UI для одной дорожки"""
-        track_slider = SyncSlider(self.editor, self.size_manager, height=40)
+        if self.canvas_timeline:
+            return self._create_track_header(track, index)
+
+        if self.playhead_overlay:
+            seek_control = SeekStrip(self.playhead_overlay).build()
+        else:
+            track_slider = SyncSlider(self.editor, self.size_manager, height=40)
+            track_slider.on_position_changed = self._on_all_sliders_changed
+            self.sync_sliders.append(track_slider)
+            seek_control = track_slider.build()
         volume_slider = ft.Slider(
             min=0,
             max=100,
@@ -524,39 +659,15 @@ class TrackManager:
             width=150,
             on_change=lambda e: self.on_track_volume_change(index, e.control.value)
         )
-        track_slider.on_position_changed = self._on_all_sliders_changed
-        self.sync_sliders.append(track_slider)
 
+        self.track_viewports.append(TimelineViewport(self.time_ruler, width_px=self.size_manager.track_clips_width or 1200))
         clips_visualization = self._create_clips_visualization(track, index)
         self.track_clips_visualizations.append(clips_visualization)
 
-        current_ruler_width = self.time_ruler.ruler_width
-        new_width = current_ruler_width
-
-        time_markers = []
-        total_duration_sec = max(10, self.editor.project.duration / 1000)
-        pixels_per_second = self.time_ruler.pixels_per_second
-
-        for second in range(0, int(total_duration_sec) + 1, 2):
-            pos_px = second * pixels_per_second
-            time_markers.append(
-                ft.Container(
-                    left=pos_px,
-                    top=85,
-                    content=ft.Text(
-                        f"{second}s",
-                        size=8,
-                        color=ft.Colors.GREY_400,
-                        weight=ft.FontWeight.BOLD
-                    ),
-                )
-            )
-
-        time_markers_stack = ft.Stack(
-            time_markers,
-            width=new_width,
-            height=100
-        ) if time_markers else None
+        time_markers_stack = ft.Stack([], width=self.time_ruler.ruler_width, height=100,
+                                      clip_behavior=ft.ClipBehavior.NONE)
+        self.track_marker_stacks.append(time_markers_stack)
+        self._update_time_markers(index)
 
         clips_container = ft.Container(
             expand=True,
@@ -584,7 +695,7 @@ class TrackManager:
                     time_markers_stack,
                 ], clip_behavior=ft.ClipBehavior.NONE, height=60, expand=True),
                 ft.Container(
-                    content=track_slider.build(),
+                    content=seek_control,
                     expand=False,
                     height=15,
                 ),
@@ -595,9 +706,13 @@ class TrackManager:
             [track_content],
             horizontal=True,
             expand=True,
+            on_scroll=lambda e, idx=index: self._on_timeline_scroll(idx, e),
+            on_scroll_interval=50,
         )
 
         self.track_listviews.append(list_view)
+        if self.playhead_overlay:
+            self.scroll_sync.register_control(index, list_view)
 
         track_ui = ft.Container(
             content=ft.Row([
@@ -630,125 +745,76 @@ class TrackManager:
 
     def add_clip_to_track_visualization(self, track_index, clip):
         """Добавляет ТОЛЬКО ОДИН новый клип в визуализацию дорожки"""
-        if track_index >= len(self.editor.project.tracks):
-            return
-
-        track = self.editor.project.tracks[track_index]
+        self._sync_track_clips(track_index)
 
-        if track_index >= len(self.track_clips_visualizations):
+    def _sync_track_clips(self, track_index):
+        """Синхронизирует Stack дорожки с её клипами через реестр"""
+        if not 0 <= track_index < min(len(self.editor.project.tracks), len(self.track_clips_visualizations)):
             return
 
         clips_stack = self.track_clips_visualizations[track_index]
-
         if not isinstance(clips_stack, ft.Stack):
             return
 
         try:
-            draggable_vis = create_draggable_clip_visualization(
-                clip,
-                track,
-                self.time_ruler,
-                editor=self.editor,
-                top=30,
-                on_drag_end_callback=self._on_clip_drag_end,
-                on_state_changed=self._on_clip_state_changed
-            )
-
-            clip.draggable_vis = draggable_vis
-            clips_stack.controls.append(draggable_vis)
-
-            try:
+            self.clip_views.sync(self.editor.project.tracks[track_index], clips_stack,
+                                 self.track_viewports[track_index].window_ms())
+            if clips_stack.page:
                 clips_stack.update()
-            except Exception:
-                pass
-
         except Exception:
             pass
 
     def _create_clips_visualization(self, track, track_index):
-        """Создает визуализацию всех клипов на дорожке"""
+        """Создает визуализацию клипов дорожки, попадающих в видимую область"""
         clips_stack = ft.Stack([], height=100)
+        try:
+            self.clip_views.sync(track, clips_stack, self.track_viewports[track_index].window_ms())
+        except Exception:
+            pass
+        return clips_stack
 
-        def on_drag_end(clip):
-            self.update_all_visualizations()
-            self.editor.project._update_duration()
-            self.time_ruler.update_ruler()
-
-        def on_state_changed(state):
-            if state == "trimmed":
-                self.time_ruler.update_ruler()
-                if self.page:
-                    self.page.update()
-
-        for clip in track.get_clips_sorted():
+    def _on_timeline_scroll(self, track_index, e):
+        """Материализует клипы и подписи вокруг новой позиции прокрутки"""
+        if track_index >= len(self.track_viewports):
+            return
+        if self.playhead_overlay:
+            self._sync_overlay_scroll(track_index, e.pixels)
+        viewport = self.track_viewports[track_index]
+        if viewport.scroll_to(e.pixels, e.viewport_dimension):
+            viewport.refresh()
+            self._update_time_markers(track_index)
+            self._sync_track_clips(track_index)
             try:
-                draggable_obj = create_draggable_clip_visualization(
-                    clip,
-                    track,
-                    self.time_ruler,
-                    editor=self.editor,
-                    top=30,
-                    on_drag_end_callback=on_drag_end,
-                    on_state_changed=on_state_changed
-                )
-
-                clip._draggable_vis = draggable_obj
-                clips_stack.controls.append(draggable_obj)
-
+                self.track_marker_stacks[track_index].update()
             except Exception:
                 pass
 
-        return clips_stack
+    def _sync_overlay_scroll(self, track_index, pixels):
+        """Держит все дорожки на одной прокрутке, чтобы общий курсор совпадал с каждой"""
+        overlay = self.playhead_overlay
+        if pixels is None or abs(pixels - overlay.scroll_px) < 1:
+            return
+        overlay.set_scroll(pixels)
+        self.scroll_sync.scroll_all_to(track_index, pixels)
+        for index, viewport in enumerate(self.track_viewports):
+            if index != track_index and viewport.scroll_to(pixels):
+                viewport.refresh()
+                self._update_time_markers(index)
+                self._sync_track_clips(index)
+        overlay._push()
 
     def _on_clip_drag_end(self, clip):
         """Обработчик окончания перетаскивания клипа"""
-        self.update_all_visualizations()
         self.editor.project._update_duration()
         self.time_ruler.update_ruler()
+        self.update_all_visualizations()
 
     def _update_clip_visualization_only(self, clip):
         """Обновляет визуализацию ТОЛЬКО конкретного клипа"""
-        track_index = None
         for idx, track in enumerate(self.editor.project.tracks):
             if clip in track.clips:
-                track_index = idx
-                break
-
-        if track_index is None:
-            return
-
-        if track_index >= len(self.track_clips_visualizations):
-            return
-
-        clips_stack = self.track_clips_visualizations[track_index]
-
-        if not isinstance(clips_stack, ft.Stack):
-            return
-
-        from drag_drop import create_draggable_clip_visualization
-
-        try:
-            new_viz = create_draggable_clip_visualization(
-                clip,
-                self.editor.project.tracks[track_index],
-                self.time_ruler,
-                editor=self.editor,
-                top=30,
-                on_drag_end_callback=self._on_clip_drag_end,
-                on_state_changed=self._on_clip_state_changed
-            )
-
-            for i, control in enumerate(clips_stack.controls):
-                clips_stack.controls[i] = new_viz
-
-            try:
-                clips_stack.update()
-            except Exception:
-                pass
-            return
-
-        except Exception:
-            pass
+                self._sync_track_clips(idx)
+                return
 
     def _on_clip_state_changed(self, state):
         """Обработчик изменения состояния клипа"""
@@ -757,113 +823,83 @@ class TrackManager:
             if self.page:
                 self.page.update()
 
-    def update_all_visualizations(self):
-        """Обновляет визуализации для всех дорожек"""
-        try:
-            new_width = self.time_ruler.ruler_width
+    def _update_time_markers(self, track_index):
+        """Приводит подписи секунд дорожки к окну видимости
 
-            for i, track_ui in enumerate(self.track_ui_elements):
-                try:
-                    if isinstance(track_ui, ft.Container) and track_ui.content:
-                        row = track_ui.content
-                        if isinstance(row, ft.Row) and len(row.controls) > 1:
-                            list_container = row.controls[1]
-                            if isinstance(list_container, ft.Container):
-                                if i < len(self.track_listviews):
-                                    listview = self.track_listviews[i]
-                                    if isinstance(listview, ft.ListView) and len(listview.controls) > 0:
-                                        track_content = listview.controls[0]
-                                        if isinstance(track_content, ft.Container):
-                                            if isinstance(track_content.content, ft.Column):
-                                                column = track_content.content
-                                                if len(column.controls) > 0 and isinstance(column.controls[0], ft.Stack):
-                                                    stack = column.controls[0]
-
-                                                    time_markers = []
-                                                    total_duration_sec = max(10, self.editor.project.duration / 1000)
-                                                    pixels_per_second = self.time_ruler.pixels_per_second
-
-                                                    for second in range(0, int(total_duration_sec) + 1, 2):
-                                                        pos_px = second * pixels_per_second
-                                                        time_markers.append(
-                                                            ft.Container(
-                                                                left=pos_px,
-                                                                top=85,
-                                                                content=ft.Text(
-                                                                    f"{second}s",
-                                                                    size=8,
-                                                                    color=ft.Colors.GREY_400,
-                                                                    weight=ft.FontWeight.BOLD
-                                                                ),
-                                                            )
-                                                        )
-
-                                                    new_markers_stack = ft.Stack(
-                                                        time_markers,
-                                                        width=new_width,
-                                                        height=100,
-                                                        clip_behavior=ft.ClipBehavior.NONE
-                                                    )
-
-                                                    if len(stack.controls) > 2:
-                                                        stack.controls[2] = new_markers_stack
+        Существующие подписи переиспользуются; ничего не делается, если
+        окно, масштаб и длительность не изменились.
+        """
+        window = self.track_viewports[track_index].window_ms()
+        total_duration_sec = int(max(10, self.editor.project.duration / 1000))
+        pixels_per_second = self.time_ruler.pixels_per_second
+        key = (window, total_duration_sec, pixels_per_second)
+        if self._markers_keys.get(track_index) == key:
+            return
+        self._markers_keys[track_index] = key
 
-                except Exception:
-                    pass
+        first_second = max(0, int(window[0] / 1000) // 2 * 2)
+        last_second = min(total_duration_sec, int(window[1] / 1000) + 1)
+        markers = self.track_marker_stacks[track_index].controls
+
+        count = 0
+        for second in range(first_second, last_second + 1, 2):
+            pos_px = second * pixels_per_second
+            if count < len(markers):
+                markers[count].left = pos_px
+                markers[count].content.value = f"{second}s"
+            else:
+                markers.append(
+                    ft.Container(
+                        left=pos_px,
+                        top=85,
+                        content=ft.Text(
+                            f"{second}s",
+                            size=8,
+                            color=ft.Colors.GREY_400,
+                            weight=ft.FontWeight.BOLD
+                        ),
+                    )
+                )
+            count += 1
+        del markers[count:]
+        self.track_marker_stacks[track_index].width = self.time_ruler.ruler_width
+
+    def update_all_visualizations(self):
+        """Обновляет визуализации дорожек
+
+        Элементы клипов не пересоздаются: реестр добавляет новые, убирает
+        удалённые и пересчитывает геометрию только изменившихся. На каждой
+        дорожке существуют только клипы и подписи из окна видимости.
+        """
+        try:
+            if self.canvas_timeline:
+                self.time_ruler.calculate_ruler_width()
+                self.canvas_timeline.render()
+                if self._canvas_container:
+                    self._canvas_container.height = self.canvas_timeline.height + 20
+                if self.page:
+                    self.page.update()
+                return
 
-            for i, track_vis in enumerate(self.track_clips_visualizations):
-                if isinstance(track_vis, ft.Stack):
-                    track_vis.controls.clear()
-                    track_vis.width = new_width
+            new_width = self.time_ruler.ruler_width
 
             for track_index, track in enumerate(self.editor.project.tracks):
                 if track_index < len(self.track_clips_visualizations):
+                    window = self.track_viewports[track_index].refresh()
+                    self._update_time_markers(track_index)
                     track_vis_stack = self.track_clips_visualizations[track_index]
                     if isinstance(track_vis_stack, ft.Stack):
-                        for clip_idx, clip in enumerate(track.clips):
-                            try:
-                                draggable_vis = create_draggable_clip_visualization(
-                                    clip,
-                                    track,
-                                    self.time_ruler,
-                                    editor=self.editor,
-                                    top=30,
-                                    on_drag_end_callback=self._on_clip_drag_end,
-                                    on_state_changed=self._on_clip_state_changed
-                                )
-
-                                track_vis_stack.controls.append(draggable_vis)
-
-                            except Exception:
-                                pass
-
-            for i, track_ui in enumerate(self.track_ui_elements):
-                try:
-                    if isinstance(track_ui, ft.Container) and track_ui.content:
-                        row = track_ui.content
-                        if isinstance(row, ft.Row) and len(row.controls) > 1:
-                            list_container = row.controls[1]
-                            if isinstance(list_container, ft.Container):
-                                if i < len(self.track_listviews):
-                                    listview = self.track_listviews[i]
-                                    if isinstance(listview, ft.ListView) and len(listview.controls) > 0:
-                                        track_content = listview.controls[0]
-                                        if isinstance(track_content, ft.Container):
-                                            track_content.update()
+                        track_vis_stack.width = new_width
+                        self.clip_views.sync(track, track_vis_stack, window)
 
-                except Exception:
-                    pass
-
-            new_width = self.time_ruler.ruler_width
-            for i, listview in enumerate(self.track_listviews):
+            for listview in self.track_listviews:
                 if isinstance(listview, ft.ListView) and len(listview.controls) > 0:
                     track_content = listview.controls[0]
                     if isinstance(track_content, ft.Container):
                         track_content.width = new_width
-                        try:
-                            track_content.update()
-                        except:
-                            pass
+
+            if self.playhead_overlay:
+                self.playhead_overlay.set_time(self.editor.project.current_time)
 
             if self.page:
                 self.page.update()
@@ -882,12 +918,43 @@ class TrackManager:
         if self.page:
             self.page.update()
 
+    def _on_canvas_scroll(self, e):
+        """Перерисовывает Canvas, когда видимая область подходит к краю окна"""
+        if self.canvas_timeline.viewport.scroll_to(e.pixels, e.viewport_dimension):
+            self.canvas_timeline.render()
+            try:
+                self.canvas_timeline.canvas.update()
+            except Exception:
+                pass
+
     def get_track_list_container(self):
         """Возвращает контейнер со списком дорожек"""
+        if self.canvas_timeline:
+            timeline = ft.ListView(
+                [self.canvas_timeline.build()],
+                horizontal=True,
+                expand=True,
+                on_scroll=self._on_canvas_scroll,
+                on_scroll_interval=50,
+            )
+            self._canvas_container = ft.Container(content=timeline, expand=True,
+                                                  height=self.canvas_timeline.height + 20)
+            return ft.Column([
+                self.zoom_buttons,
+                ft.Row([self.export_button, self.import_status]),
+                ft.Row([
+                    ft.Column([ft.Container(height=RULER_HEIGHT), self.tracks_column], spacing=0, width=160),
+                    self._canvas_container,
+                ], vertical_alignment=ft.CrossAxisAlignment.START, expand=True),
+            ], spacing=10, expand=True)
+
+        timeline = self.tracks_column
+        if self.playhead_overlay:
+            timeline = ft.Stack([self.tracks_column, self.playhead_overlay.line], expand=True)
         return ft.Column([
             self.zoom_buttons,
-            self.export_button,
-            self.tracks_column,
+            ft.Row([self.export_button, self.import_status]),
+            timeline,
         ], spacing=10, expand=True)
 
     def zoom_in(self):
@@ -1019,7 +1086,7 @@ class TrackManager:
             if self.page:
                 self.page.update()
 
-            exporter = AudioExporter(self.editor.project)
+            exporter = AudioExporter(self.editor.project, workers=os.cpu_count() or 1)
 
             def on_progress(progress, message):
                 """Обновляет прогресс"""
@@ -1053,7 +1120,8 @@ class TrackManager:
                 str(output_path),
                 format_ext,
                 progress_callback=on_progress,
-                completion_callback=on_complete
+                completion_callback=on_complete,
+                streaming=True,
             )
 
         def close_dialog():
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+
+DEFAULT_UI_FPS = 30
+
+
+class UiUpdateScheduler:
+    """Планировщик обновлений страницы с объединением по кадрам
+
+    Источники (позиция воспроизведения, текст транспорта, индикаторы)
+    вызывают submit(key, apply): apply только меняет свойства элементов,
+    а page.update() выполняется в фоне не чаще fps раз в секунду — один
+    раз на все изменения кадра. Для каждого ключа хранится лишь последнее
+    изменение: устаревшие отбрасываются, а не ставятся в очередь.
+
+    Хуки кадра (add_frame_hook) вызываются в каждом отправленном кадре,
+    например чтобы пересчитать текст позиции вслед за курсором.
+    """
+
+    def __init__(self, page, fps=DEFAULT_UI_FPS):
+        if fps <= 0:
+            raise ValueError("Частота обновлений должна быть положительной")
+        self.page = page
+        self.fps = fps
+        self._pending = {}
+        self._frame_hooks = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+        self._last_frame = 0.0
+        self._frame_times = deque()
+        self.updates = 0
+        self.dropped = 0
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps
+
+    def submit(self, key, apply):
+        """Ставит изменение в следующий кадр, заменяя предыдущее с тем же ключом"""
+        with self._lock:
+            if key in self._pending:
+                self.dropped += 1
+            self._pending[key] = apply
+        self._wakeup.set()
+        self._ensure_thread()
+
+    def add_frame_hook(self, key, apply):
+        """Регистрирует функцию, вызываемую в каждом отправляемом кадре"""
+        with self._lock:
+            self._frame_hooks[key] = apply
+
+    def remove_frame_hook(self, key):
+        with self._lock:
+            self._frame_hooks.pop(key, None)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while self._running:
+            self._wakeup.wait()
+            delay = self._last_frame + self.interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Применяет накопленные изменения и отправляет один page.update()
+
+        Возвращает True, если кадр был отправлен.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            hooks = list(self._frame_hooks.values()) if pending else []
+        if not pending:
+            return False
+
+        for apply in list(pending.values()) + hooks:
+            try:
+                apply()
+            except Exception:
+                pass
+
+        try:
+            if self.page:
+                self.page.update()
+        except Exception:
+            pass
+
+        now = time.monotonic()
+        self._last_frame = now
+        with self._lock:
+            self.updates += 1
+            self._frame_times.append(now)
+            while self._frame_times and now - self._frame_times[0] > 1.0:
+                self._frame_times.popleft()
+        return True
+
+    def updates_per_second(self):
+        """Число отправленных page.update() за последнюю секунду"""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for t in self._frame_times if now - t <= 1.0)
+
+    def stats(self):
+        """Счётчики для проверки частоты обновлений страницы"""
+        return {
+            'fps': self.fps,
+            'updates': self.updates,
+            'dropped': self.dropped,
+            'updates_per_second': self.updates_per_second(),
+        }
+
+    def stop(self):
+        """Останавливает фоновый поток, отправив последний кадр"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.flush()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from src.core.audio_cache import content_hash
+from src.core.pcm_store import PcmDiskStore
+from src.core.waveform import WaveformPeakStore
+
+DEFAULT_ASSETS_DIR = os.path.join(os.path.expanduser('~'), '.sigmaudio', 'assets')
+
+
+class AssetPeakStore(WaveformPeakStore):
+    """Пирамиды пиков внутри каталогов ресурсов AssetStore"""
+
+    def __init__(self, asset_store):
+        super().__init__(asset_store.root)
+        self.asset_store = asset_store
+
+    def path_for(self, digest):
+        return os.path.join(self.asset_store.asset_dir(digest), 'peaks.npz')
+
+
+class AssetStore(PcmDiskStore):
+    """Хранилище ресурсов по хэшу содержимого исходного файла
+
+    Для каждого уникального содержимого (SHA-1) заводится каталог
+    <root>/<sha1>/ с нормализованным PCM (pcm-<частота>-<каналы>.npy),
+    пирамидой пиков (peaks.npz), результатами анализа (analysis.json) и
+    списком путей, под которыми файл встречался (sources.json). Один и тот
+    же сэмпл на многих дорожках и в разных проектах декодируется,
+    передискретизируется и анализируется один раз.
+
+    Для DecodedAudioCache хранилище работает как PcmDiskStore (load/save
+    оттуда же, меняется только путь к файлам PCM) и даёт ключи по
+    содержимому. Кэш увеличивает счётчик
+    ссылок ресурса на каждый acquire клипа и уменьшает на release; gc()
+    удаляет только ресурсы без ссылок, исходные файлы которых больше не
+    существуют.
+    """
+
+    def __init__(self, root=DEFAULT_ASSETS_DIR, min_bytes=0):
+        super().__init__(root, min_bytes)
+        self.root = root
+        self.peaks = AssetPeakStore(self)
+        self._refcounts = {}
+        self._known_sources = set()
+        self._lock = threading.Lock()
+
+    def asset_dir(self, digest):
+        return os.path.join(self.root, digest)
+
+    def asset_id(self, path):
+        """Хэш содержимого файла; заодно запоминает path как источник ресурса"""
+        digest = content_hash(path)
+        stat = os.stat(path)
+        source = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if (digest, source) in self._known_sources:
+                return digest
+            self._known_sources.add((digest, source))
+            sources = self._read_json(digest, 'sources.json') or []
+            sources = [s for s in sources if s[0] != source[0]] + [list(source)]
+            self._write_json(digest, 'sources.json', sources)
+        return digest
+
+    def retain(self, digest):
+        with self._lock:
+            self._refcounts[digest] = self._refcounts.get(digest, 0) + 1
+
+    def release(self, digest):
+        with self._lock:
+            count = self._refcounts.get(digest, 0) - 1
+            if count > 0:
+                self._refcounts[digest] = count
+            else:
+                self._refcounts.pop(digest, None)
+
+    def refcount(self, digest):
+        with self._lock:
+            return self._refcounts.get(digest, 0)
+
+    def _read_json(self, digest, name):
+        try:
+            with open(os.path.join(self.asset_dir(digest), name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, digest, name, data):
+        directory = self.asset_dir(digest)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.json', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    def _base_path(self, key):
+        """Путь к PCM по ключу кэша (('asset', sha1), (частота, каналы, ширина))"""
+        frame_rate, channels, _ = key[1]
+        name = f"pcm-{frame_rate or 'native'}-{channels or 'native'}"
+        return os.path.join(self.asset_dir(key[0][1]), name)
+
+    def analysis(self, digest, samples=None, frame_rate=None):
+        """Результаты анализа ресурса (длительность, пик и RMS в dBFS)
+
+        Считаются один раз по переданным samples и сохраняются в
+        analysis.json; без samples возвращает сохранённое или None.
+        """
+        stored = self._read_json(digest, 'analysis.json')
+        if stored is not None or samples is None:
+            return stored
+
+        frames = len(samples)
+        peak = float(np.abs(samples).max()) if frames else 0.0
+        rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if frames else 0.0
+        result = {
+            'frame_rate': int(frame_rate),
+            'channels': int(samples.shape[1]),
+            'frames': int(frames),
+            'duration_ms': round(1000 * frames / frame_rate) if frame_rate else 0,
+            'peak_dbfs': round(20 * np.log10(peak / 32768), 2) if peak else None,
+            'rms_dbfs': round(20 * np.log10(rms / 32768), 2) if rms else None,
+        }
+        self._write_json(digest, 'analysis.json', result)
+        return result
+
+    def entries(self):
+        """Хэши всех ресурсов в хранилище"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted(name for name in names if os.path.isdir(self.asset_dir(name)))
+
+    def _has_live_source(self, digest):
+        for path, mtime_ns, size in self._read_json(digest, 'sources.json') or []:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+                return True
+        return False
+
+    def disk_usage(self, digest=None):
+        """Объём на диске одного ресурса или всего хранилища (байт)"""
+        total = 0
+        for name in [digest] if digest else self.entries():
+            for root, _, files in os.walk(self.asset_dir(name)):
+                total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+    def gc(self, keep=(), dry_run=False):
+        """Удаляет осиротевшие ресурсы и возвращает список [(sha1, байт)]
+
+        Ресурс осиротел, если на него нет ссылок в этом процессе, его нет в
+        keep (например, ресурсы других открытых проектов) и ни один из
+        запомненных исходных файлов не существует в прежнем виде.
+        """
+        keep = set(keep)
+        removed = []
+        for digest in self.entries():
+            if digest in keep or self.refcount(digest) > 0 or self._has_live_source(digest):
+                continue
+            removed.append((digest, self.disk_usage(digest)))
+            if not dry_run:
+                shutil.rmtree(self.asset_dir(digest), ignore_errors=True)
+                self.peaks.clear_memory()
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обслуживание хранилища ресурсов SigmAudio")
+    parser.add_argument("command", choices=["gc", "stats"])
+    parser.add_argument("--root", default=DEFAULT_ASSETS_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что будет удалено")
+    args = parser.parse_args()
+
+    store = AssetStore(args.root)
+    if args.command == "stats":
+        print(f"ресурсов: {len(store.entries())}, на диске: {store.disk_usage() / 2 ** 20:.1f} МБ")
+        return
+
+    removed = store.gc(dry_run=args.dry_run)
+    for digest, size in removed:
+        print(f"{'будет удалён' if args.dry_run else 'удалён'} {digest} ({size / 2 ** 20:.1f} МБ)")
+    print(f"итого: {len(removed)} ресурсов, {sum(size for _, size in removed) / 2 ** 20:.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+from pydub import AudioSegment
+
+from src.core.decoders import default_decoders
+from src.core.resampler import resample
+
+DEFAULT_MEMORY_BUDGET = 1024 * 1024 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_content_hashes = {}
+_content_hashes_lock = threading.Lock()
+
+
+def _hash_memo_key(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def known_content_hash(path):
+    """SHA-1 файла, если он уже посчитан для текущей версии файла, иначе None
+
+    Не читает файл (только stat), поэтому годится для потока интерфейса.
+    """
+    try:
+        memo_key = _hash_memo_key(path)
+    except OSError:
+        return None
+    with _content_hashes_lock:
+        return _content_hashes.get(memo_key)
+
+
+def content_hash(path):
+    """SHA-1 содержимого файла (hex)
+
+    Результат запоминается по (путь, mtime, размер), поэтому повторный
+    вызов для неизменённого файла не читает его заново.
+    """
+    memo_key = _hash_memo_key(path)
+    with _content_hashes_lock:
+        digest = _content_hashes.get(memo_key)
+    if digest is not None:
+        return digest
+
+    hasher = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+
+    with _content_hashes_lock:
+        _content_hashes[memo_key] = digest
+    return digest
+
+
+class DecodedAudio:
+    """Декодированный аудиофайл, общий для всех клипов, ссылающихся на него
+
+    Сэмплы хранятся как int16-массив (frames × channels): либо в памяти,
+    либо как numpy.memmap поверх файла из PcmDiskStore. Запись может
+    содержать лишь участок файла: start_ms — время исходного файла,
+    которому соответствует первый кадр (0 для всего файла), start_frame —
+    то же в кадрах при frame_rate.
+    """
+
+    sample_width = 2
+
+    def __init__(self, key, samples, frame_rate, segment=None, start_ms=0):
+        self.key = key
+        # Данные общие для всех клипов: срезы отдаются наружу только для чтения
+        self.samples = samples.view()
+        self.samples.flags.writeable = False
+        self.start_ms = start_ms
+        self.frame_rate = frame_rate
+        self.start_frame = round(start_ms * frame_rate / 1000) if frame_rate else 0
+        self.channels = samples.shape[1]
+        self.frame_count = samples.shape[0]
+        self.duration = round(1000 * self.frame_count / frame_rate) if frame_rate else 0
+        self.raw_data = memoryview(self.samples).cast('B') if samples.size else b''
+        self.mapped = isinstance(samples, np.memmap)
+        self.nbytes = 0 if self.mapped else samples.nbytes
+        self.mapped_bytes = samples.nbytes if self.mapped else 0
+        self.refcount = 0
+        self._segment = segment
+
+    @property
+    def asset_id(self):
+        """Хэш содержимого, если запись получена через хранилище ресурсов"""
+        return self.key[0][1] if self.key and isinstance(self.key[0], tuple) else None
+
+    @classmethod
+    def from_segment(cls, key, segment):
+        """Создаёт запись из AudioSegment без копирования PCM"""
+        if segment.sample_width != cls.sample_width:
+            segment = segment.set_sample_width(cls.sample_width)
+        samples = np.frombuffer(segment.raw_data, dtype=np.int16).reshape(-1, segment.channels)
+        return cls(key, samples, segment.frame_rate, segment)
+
+    @property
+    def segment(self):
+        """AudioSegment с теми же данными (для отображённых в память файлов создаётся по запросу)"""
+        if self._segment is not None:
+            return self._segment
+        return AudioSegment(data=np.ascontiguousarray(self.samples).tobytes(),
+                            sample_width=self.sample_width,
+                            frame_rate=self.frame_rate,
+                            channels=self.channels)
+
+
+def _set_channels(samples, channels):
+    """Сводит каналы в моно усреднением или размножает моно на channels"""
+    if channels == 1:
+        return np.round(samples.mean(axis=1, keepdims=True)).astype(np.int16)
+    if samples.shape[1] == 1:
+        return np.repeat(samples, channels, axis=1)
+    raise ValueError(f"Нельзя преобразовать {samples.shape[1]} канала(ов) в {channels}")
+
+
+class DecodedAudioCache:
+    """Кэш декодированного аудио на весь процесс
+
+    Ключ — (путь, mtime, размер, целевой формат), поэтому один и тот же файл,
+    добавленный на несколько дорожек, декодируется один раз, а клипы делят
+    его PCM по ссылке. Если суммарный объём превышает бюджет памяти,
+    вытесняются давно не использованные записи, на которые не ссылается
+    ни один клип.
+
+    Запрос с frame_rate отличным от частоты файла возвращает отдельную
+    запись, один раз передискретизированную полифазным ресемплером, поэтому
+    воспроизведение и экспорт используют одну и ту же копию.
+
+    Если задано дисковое хранилище PCM (set_pcm_store), файлы от
+    store.min_bytes и больше перекодируются один раз на диск и
+    отображаются в память; такие записи не занимают бюджет памяти.
+
+    Файлы читаются через реестр декодеров decoders: WAV, FLAC, OGG и AIFF —
+    напрямую libsndfile, остальное — через ffmpeg.
+
+    С хранилищем ресурсов (set_asset_store) ключ строится по хэшу
+    содержимого, а не по пути: копии одного сэмпла под разными именами
+    делят одну запись, её PCM хранится в каталоге ресурса, а каждая
+    ссылка клипа учитывается в счётчике ссылок ресурса.
+
+    Одновременные запросы одного ключа декодируют файл один раз: первый
+    запрос декодирует, остальные ждут его результата и получают ссылку
+    на ту же запись (и считаются попаданиями).
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, pcm_store=None, decoders=None, asset_store=None):
+        self.memory_budget = memory_budget
+        self.pcm_store = pcm_store
+        self.decoders = decoders or default_decoders
+        self.asset_store = None
+        if asset_store is not None:
+            self.set_asset_store(asset_store)
+        self._assets = OrderedDict()
+        self._loading = {}
+        # RLock: сборка мусора посреди операции под блокировкой может вызвать
+        # финализатор клипа, а он из того же потока вызывает release()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(path, frame_rate=None, channels=None, window=None):
+        """Строит ключ кэша; изменение файла на диске даёт новый ключ"""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size,
+               (frame_rate, channels, DecodedAudio.sample_width))
+        return key + (tuple(window),) if window else key
+
+    def set_pcm_store(self, pcm_store):
+        """Включает (или отключает при None) отображение PCM с диска в память"""
+        self.pcm_store = pcm_store
+
+    def set_asset_store(self, asset_store):
+        """Переводит кэш на ключи по содержимому и хранение PCM в ресурсах asset_store"""
+        self.asset_store = asset_store
+        self.pcm_store = asset_store
+
+    def _key_for(self, path, frame_rate=None, channels=None, window=None):
+        if self.asset_store is None:
+            return self.make_key(path, frame_rate, channels, window)
+        key = (('asset', self.asset_store.asset_id(path)), (frame_rate, channels, DecodedAudio.sample_width))
+        return key + (tuple(window),) if window else key
+
+    def acquire(self, path, file_format=None, frame_rate=None, channels=None, window=None):
+        """Возвращает декодированный файл (int16) и увеличивает счётчик ссылок
+
+        window=(start_ms, end_ms) декодирует только этот участок файла
+        (перемоткой декодера, без чтения остального). Каждому acquire
+        должен соответствовать release.
+        """
+        key = self._key_for(path, frame_rate, channels, window)
+        with self._lock:
+            asset = self._assets.get(key)
+            if asset is not None:
+                self._assets.move_to_end(key)
+                asset.refcount += 1
+                self.hits += 1
+                self._retain_asset(asset)
+                return asset
+            loading = self._loading.get(key)
+            if loading is None:
+                self.misses += 1
+                self._loading[key] = loading = Future()
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+
+        if not owner:
+            return self._share(key, loading.result())
+
+        try:
+            asset = self._load_asset(key, path, file_format, frame_rate, channels, window)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            self._assets[key] = asset
+            del self._loading[key]
+            asset.refcount += 1
+            self._retain_asset(asset)
+            self._evict_locked()
+        loading.set_result(asset)
+        return asset
+
+    def _share(self, key, asset):
+        """Ссылка на запись, декодированную параллельным запросом того же ключа"""
+        with self._lock:
+            asset = self._assets.setdefault(key, asset)
+            self._assets.move_to_end(key)
+            asset.refcount += 1
+            self._retain_asset(asset)
+            self._evict_locked()
+            return asset
+
+    def _retain_asset(self, asset):
+        if self.asset_store is not None and asset.asset_id:
+            self.asset_store.retain(asset.asset_id)
+
+    def _load_asset(self, key, path, file_format, frame_rate, channels, window=None):
+        """Открывает PCM из дискового хранилища или декодирует файл"""
+        store = self.pcm_store
+        if store is not None and not window:
+            stored = store.load(key)
+            if stored is not None:
+                return DecodedAudio(key, *stored)
+
+        if window:
+            samples, file_rate, start_ms = self.decoders.decode_range(path, file_format, *window)
+        else:
+            (samples, file_rate), start_ms = self.decoders.decode(path, file_format), 0
+        if channels and samples.shape[1] != channels:
+            samples = _set_channels(samples, channels)
+        if self.asset_store is not None and not window and isinstance(key[0], tuple):
+            self.asset_store.analysis(key[0][1], samples, file_rate)
+        if frame_rate and file_rate != frame_rate:
+            samples, file_rate = resample(samples, file_rate, frame_rate), frame_rate
+        asset = DecodedAudio(key, samples, file_rate, start_ms=start_ms)
+
+        if store is not None and not window and asset.samples.nbytes >= store.min_bytes:
+            try:
+                return DecodedAudio(key, store.save(key, asset.samples, asset.frame_rate), asset.frame_rate)
+            except OSError:
+                pass
+        return asset
+
+    def release(self, asset):
+        """Уменьшает счётчик ссылок; неиспользуемые записи становятся кандидатами на вытеснение"""
+        with self._lock:
+            asset.refcount = max(0, asset.refcount - 1)
+            if self.asset_store is not None and asset.asset_id:
+                self.asset_store.release(asset.asset_id)
+            self._evict_locked()
+
+    def set_memory_budget(self, memory_budget):
+        """Меняет бюджет памяти и сразу вытесняет лишнее"""
+        with self._lock:
+            self.memory_budget = memory_budget
+            self._evict_locked()
+
+    def resident_bytes(self):
+        """Объём PCM в памяти процесса (без отображённых в память файлов)"""
+        return sum(asset.nbytes for asset in self._assets.values())
+
+    def _evict_locked(self):
+        resident = self.resident_bytes()
+        if resident <= self.memory_budget:
+            return
+
+        for key in list(self._assets):
+            asset = self._assets.get(key)
+            if asset is None or asset.refcount > 0:
+                continue
+            del self._assets[key]
+            self.evictions += 1
+            resident -= asset.nbytes
+            if resident <= self.memory_budget:
+                break
+
+    def stats(self):
+        """Статистика кэша для подбора бюджета памяти"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'assets': len(self._assets),
+                'referenced_assets': sum(1 for a in self._assets.values() if a.refcount > 0),
+                'resident_bytes': self.resident_bytes(),
+                'mapped_bytes': sum(a.mapped_bytes for a in self._assets.values()),
+                'memory_budget': self.memory_budget,
+            }
+
+    def clear(self):
+        """Удаляет все записи без ссылок"""
+        with self._lock:
+            for key in [k for k, a in self._assets.items() if a.refcount == 0]:
+                del self._assets[key]
+
+
+default_audio_cache = DecodedAudioCache()
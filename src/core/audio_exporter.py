@@ -1,9 +1,15 @@
 import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Callable
 
 import numpy as np
 import soundfile as sf
 
+from src.core.audio_cache import default_audio_cache
+from src.core.mixer import accumulate, audible_tracks, pan_gains
+
 try:
     from pydub import AudioSegment
     PYDUB_AVAILABLE = True
@@ -19,80 +25,298 @@ class AudioExporter:
         'ogg': {'name': 'OGG (Compressed)', 'bitrate': '320k'},
     }
 
-    def __init__(self, project):
+    STREAMING_FORMATS = {
+        'wav': {'format': 'WAV', 'subtype': 'PCM_16'},
+        'flac': {'format': 'FLAC', 'subtype': 'PCM_16'},
+        'ogg': {'format': 'OGG', 'subtype': 'VORBIS'},
+    }
+
+    DEFAULT_BLOCK_FRAMES = 65536
+
+    def __init__(self, project, block_frames=DEFAULT_BLOCK_FRAMES, workers=1):
         self.project = project
+        self.block_frames = block_frames
+        self.workers = max(1, int(workers or 1))
         self.is_exporting = False
         self.export_progress = 0
+        self._borrowed = []
+        self._local = threading.local()
+        self._reset_timings()
+
+    def _reset_timings(self):
+        self.timings = {'decode': 0.0, 'mix': 0.0, 'encode': 0.0}
 
     def render_to_array(self) -> tuple[np.ndarray, int]:
+        """Рендерит весь проект в float32-массив (num_samples × 2)
+
+        Используются уже декодированные данные клипов; с диска читаются
+        только клипы, чьи данные не загружены в память.
+        """
         if not self.project.tracks:
             raise ValueError("Нет дорожек для экспорта!")
 
-        sample_rate = 44100
-        duration_ms = self.project.duration
-        duration_sec = duration_ms / 1000
-        num_samples = int(sample_rate * duration_sec)
-
-        audio_buffer = np.zeros((num_samples, 2), dtype=np.float32)
+        sample_rate = self.project.sample_rate
+        num_samples = int(sample_rate * self.project.duration / 1000)
 
         try:
-            import librosa
-            LIBROSA_AVAILABLE = True
-        except ImportError:
-            LIBROSA_AVAILABLE = False
+            placements = self._clip_placements(sample_rate)
 
-        for track in self.project.tracks:
+            started = time.perf_counter()
+            audio_buffer = np.zeros((num_samples, 2), dtype=np.float32)
+            self._render_into(placements, audio_buffer)
+
+            max_val = np.max(np.abs(audio_buffer)) if num_samples else 0
+            if max_val > 1.0:
+                audio_buffer /= max_val * 1.05
+            self.timings['mix'] += time.perf_counter() - started
+        finally:
+            self._release_borrowed()
+
+        return audio_buffer, sample_rate
+
+    def _source_for(self, clip, sample_rate):
+        """Возвращает (сэмплы, первый кадр) данных клипа с частотой sample_rate
+
+        Первый кадр — начало загруженного участка в кадрах исходного файла
+        при sample_rate: у оконного клипа это начало окна, иначе 0. Готовые
+        данные клипа (clip.is_ready) берутся как есть. Клип в частоте
+        проекта загружается сам, а для клипа в другой частоте нужный участок
+        сразу в частоте sample_rate берётся из общего кэша — та же копия,
+        что у воспроизведения, — без декодирования в исходной частоте.
+        Клип, который сам не загрузился, тоже читается через кэш. Время любой
+        загрузки учитывается в timings['decode'].
+        """
+        if clip.is_ready(sample_rate):
+            return clip.samples, round(clip.data_window_ms[0] * sample_rate / 1000)
+
+        if clip.frame_rate == sample_rate and not clip._load_failed:
+            started = time.perf_counter()
+            samples = clip.samples
+            self.timings['decode'] += time.perf_counter() - started
+            if samples is not None:
+                return samples, round(clip.data_window_ms[0] * sample_rate / 1000)
+
+        cache = getattr(clip, '_cache', None) or default_audio_cache
+        window = clip._wanted_window()
+        started = time.perf_counter()
+        try:
+            asset = cache.acquire(clip.file_path, file_format=getattr(clip, '_file_format', None),
+                                  frame_rate=sample_rate, window=window)
+        except Exception:
+            return None, 0
+        finally:
+            self.timings['decode'] += time.perf_counter() - started
+
+        self._borrowed.append((cache, asset))
+        return asset.samples, asset.start_frame if window is not None else 0
+
+    def _release_borrowed(self):
+        """Возвращает в общий кэш файлы, прочитанные только для экспорта"""
+        for cache, asset in self._borrowed:
+            cache.release(asset)
+        self._borrowed = []
+
+    def _clip_placements(self, sample_rate: int) -> list:
+        """Раскладывает клипы проекта в кадрах выходного файла
+
+        Возвращает список (view, gain, panning, start_frame), где view —
+        неизменяемое представление слышимой части клипа (с учётом обрезания)
+        в частоте sample_rate, без копирования данных, gain — громкость,
+        уже делённая на 32768, а panning — усиления каналов из pan_gains.
+        Положение и обрезание берутся из clip.frames_at, как в микшере,
+        поэтому экспорт совпадает с воспроизведением покадрово.
+        Солирование и заглушение учитываются так же, как при воспроизведении.
+        Чтение файлов попадает в timings['decode'], остальное — в 'mix'.
+        """
+        started = time.perf_counter()
+        decode_before = self.timings['decode']
+        placements = []
+        for track in audible_tracks(self.project.tracks):
+            panning = pan_gains(track.pan, 2)
             for clip in track.get_clips_sorted():
-                try:
-                    if LIBROSA_AVAILABLE:
-                        y, sr = librosa.load(clip.file_path, sr=sample_rate, mono=False)
-                    else:
-                        y, sr = sf.read(clip.file_path, dtype='float32')
-
-                    if sr != sample_rate:
-                        ratio = sample_rate / sr
-                        y = np.interp(
-                            np.arange(0, len(y), 1/ratio),
-                            np.arange(len(y)),
-                            y
-                        )
-
-                    trim_start_samples = int(clip.trim_start / 1000 * sample_rate)
-                    trim_end_samples = int(clip.trim_end / 1000 * sample_rate)
-                    y_trimmed = y[trim_start_samples:-trim_end_samples if trim_end_samples > 0 else len(y)]
-
-                    if len(y_trimmed.shape) == 1:
-                        y_stereo = np.stack([y_trimmed, y_trimmed], axis=-1)
-                    else:
-                        y_stereo = y_trimmed
-
-                    start_sample = int(clip.start_time / 1000 * sample_rate)
-                    end_sample = start_sample + y_stereo.shape[0]
-
-                    if end_sample > num_samples:
-                        y_stereo = y_stereo[:num_samples - start_sample]
-                        end_sample = num_samples
-
-                    audio_buffer[start_sample:end_sample] += y_stereo
-
-                except Exception as e:
+                if clip.volume <= 0:
                     continue
+                samples, data_start_frame = self._source_for(clip, sample_rate)
+                if samples is None:
+                    continue
+                start_frame, trim_start_frame, duration_frames = clip.frames_at(sample_rate)
+                if not clip.original_duration:
+                    # файл появился после создания клипа: длина известна только по данным
+                    duration_frames = len(samples)
+                first = max(0, trim_start_frame - data_start_frame)
+                view = samples[first:first + duration_frames]
+                if not len(view):
+                    continue
+                placements.append((view, clip.volume * track.volume / 32768, panning, start_frame))
+        self.timings['mix'] += time.perf_counter() - started - (self.timings['decode'] - decode_before)
+        return placements
+
+    def _render_block(self, placements: list, block_start: int, out: np.ndarray) -> np.ndarray:
+        """Рендерит кадры [block_start, block_start + len(out)) в out (float32, -1..1)"""
+        out.fill(0)
+        block_end = block_start + len(out)
+
+        for view, gain, panning, start_frame in placements:
+            lo = max(block_start, start_frame)
+            hi = min(block_end, start_frame + len(view))
+            if lo >= hi:
+                continue
+
+            scratch = self._scratch(len(out), max(out.shape[1], view.shape[1]))
+            accumulate(out[lo - block_start:], view[lo - start_frame:hi - start_frame], gain, panning, scratch)
+
+        return out
+
+    def _scratch(self, frames, channels):
+        """Промежуточный float32-буфер потока рендера, переиспользуемый между блоками"""
+        local = self._local
+        scratch = getattr(local, 'scratch', None)
+        if scratch is None or scratch.shape[0] < frames or scratch.shape[1] < channels:
+            scratch = local.scratch = np.empty((max(frames, self.block_frames), channels), dtype=np.float32)
+        return scratch
+
+    def _render_into(self, placements: list, audio_buffer: np.ndarray):
+        """Рендерит весь буфер по временным срезам, при workers > 1 — параллельно
+
+        Каждый срез пишется в свою непересекающуюся часть буфера, а значение
+        каждого кадра не зависит от разбиения на срезы, поэтому результат
+        бит-в-бит совпадает с последовательным рендером.
+        """
+        starts = range(0, len(audio_buffer), self.block_frames)
+
+        def render_slice(block_start):
+            block = audio_buffer[block_start:block_start + self.block_frames]
+            self._render_block(placements, block_start, block)
+
+        if self.workers == 1:
+            for block_start in starts:
+                render_slice(block_start)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(render_slice, starts))
+
+    def _iter_blocks(self, placements: list, num_samples: int):
+        """Генератор блоков рендера по порядку; буферы блоков переиспользуются
+
+        При workers > 1 до workers * 2 блоков рендерятся заранее в пуле потоков,
+        так что память остаётся ограниченной.
+        """
+        starts = range(0, num_samples, self.block_frames)
+
+        def frames_at(block_start):
+            return min(self.block_frames, num_samples - block_start)
+
+        if self.workers == 1:
+            block = np.zeros((self.block_frames, 2), dtype=np.float32)
+            for block_start in starts:
+                yield block_start, self._render_block(placements, block_start, block[:frames_at(block_start)])
+            return
+
+        depth = self.workers * 2
+        buffers = [np.zeros((self.block_frames, 2), dtype=np.float32) for _ in range(depth + 1)]
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for i, block_start in enumerate(starts):
+                block = buffers[i % len(buffers)][:frames_at(block_start)]
+                pending.append((block_start, pool.submit(self._render_block, placements, block_start, block)))
+                if len(pending) >= depth:
+                    ready_start, future = pending.popleft()
+                    yield ready_start, future.result()
+
+            while pending:
+                ready_start, future = pending.popleft()
+                yield ready_start, future.result()
+
+    def _peak_of(self, placements: list, num_samples: int,
+                 progress_callback: Optional[Callable] = None) -> float:
+        peak = 0.0
+        started = time.perf_counter()
+        for block_start, block in self._iter_blocks(placements, num_samples):
+            if len(block):
+                peak = max(peak, float(np.max(np.abs(block))))
+            if progress_callback and num_samples:
+                progress_callback(block_start / num_samples)
+        self.timings['mix'] += time.perf_counter() - started
+        return peak
+
+    def measure_peak(self, progress_callback: Optional[Callable] = None) -> float:
+        """Предварительный проход: пиковая амплитуда проекта без хранения звука"""
+        sample_rate = self.project.sample_rate
+        num_samples = int(sample_rate * self.project.duration / 1000)
+        try:
+            return self._peak_of(self._clip_placements(sample_rate), num_samples, progress_callback)
+        finally:
+            self._release_borrowed()
 
-        max_val = np.max(np.abs(audio_buffer))
-        if max_val > 1.0:
-            audio_buffer = audio_buffer / (max_val * 1.05)
+    def export_streaming(self, output_path: str, format: str, normalize: bool = True,
+                         progress_callback: Optional[Callable] = None):
+        """Потоковый экспорт: блоки фиксированного размера пишутся сразу в файл
 
-        return audio_buffer, sample_rate
+        Память не зависит от длины проекта. Нормализация (как в render_to_array:
+        только при пике выше 1.0) выполняется отдельным проходом по пику.
+        """
+        if not self.project.tracks:
+            raise ValueError("Нет дорожек для экспорта!")
+        if format not in self.STREAMING_FORMATS:
+            raise ValueError(f"Потоковый экспорт не поддерживает формат: {format}")
+
+        sample_rate = self.project.sample_rate
+        num_samples = int(sample_rate * self.project.duration / 1000)
+
+        try:
+            placements = self._clip_placements(sample_rate)
+
+            scale = 1.0
+            if normalize:
+                def on_peak_progress(fraction):
+                    if progress_callback:
+                        progress_callback(10 + int(fraction * 20), "Поиск пика...")
+
+                peak = self._peak_of(placements, num_samples, on_peak_progress)
+                if peak > 1.0:
+                    scale = 1.0 / (peak * 1.05)
+
+            sf_format = self.STREAMING_FORMATS[format]
+            with sf.SoundFile(output_path, mode='w', samplerate=sample_rate, channels=2,
+                              format=sf_format['format'], subtype=sf_format['subtype']) as out_file:
+                mix_started = time.perf_counter()
+                for block_start, block in self._iter_blocks(placements, num_samples):
+                    if scale != 1.0:
+                        block *= scale
+                    encode_started = time.perf_counter()
+                    self.timings['mix'] += encode_started - mix_started
+
+                    out_file.write(block)
+                    mix_started = time.perf_counter()
+                    self.timings['encode'] += mix_started - encode_started
+
+                    if progress_callback and num_samples:
+                        progress_callback(30 + int(block_start / num_samples * 70),
+                                          f"Сохранение в {format.upper()}...")
+        finally:
+            self._release_borrowed()
+
+    def format_timings(self) -> str:
+        """Краткая сводка времени последнего экспорта"""
+        return ", ".join(f"{name}: {seconds:.2f} с" for name, seconds in self.timings.items())
 
     def export(self, output_path: str, format: str,
-               progress_callback: Optional[Callable] = None) -> bool:
+               progress_callback: Optional[Callable] = None, streaming: bool = False) -> bool:
         if format not in self.FORMATS:
             raise ValueError(f"Неподдерживаемый формат: {format}")
 
         self.is_exporting = True
         self.export_progress = 0
+        self._reset_timings()
 
         try:
+            if streaming and format in self.STREAMING_FORMATS:
+                self.export_streaming(output_path, format, progress_callback=progress_callback)
+                if progress_callback:
+                    progress_callback(100, f"✅ Готово! ({self.format_timings()})")
+                return True
+
             if progress_callback:
                 progress_callback(10, "Рендеринг аудио...")
 
@@ -101,6 +325,7 @@ class AudioExporter:
             if progress_callback:
                 progress_callback(50, f"Сохранение в {format.upper()}...")
 
+            encode_started = time.perf_counter()
             if format == 'wav':
                 self._export_wav(output_path, audio_array, sample_rate)
             elif format == 'mp3':
@@ -109,9 +334,10 @@ class AudioExporter:
                 self._export_flac(output_path, audio_array, sample_rate)
             elif format == 'ogg':
                 self._export_ogg(output_path, audio_array, sample_rate)
+            self.timings['encode'] += time.perf_counter() - encode_started
 
             if progress_callback:
-                progress_callback(100, "✅ Готово!")
+                progress_callback(100, f"✅ Готово! ({self.format_timings()})")
 
             return True
 
@@ -157,9 +383,10 @@ class AudioExporter:
 
     def export_async(self, output_path: str, format: str,
                      progress_callback: Optional[Callable] = None,
-                     completion_callback: Optional[Callable] = None):
+                     completion_callback: Optional[Callable] = None,
+                     streaming: bool = False):
         def export_thread():
-            success = self.export(output_path, format, progress_callback)
+            success = self.export(output_path, format, progress_callback, streaming=streaming)
             if completion_callback:
                 completion_callback(success)
 
@@ -0,0 +1,70 @@
+import os
+import threading
+
+import soundfile as sf
+from pydub.utils import mediainfo_json
+
+_probes = {}
+_probes_lock = threading.Lock()
+
+
+class AudioInfo:
+    """Параметры аудиофайла, прочитанные из заголовка без декодирования"""
+
+    def __init__(self, frame_rate, channels, frame_count):
+        self.frame_rate = int(frame_rate)
+        self.channels = int(channels)
+        self.frame_count = int(frame_count)
+
+    def frames_at(self, frame_rate=None):
+        """Число кадров после передискретизации в frame_rate (как у resample)"""
+        if not frame_rate or frame_rate == self.frame_rate:
+            return self.frame_count
+        return self.frame_count * int(frame_rate) // self.frame_rate
+
+    def duration_at(self, frame_rate=None):
+        """Длительность в мс — та же, что даст декодированная запись кэша"""
+        rate = frame_rate or self.frame_rate
+        return round(1000 * self.frames_at(rate) / rate) if rate else 0
+
+
+def _probe_soundfile(path):
+    info = sf.info(path)
+    return AudioInfo(info.samplerate, info.channels, info.frames)
+
+
+def _probe_ffprobe(path):
+    for stream in mediainfo_json(path).get('streams', []):
+        if stream.get('codec_type') == 'audio':
+            frame_rate = int(stream['sample_rate'])
+            duration = float(stream.get('duration') or 0)
+            return AudioInfo(frame_rate, stream['channels'], round(duration * frame_rate))
+    raise ValueError(f"В файле нет аудиопотока: {path}")
+
+
+def probe(path):
+    """Читает частоту, число каналов и длину файла по заголовку
+
+    Сначала пробует libsndfile (WAV, FLAC, OGG, AIFF, MP3), затем ffprobe.
+    Результат запоминается по (путь, mtime, размер). Возвращает None, если
+    файл не удалось разобрать ни одним способом.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _probes_lock:
+        if memo_key in _probes:
+            return _probes[memo_key]
+
+    info = None
+    for reader in (_probe_soundfile, _probe_ffprobe):
+        try:
+            info = reader(path)
+        except Exception:
+            continue
+        if info.frame_rate > 0 and info.frame_count > 0:
+            break
+        info = None
+
+    with _probes_lock:
+        _probes[memo_key] = info
+    return info
@@ -1,16 +1,36 @@
 import flet as ft
-from pydub import AudioSegment
+import flet.canvas as cv
+import numpy as np
 import os
 
+from src.core.waveform import default_peak_store
+
+MAX_WAVEFORM_COLUMNS = 4096
+
 
 class AudioWaveform:
-    """Визуализирует волновую форму аудиофайла"""
+    """Визуализирует волновую форму аудиофайла
 
-    def __init__(self, audio_path, width, height, color=ft.Colors.BLUE_400):
+    Пики берутся из пирамиды WaveformPeakStore (файл-спутник по хэшу
+    содержимого), поэтому построение не декодирует аудио. Контур строится
+    только для видимых пикселей visible_px=(x0, x1) внутри width и не более
+    чем из max_columns столбцов, так что его размер не зависит от длины
+    клипа и масштаба.
+    """
+
+    def __init__(self, audio_path, width, height, color=ft.Colors.BLUE_400,
+                 start_ms=0, end_ms=None, peaks=None, store=None, visible_px=None,
+                 max_columns=MAX_WAVEFORM_COLUMNS):
         self.audio_path = audio_path
         self.width = max(20, width)
         self.height = height
         self.color = color
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.peaks = peaks
+        self.store = store or default_peak_store
+        self.visible_px = visible_px
+        self.max_columns = max_columns
 
     def create_simple_visualization(self):
         """Возвращает простую визуализацию как заглушку"""
@@ -28,33 +48,52 @@ class AudioWaveform:
             alignment=ft.alignment.center,
         )
 
+    def _envelope_path(self, xs, top, bottom, color):
+        """Замкнутый контур: верхняя огибающая слева направо, нижняя — обратно"""
+        mid = self.height / 2
+        elements = [cv.Path.MoveTo(xs[0], mid - top[0] * mid)]
+        elements += [cv.Path.LineTo(x, mid - y * mid) for x, y in zip(xs[1:], top[1:])]
+        elements += [cv.Path.LineTo(x, mid - y * mid) for x, y in zip(xs[::-1], bottom[::-1])]
+        elements.append(cv.Path.Close())
+        return cv.Path(elements, paint=ft.Paint(color=color, style=ft.PaintingStyle.FILL))
+
+    def _shapes(self):
+        """Контуры пиков и RMS для видимой части волновой формы"""
+        x0, x1 = self.visible_px or (0, self.width)
+        x0, x1 = max(0, x0), min(self.width, x1)
+        count = min(int(x1 - x0), self.max_columns)
+        if count < 2:
+            return []
+
+        end_ms = self.peaks.duration if self.end_ms is None else self.end_ms
+        ms_per_px = (end_ms - self.start_ms) / self.width
+        columns = self.peaks.columns(self.start_ms + x0 * ms_per_px, self.start_ms + x1 * ms_per_px, count)
+        peak = np.maximum(columns[:, 1], -columns[:, 0])
+        rms = np.minimum(columns[:, 2], peak)
+        xs = (x0 + np.arange(count) * ((x1 - x0) / count)).tolist()
+
+        return [
+            self._envelope_path(xs, columns[:, 1].tolist(), columns[:, 0].tolist(), ft.Colors.BLUE_100),
+            self._envelope_path(xs, rms.tolist(), (-rms).tolist(), ft.Colors.WHITE),
+        ]
+
     def build(self):
-        """Создаёт контейнер с визуализацией аудиофайла"""
+        """Создаёт контейнер с волновой формой аудиофайла"""
         try:
-            if not os.path.exists(self.audio_path):
-                return self.create_simple_visualization()
+            if self.peaks is None:
+                if not os.path.exists(self.audio_path):
+                    return self.create_simple_visualization()
+                self.peaks = self.store.get(self.audio_path)
 
-            audio = AudioSegment.from_file(self.audio_path)
-            duration_ms = len(audio)
+            canvas = cv.Canvas(shapes=self._shapes(), width=self.width, height=self.height)
 
             return ft.Container(
                 width=self.width,
                 height=self.height,
                 bgcolor=self.color,
                 border_radius=5,
-                gradient=ft.LinearGradient(
-                    begin=ft.alignment.center_left,
-                    end=ft.alignment.center_right,
-                    colors=[ft.Colors.BLUE_400, ft.Colors.BLUE_700],
-                ),
-                content=ft.Text(
-                    f"{os.path.basename(self.audio_path)}",
-                    size=10,
-                    color=ft.Colors.WHITE,
-                    text_align=ft.TextAlign.CENTER,
-                ),
-                alignment=ft.alignment.center,
-                tooltip=f"{duration_ms / 1000:.1f}s",
+                content=canvas,
+                tooltip=f"{os.path.basename(self.audio_path)}\n{self.peaks.duration / 1000:.1f}s",
             )
         except Exception:
             return self.create_simple_visualization()
@@ -65,13 +104,15 @@ def create_waveform_clip_visualization(clip, time_ruler, top=25):
     try:
         clip_start_pixels = time_ruler.time_to_pixels(clip.start_time)
         clip_width_pixels = time_ruler.time_to_pixels(clip.duration)
-        clip_width_pixels = max(20, min(clip_width_pixels, 5000))
+        clip_width_pixels = max(20, clip_width_pixels)
 
         waveform = AudioWaveform(
-            audio_path=clip.filepath,
+            audio_path=clip.file_path,
             width=clip_width_pixels,
             height=30,
-            color=ft.Colors.BLUE_400
+            color=ft.Colors.BLUE_400,
+            start_ms=clip.trim_start,
+            end_ms=clip.trim_start + clip.duration,
         )
 
         waveform_content = waveform.build()
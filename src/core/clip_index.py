@@ -0,0 +1,126 @@
+from bisect import bisect_left, bisect_right, insort
+
+_INF = float('inf')
+
+
+class ClipIntervalIndex:
+    """Интервальный индекс клипов дорожки
+
+    Клипы хранятся отсортированными по start_time, поверх них строится
+    дерево максимумов end_time. Запросы «какие клипы звучат в момент t»,
+    «какие клипы пересекают интервал» и «какие клипы начинаются после t»
+    выполняются за O(log n + k). Дерево перестраивается лениво — при первом
+    запросе после изменения, поэтому серия перемещений при перетаскивании
+    не стоит ничего до следующего запроса.
+    """
+
+    def __init__(self, clips=()):
+        self._keys = []
+        self._clips = []
+        self._entries = {}
+        self._seq = 0
+        self._levels = None
+        for clip in clips:
+            self.add(clip)
+
+    def __len__(self):
+        return len(self._clips)
+
+    def __contains__(self, clip):
+        return id(clip) in self._entries
+
+    def add(self, clip):
+        """Добавляет клип в индекс"""
+        if id(clip) in self._entries:
+            self.update(clip)
+            return
+
+        self._seq += 1
+        key = (clip.start_time, self._seq)
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._clips.insert(position, clip)
+        self._entries[id(clip)] = key
+        self._levels = None
+
+    def remove(self, clip):
+        """Удаляет клип из индекса, возвращает True если клип был в индексе"""
+        key = self._entries.pop(id(clip), None)
+        if key is None:
+            return False
+
+        position = bisect_left(self._keys, key)
+        del self._keys[position]
+        del self._clips[position]
+        self._levels = None
+        return True
+
+    def update(self, clip):
+        """Пересчитывает положение клипа после перемещения или обрезания"""
+        key = self._entries.get(id(clip))
+        if key is None:
+            return
+
+        if key[0] != clip.start_time:
+            position = bisect_left(self._keys, key)
+            del self._keys[position]
+            del self._clips[position]
+            new_key = (clip.start_time, key[1])
+            insort(self._keys, new_key)
+            self._clips.insert(bisect_left(self._keys, new_key), clip)
+            self._entries[id(clip)] = new_key
+        self._levels = None
+
+    def clear(self):
+        self._keys.clear()
+        self._clips.clear()
+        self._entries.clear()
+        self._levels = None
+
+    def sorted_clips(self):
+        """Клипы в порядке start_time"""
+        return list(self._clips)
+
+    def at(self, time_ms):
+        """Клипы, для которых start_time <= time_ms < end_time"""
+        return self._collect(bisect_right(self._keys, (time_ms, _INF)), time_ms)
+
+    def overlapping(self, start_ms, end_ms):
+        """Клипы, пересекающие полуинтервал [start_ms, end_ms)"""
+        return self._collect(bisect_left(self._keys, (end_ms, -1)), start_ms)
+
+    def starting_from(self, time_ms):
+        """Клипы, начинающиеся в time_ms или позже"""
+        return self._clips[bisect_left(self._keys, (time_ms, -1)):]
+
+    def _build_levels(self):
+        """Строит дерево максимумов end_time снизу вверх"""
+        level = [clip.end_time for clip in self._clips]
+        levels = [level]
+        while len(level) > 1:
+            level = [max(level[i:i + 2]) for i in range(0, len(level), 2)]
+            levels.append(level)
+        self._levels = levels
+        return levels
+
+    def _collect(self, limit, threshold):
+        """Клипы с индексом < limit и end_time > threshold (в порядке start_time)"""
+        if limit <= 0:
+            return []
+
+        levels = self._levels or self._build_levels()
+        result = []
+        stack = [(len(levels) - 1, 0)]
+        while stack:
+            depth, node = stack.pop()
+            if levels[depth][node] <= threshold or (node << depth) >= limit:
+                continue
+            if depth == 0:
+                result.append(self._clips[node])
+                continue
+
+            child = node * 2
+            if child + 1 < len(levels[depth - 1]):
+                stack.append((depth - 1, child + 1))
+            stack.append((depth - 1, child))
+        return result
@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import soundfile as sf
+from pydub import AudioSegment
+
+DECODE_BLOCK_FRAMES = 1 << 16
+
+
+class SoundfileDecoder:
+    """Декодирование через libsndfile напрямую в int16-массив
+
+    Файл читается блоками по DECODE_BLOCK_FRAMES кадров сразу в выходной
+    массив, без промежуточного WAV и без копий. decode_range перематывает
+    файл (seek) и читает только нужный участок.
+    """
+
+    name = "soundfile"
+    formats = ("wav", "flac", "ogg", "aiff", "aif")
+
+    def decode(self, path, file_format=None):
+        return self.decode_range(path, file_format)[:2]
+
+    def decode_range(self, path, file_format=None, start_ms=0, end_ms=None):
+        """(сэмплы, частота, фактическое начало в мс) участка [start_ms, end_ms)"""
+        with sf.SoundFile(path) as f:
+            first = min(f.frames, round(start_ms * f.samplerate / 1000))
+            last = f.frames if end_ms is None else min(f.frames, round(end_ms * f.samplerate / 1000))
+            total = max(0, last - first)
+            if first:
+                f.seek(first)
+            samples = np.empty((total, f.channels), dtype=np.int16)
+            position = 0
+            while position < total:
+                count = min(DECODE_BLOCK_FRAMES, total - position)
+                read = f.read(dtype='int16', always_2d=True, out=samples[position:position + count])
+                if len(read) == 0:
+                    break
+                position += len(read)
+            return samples[:position], f.samplerate, 1000 * first / f.samplerate
+
+    def decode_blocks(self, path, file_format=None, block_frames=DECODE_BLOCK_FRAMES):
+        """(частота, итератор int16-блоков по block_frames кадров) без чтения файла целиком"""
+        f = sf.SoundFile(path)
+
+        def blocks():
+            with f:
+                while True:
+                    block = f.read(block_frames, dtype='int16', always_2d=True)
+                    if len(block) == 0:
+                        return
+                    yield block
+
+        return f.samplerate, blocks()
+
+
+class FfmpegDecoder:
+    """Декодирование через pydub/ffmpeg для форматов, которых нет в libsndfile"""
+
+    name = "ffmpeg"
+    formats = ("mp3", "m4a", "aac", "wma")
+
+    def decode(self, path, file_format=None):
+        return self.decode_range(path, file_format)[:2]
+
+    def decode_range(self, path, file_format=None, start_ms=0, end_ms=None):
+        """Участок файла через ffmpeg -ss/-t; начало считается точным"""
+        duration = None if end_ms is None else max(0, end_ms - start_ms) / 1000
+        segment = AudioSegment.from_file(path, format=file_format,
+                                         start_second=start_ms / 1000 if start_ms else None,
+                                         duration=duration)
+        if segment.sample_width != 2:
+            segment = segment.set_sample_width(2)
+        samples = np.frombuffer(segment.raw_data, dtype=np.int16).reshape(-1, segment.channels)
+        return samples, segment.frame_rate, start_ms
+
+
+class DecoderRegistry:
+    """Выбор декодера по формату файла
+
+    Для зарегистрированного формата сначала пробуется его декодер, затем
+    остальные в порядке регистрации (последний — запасной ffmpeg), так что
+    файл, который libsndfile не осилил, всё равно будет прочитан.
+    """
+
+    def __init__(self):
+        self._decoders = []
+        self._by_format = {}
+
+    def register(self, decoder, formats=None):
+        """Добавляет декодер; formats по умолчанию берутся из decoder.formats"""
+        self._decoders.append(decoder)
+        for file_format in formats or decoder.formats:
+            self._by_format.setdefault(file_format.lower(), decoder)
+
+    def decoder_for(self, path, file_format=None):
+        """Декодер, который будет опробован первым для файла"""
+        file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+        return self._by_format.get(file_format)
+
+    def decode(self, path, file_format=None):
+        """Возвращает (int16-массив frames × channels, частота)"""
+        return self._try_decoders(path, file_format, lambda decoder: decoder.decode(path, file_format))
+
+    def decode_range(self, path, file_format=None, start_ms=0, end_ms=None):
+        """Декодирует участок [start_ms, end_ms) файла
+
+        Возвращает (сэмплы, частота, начало участка в мс): начало может
+        немного отличаться от start_ms из-за округления до кадра.
+        """
+        return self._try_decoders(path, file_format,
+                                  lambda decoder: decoder.decode_range(path, file_format, start_ms, end_ms))
+
+    def decode_blocks(self, path, file_format=None, block_frames=DECODE_BLOCK_FRAMES):
+        """Возвращает (частота, итератор int16-блоков по block_frames кадров)
+
+        Декодер с потоковым чтением (decode_blocks) не держит файл в памяти
+        целиком; у остальных файл декодируется полностью и режется на блоки.
+        """
+        def call(decoder):
+            if hasattr(decoder, 'decode_blocks'):
+                return decoder.decode_blocks(path, file_format, block_frames)
+            samples, frame_rate = decoder.decode(path, file_format)
+            return frame_rate, (samples[i:i + block_frames] for i in range(0, len(samples), block_frames))
+
+        return self._try_decoders(path, file_format, call)
+
+    def _try_decoders(self, path, file_format, call):
+        first = self.decoder_for(path, file_format)
+        candidates = [first] if first else []
+        candidates += [decoder for decoder in self._decoders if decoder is not first]
+
+        error = None
+        for decoder in candidates:
+            try:
+                return call(decoder)
+            except FileNotFoundError:
+                raise
+            except Exception as e:
+                error = e
+        raise ValueError(f"Не удалось декодировать файл {path}: {error}")
+
+
+default_decoders = DecoderRegistry()
+default_decoders.register(SoundfileDecoder())
+default_decoders.register(FfmpegDecoder())
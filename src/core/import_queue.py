@@ -0,0 +1,153 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.models import AudioClip
+
+DEFAULT_IMPORT_WORKERS = min(8, os.cpu_count() or 2)
+
+
+class ImportJob:
+    """Импорт одной пачки файлов на дорожку
+
+    Файлы декодируются параллельно, но клипы ставятся на дорожку строго в
+    порядке выбора: клип i размещается, как только готовы он и все клипы до
+    него, встык за предыдущим. Файлы, которые не удалось прочитать,
+    пропускаются.
+    """
+
+    def __init__(self, paths, place, on_progress=None, on_complete=None):
+        self.paths = list(paths)
+        self.total = len(self.paths)
+        self.done = 0
+        self.failed = 0
+        self.cancelled = False
+        self.clips = []
+        self._place = place
+        self._on_progress = on_progress
+        self._on_complete = on_complete
+        self._ready = {}
+        self._next = 0
+        self._futures = []
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        if not self.paths:
+            self._finish()
+
+    @property
+    def progress(self):
+        """Доля обработанных файлов 0..1"""
+        return self.done / self.total if self.total else 1.0
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    def cancel(self):
+        """Отменяет ещё не начатые файлы; уже размещённые клипы остаются"""
+        with self._lock:
+            if self.cancelled or self.finished:
+                return
+            self.cancelled = True
+            for future in self._futures:
+                future.cancel()
+            ready, self._ready = self._ready, {}
+        for clip in ready.values():
+            if clip is not None:
+                clip.close()
+        self._finish()
+
+    def wait(self, timeout=None):
+        """Ждёт окончания импорта; возвращает False по таймауту"""
+        return self._finished.wait(timeout)
+
+    def _decode(self, index, load):
+        try:
+            clip = load(self.paths[index])
+        except Exception:
+            clip = None
+        self._complete(index, clip)
+
+    def _complete(self, index, clip):
+        placed = []
+        with self._lock:
+            if self.cancelled:
+                if clip is not None:
+                    clip.close()
+                return
+            self._ready[index] = clip
+            self.done += 1
+            if clip is None:
+                self.failed += 1
+            while self._next in self._ready:
+                ready_clip = self._ready.pop(self._next)
+                self._next += 1
+                if ready_clip is not None:
+                    try:
+                        self._place(ready_clip)
+                        self.clips.append(ready_clip)
+                        placed.append(ready_clip)
+                    except Exception:
+                        self.failed += 1
+            done = self.done
+            all_placed = self._next == self.total
+
+        if self._on_progress:
+            try:
+                self._on_progress(done, self.total, self.paths[index], clip is not None)
+            except Exception:
+                pass
+        if all_placed:
+            self._finish()
+
+    def _finish(self):
+        if self._finished.is_set():
+            return
+        self._finished.set()
+        if self._on_complete:
+            try:
+                self._on_complete(self)
+            except Exception:
+                pass
+
+
+class ImportQueue:
+    """Очередь импорта файлов с пулом потоков-декодеров
+
+    Декодирование идёт через ffmpeg-процессы и numpy (ресемплер), которые
+    не держат GIL, поэтому файлы пачки обрабатываются параллельно в
+    workers потоках. Каждый файл сначала читается по заголовку, затем его
+    PCM декодируется в общий кэш, так что клип уже готов к воспроизведению.
+    """
+
+    def __init__(self, workers=DEFAULT_IMPORT_WORKERS):
+        if workers <= 0:
+            raise ValueError("Число потоков импорта должно быть положительным")
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import")
+
+    def submit(self, paths, place, target_rate=None, cache=None, on_progress=None, on_complete=None):
+        """Ставит файлы в очередь и сразу возвращает ImportJob
+
+        place(clip) вызывается для каждого прочитанного файла в порядке
+        paths; on_progress(done, total, path, ok) — после каждого файла;
+        on_complete(job) — когда всё размещено или импорт отменён.
+        """
+        job = ImportJob(paths, place, on_progress, on_complete)
+
+        def load(path):
+            clip = AudioClip(path, name=os.path.splitext(os.path.basename(path))[0],
+                             cache=cache, target_rate=target_rate)
+            if clip.duration <= 0 or clip.samples is None:
+                clip.close()
+                return None
+            return clip
+
+        with job._lock:
+            for index in range(job.total):
+                job._futures.append(self._pool.submit(job._decode, index, load))
+        return job
+
+    def shutdown(self, wait=False):
+        """Останавливает пул, отменяя файлы, которые ещё не начали декодироваться"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,184 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Границы int16 как float32 для ограничения шины на месте
+INT16_MIN = np.float32(-32768)
+INT16_MAX = np.float32(32767)
+
+
+def audible_tracks(tracks):
+    """Дорожки, которые нужно микшировать
+
+    Если хотя бы одна дорожка солирует, остаются только солирующие.
+    Заглушённые дорожки, дорожки с нулевой громкостью и пустые
+    отбрасываются сразу, до поиска клипов и декодирования.
+    """
+    soloed = any(track.solo for track in tracks)
+    return [track for track in tracks
+            if (track.solo or not soloed) and not track.muted and track.volume > 0 and track.clips]
+
+
+@lru_cache(maxsize=256)
+def pan_gains(pan, channels=2):
+    """Усиления каналов (L, R) для панорамы pan из [-1, 1] или None
+
+    Закон постоянной мощности (L² + R² = 2) с единичным усилением обоих
+    каналов в центре, так что непанорамированные дорожки звучат как
+    раньше. None — панорама не нужна (центр или не стереовыход).
+    """
+    if channels != 2 or not pan:
+        return None
+    angle = (min(1.0, max(-1.0, pan)) + 1) * math.pi / 4
+    # cos(π/2) в float не равен нулю: крайние положения дают точный ноль
+    return tuple(0.0 if abs(gain) < 1e-12 else math.sqrt(2) * gain for gain in (math.cos(angle), math.sin(angle)))
+
+
+def apply_gains(block, gain, panning=None):
+    """Умножает блок (frames × channels) на месте на gain и на панораму по каналам
+
+    Каналы панорамы умножаются по одному: умножение на вектор с
+    трансляцией numpy выполняет через временную копию блока.
+    """
+    if panning is None:
+        block *= np.float32(gain)
+        return
+    for channel, pan in enumerate(panning):
+        block[:, channel] *= np.float32(gain * pan)
+
+
+def accumulate(bus, samples, gain, panning, scratch):
+    """Добавляет samples (frames × channels клипа) в bus с усилением gain
+
+    panning — усиления по каналам шины из pan_gains или None. scratch —
+    предвыделенный float32-буфер не короче блока и не уже большего из
+    чисел каналов шины и клипа. Перевод в float32 идёт через copyto в
+    scratch (умножение int16 на float32 создало бы временную копию), так
+    что новых массивов на блок нет. Клип с большим числом каналов, чем у
+    шины, сводится в моно; клип с меньшим — транслируется на все каналы.
+    Общая функция для микшера воспроизведения и экспорта.
+    """
+    frames, clip_channels = samples.shape
+    channels = bus.shape[1]
+    if clip_channels > channels:
+        # Сведение в моно: каналы складываются в первый столбец scratch
+        wide = scratch[:frames, :clip_channels]
+        np.copyto(wide, samples, casting='unsafe')
+        mono = wide[:, :1]
+        for channel in range(1, clip_channels):
+            mono += wide[:, channel:channel + 1]
+        np.copyto(wide[:, 1:channels], mono)
+        gain /= clip_channels
+        block = wide[:, :channels]
+    else:
+        block = scratch[:frames, :channels]
+        np.copyto(block, samples, casting='unsafe')
+
+    apply_gains(block, gain, panning)
+    bus[:frames] += block
+
+
+class AudioMixer:
+    """Микшер реального времени на float32-шине
+
+    Все активные клипы суммируются в одну предвыделенную шину
+    (frames × channels), громкость клипа и дорожки применяется на месте,
+    а преобразование в int16 выполняется один раз на выходе.
+
+    mix_into адресует интервал в миллисекундах, mix_frames_into — в целых
+    кадрах шкалы проекта (режим движка frames); оба размещают клипы с
+    точностью до кадра.
+
+    Панорама дорожки входит в вектор усилений по каналам, который
+    применяется к блоку клипа на float32-шине целиком, без цикла по кадрам.
+
+    При inline_loading=False (микшер потока воспроизведения) клипы, данные
+    которых ещё не загружены в частоте микшера, не декодируются на месте:
+    они звучат как тишина, а загрузка запускается в фоне (AudioClip.preload).
+    """
+
+    def __init__(self, sample_rate=44100, channels=2, inline_loading=True):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.inline_loading = inline_loading
+        self._bus = np.zeros((0, channels), dtype=np.float32)
+        self._scratch = np.zeros((0, channels), dtype=np.float32)
+        self._out = np.zeros((0, channels), dtype=np.int16)
+
+    def frames_for(self, duration_ms):
+        """Количество кадров в интервале duration_ms"""
+        return max(0, int(self.sample_rate * duration_ms / 1000))
+
+    def _ensure_capacity(self, frames, scratch_channels=0):
+        """Расширяет буферы, если блок (или число каналов клипа) больше ранее выделенного"""
+        if self._bus.shape[0] < frames:
+            self._bus = np.zeros((frames, self.channels), dtype=np.float32)
+            self._out = np.zeros((frames, self.channels), dtype=np.int16)
+        width = max(self.channels, scratch_channels, self._scratch.shape[1])
+        if self._scratch.shape[0] < frames or self._scratch.shape[1] < width:
+            self._scratch = np.zeros((max(frames, self._bus.shape[0]), width), dtype=np.float32)
+
+    def _accumulate(self, bus, samples, gain, panning=None):
+        """Добавляет samples в шину через общий accumulate с буфером микшера"""
+        self._ensure_capacity(len(samples), samples.shape[1])
+        accumulate(bus, samples, gain, panning, self._scratch)
+
+    def mix_into(self, tracks, start_time, duration_ms):
+        """Микширует интервал и возвращает int16-массив (frames × channels)
+
+        Интервал переводится в кадры и микшируется mix_frames_into, поэтому
+        клип, который начинается или заканчивается внутри блока, попадает
+        ровно в свой кадр. Возвращаемый массив — представление внутреннего
+        буфера и перезаписывается при следующем вызове.
+        """
+        start_frame = round(start_time * self.sample_rate / 1000)
+        return self.mix_frames_into(tracks, start_frame, self.frames_for(duration_ms))
+
+    def mix_frames_into(self, tracks, start_frame, frames):
+        """Микширует блок [start_frame, start_frame + frames) и возвращает int16-массив
+
+        Положения клипов берутся в кадрах (start_frame/trim_start_frame
+        клипа). Каждый клип пишется в шину со своего кадра внутри блока и до
+        своего последнего кадра, поэтому результат не зависит от разбиения
+        на блоки: рендер блоками любого размера бит-в-бит совпадает с
+        рендером за один проход. Возвращаемый массив — представление
+        внутреннего буфера.
+        """
+        self._ensure_capacity(frames)
+        bus = self._bus[:frames]
+        bus.fill(0)
+
+        end_frame = start_frame + frames
+        # Запас в кадр: интервальный индекс хранит границы клипов в мс
+        start_ms = (start_frame - 1) * 1000 / self.sample_rate
+        end_ms = (end_frame + 1) * 1000 / self.sample_rate
+
+        for track in audible_tracks(tracks):
+            panning = pan_gains(track.pan, self.channels)
+
+            for clip in track.get_clips_in_range(start_ms, end_ms):
+                if clip.volume <= 0:
+                    continue
+                if not self.inline_loading and not clip.is_ready(self.sample_rate):
+                    clip.preload(self.sample_rate)
+                    continue
+                if clip.frame_rate != self.sample_rate:
+                    clip.conform_to_rate(self.sample_rate)
+
+                first = max(start_frame, clip.start_frame)
+                samples = clip.get_frames(first - clip.start_frame, end_frame - first)
+                if samples is None:
+                    continue
+
+                self._accumulate(bus[first - start_frame:], samples, clip.volume * track.volume, panning)
+
+        out = self._out[:frames]
+        np.minimum(bus, INT16_MAX, out=bus)
+        np.maximum(bus, INT16_MIN, out=bus)
+        np.copyto(out, bus, casting='unsafe')
+        return out
+
+    def mix(self, tracks, start_time, duration_ms):
+        """Микширует интервал и возвращает int16 PCM в виде bytes"""
+        return self.mix_into(tracks, start_time, duration_ms).tobytes()
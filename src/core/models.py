@@ -1,9 +1,18 @@
 import os
-from pydub import AudioSegment
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pydub.utils import which
 import numpy as np
 import pyaudio
 
+from src.core.audio_cache import content_hash, default_audio_cache
+from src.core.audio_probe import probe
+from src.core.clip_index import ClipIntervalIndex
+from src.core.mixer import AudioMixer
+from src.core.playback import PcmRingBuffer
+
 
 def _setup_ffmpeg():
     """Проверяет наличие ffmpeg и настраивает его при необходимости"""
@@ -32,36 +41,90 @@ SUPPORTED_FORMATS = {
 
 SUPPORTED_EXTENSIONS = list(SUPPORTED_FORMATS.keys())
 
+# Оконное декодирование обрезанных клипов: запас вокруг слышимой части,
+# выравнивание границ окна и доля файла, начиная с которой окно не имеет смысла
+WINDOW_MARGIN_MS = 2000
+WINDOW_ALIGN_MS = 1000
+WINDOW_MAX_FRACTION = 0.5
+
+# Фоновая загрузка клипов идёт через общий пул из PRELOAD_WORKERS потоков,
+# чтобы открытие большого проекта не запускало все декодирования разом
+PRELOAD_WORKERS = 2
+_preload_pool = None
+_preload_pool_lock = threading.Lock()
+
+
+def _preload_executor():
+    """Общий пул фоновой загрузки клипов; создаётся при первом обращении"""
+    global _preload_pool
+    with _preload_pool_lock:
+        if _preload_pool is None:
+            _preload_pool = ThreadPoolExecutor(max_workers=PRELOAD_WORKERS, thread_name_prefix="preload")
+        return _preload_pool
+
 
 class AudioClip:
     """Класс для представления аудиоклипа
 
     Поддерживает: MP3, WAV, FLAC, M4A, AAC, OGG, WMA, AIFF
+
+    Длительность, частота и число каналов берутся из заголовка файла
+    (probe), поэтому клип создаётся сразу. PCM декодируется при первом
+    обращении к samples/audio/raw_data/get_audio_chunk или заранее в фоне
+    через preload(). Если заголовок разобрать не удалось, файл декодируется
+    сразу, как раньше.
+
+    При windowed_decoding клип, от которого после обрезания осталась
+    небольшая часть, держит в памяти только окно вокруг неё (с запасом
+    WINDOW_MARGIN_MS), декодированное перемоткой. Если ручки обрезания
+    раздвинуты за пределы окна, нужный участок перечитывается при
+    следующем обращении к данным.
     """
 
-    def __init__(self, file_path, start_time=0, volume=1.0, name="Clip"):
+    windowed_decoding = True
+
+    def __init__(self, file_path, start_time=0, volume=1.0, name="Clip", cache=None, target_rate=None):
         self.file_path = file_path
         self.start_time = start_time
         self.volume = volume
         self.name = name
         self.original_format = None
+        self._track = None
+        self._asset = None
+        self._finalizer = None
+        self._load_lock = threading.Lock()
+        self._preload_future = None
+        self._load_failed = False
+        self._target_rate = target_rate
+        self._window = None
 
         try:
             _, file_ext = os.path.splitext(file_path)
             file_ext = file_ext.lstrip('.').lower()
             self.original_format = file_ext
 
-            self.audio = AudioSegment.from_file(file_path,
-                                                format=file_ext if file_ext in SUPPORTED_EXTENSIONS else None)
-            self.duration = len(self.audio)
+            self._cache = cache or default_audio_cache
+            self._file_format = file_ext if file_ext in SUPPORTED_EXTENSIONS else None
+
+            info = probe(file_path)
+            if info is not None:
+                self.duration = info.duration_at(target_rate)
+                self.channels = info.channels
+                self.frame_rate = target_rate or info.frame_rate
+            else:
+                asset = self._load()
+                if asset is None:
+                    raise ValueError(f"Не удалось декодировать файл: {file_path}")
+                self.duration = asset.duration
+                self.channels = asset.channels
+                self.frame_rate = asset.frame_rate
+
             self.end_time = self.start_time + self.duration
-            self.raw_data = self.audio.raw_data
-            self.sample_width = self.audio.sample_width
-            self.channels = self.audio.channels
-            self.frame_rate = self.audio.frame_rate
+            self.sample_width = 2
             self.trim_start = 0
             self.trim_end = 0
             self.original_duration = self.duration
+            self._update_frames()
 
         except FileNotFoundError:
             self._set_error_defaults()
@@ -74,34 +137,227 @@ class AudioClip:
         """Устанавливает значения по умолчанию при ошибке загрузки"""
         self.duration = 0
         self.end_time = self.start_time
-        self.raw_data = b''
+        self._load_failed = True
         self.sample_width = 2
         self.channels = 2
         self.frame_rate = 44100
         self.trim_start = 0
         self.trim_end = 0
         self.original_duration = 0
-        self.audio = None
+        self._update_frames()
+
+    def _update_frames(self):
+        """Пересчитывает положение клипа в кадрах при frame_rate
+
+        Вызывается при перемещении, обрезании и смене частоты, чтобы движок
+        в режиме frames не переводил миллисекунды в кадры на каждом блоке.
+        """
+        self.start_frame, self.trim_start_frame, self.duration_frames = self.frames_at(self.frame_rate)
+
+    def frames_at(self, rate):
+        """(начало на шкале, обрезание слева, длина) клипа в кадрах при частоте rate
+
+        Единственное место перевода положения клипа в кадры: им пользуются
+        и движок воспроизведения, и экспорт, поэтому они совпадают покадрово.
+        """
+        start_frame = round(self.start_time * rate / 1000)
+        trim_start_frame = round(self.trim_start * rate / 1000)
+        duration_frames = max(0, round((self.trim_start + self.duration) * rate / 1000) - trim_start_frame)
+        return start_frame, trim_start_frame, duration_frames
+
+    def _wanted_window(self):
+        """Участок файла (мс), который стоит держать в памяти, или None — весь файл"""
+        if not self.windowed_decoding or self.original_duration <= 0:
+            return None
+        start = max(0, int(self.trim_start - WINDOW_MARGIN_MS) // WINDOW_ALIGN_MS * WINDOW_ALIGN_MS)
+        end = -(-int(self.original_duration - self.trim_end + WINDOW_MARGIN_MS) // WINDOW_ALIGN_MS) * WINDOW_ALIGN_MS
+        end = min(int(self.original_duration), end)
+        if end - start > self.original_duration * WINDOW_MAX_FRACTION:
+            return None
+        return start, end
+
+    def _asset_fits(self):
+        """Покрывают ли загруженные данные текущую слышимую часть клипа"""
+        if self._window is None:
+            return self._wanted_window() is None
+        return self._window[0] <= self.trim_start and self.original_duration - self.trim_end <= self._window[1]
+
+    def _needs_load(self):
+        return not self._load_failed and (self._asset is None or not self._asset_fits())
+
+    def _load(self):
+        """Декодирует (или берёт из кэша) PCM клипа; None, если файл не читается"""
+        if not self._needs_load():
+            return self._asset
+        with self._load_lock:
+            if self._needs_load():
+                window = self._wanted_window()
+                try:
+                    asset = self._cache.acquire(self.file_path, file_format=self._file_format,
+                                                frame_rate=self._target_rate, window=window)
+                except Exception:
+                    if self._asset is None:
+                        self._load_failed = True
+                    return self._asset
+                self._set_asset(asset, window)
+        return self._asset
+
+    def _set_asset(self, asset, window):
+        if self._finalizer:
+            self._finalizer()
+        self._asset = asset
+        self._window = window
+        self._finalizer = weakref.finalize(self, self._cache.release, asset)
+
+    @property
+    def asset_id(self):
+        """Идентификатор ресурса клипа — хэш содержимого исходного файла"""
+        asset_store = getattr(getattr(self, '_cache', None), 'asset_store', None)
+        return asset_store.asset_id(self.file_path) if asset_store is not None else content_hash(self.file_path)
+
+    @property
+    def is_loaded(self):
+        """Декодированы ли уже данные клипа"""
+        return self._asset is not None
+
+    def is_ready(self, sample_rate):
+        """Загружены ли данные слышимой части клипа с частотой sample_rate
+
+        Поток воспроизведения берёт данные только у готовых клипов и не
+        декодирует сам (см. preload).
+        """
+        asset = self._asset
+        return asset is not None and asset.frame_rate == sample_rate and self._asset_fits()
+
+    @property
+    def data_window_ms(self):
+        """(начало, конец) загруженного участка во времени исходного файла"""
+        asset = self._asset
+        if asset is None or self._window is None:
+            return 0, self.original_duration
+        return asset.start_ms, asset.start_ms + 1000 * asset.frame_count / asset.frame_rate
+
+    def full_samples(self):
+        """Сэмплы всего файла, если клип держит его целиком, иначе None"""
+        samples = self.samples
+        return samples if self._window is None else None
+
+    def preload(self, sample_rate=None):
+        """Ставит декодирование в очередь общего пула загрузки, не дожидаясь его
+
+        sample_rate — частота, к которой клип заодно приводится (см.
+        conform_to_rate). Пока загрузка в очереди или идёт, повторный вызов
+        ничего не делает; cancel_preload снимает её с очереди.
+        """
+        if self._load_failed or self.is_ready(sample_rate or self.frame_rate):
+            return
+        future = self._preload_future
+        if future is not None and not future.done():
+            return
+        self._preload_future = _preload_executor().submit(self._preload, sample_rate)
+
+    def cancel_preload(self):
+        """Отменяет фоновую загрузку, если она ещё не началась"""
+        future = self._preload_future
+        if future is not None:
+            future.cancel()
+
+    def _preload(self, sample_rate):
+        try:
+            if sample_rate:
+                self.conform_to_rate(sample_rate)
+            self._load()
+        except Exception:
+            pass
+
+    @property
+    def raw_data(self):
+        """Байты PCM без учёта обрезания (memoryview поверх общего буфера)"""
+        asset = self._load()
+        return asset.raw_data if asset is not None else b''
+
+    @property
+    def audio(self):
+        """AudioSegment с данными клипа или None, если файл не загрузился"""
+        asset = self._load()
+        return asset.segment if asset is not None else None
+
+    @property
+    def samples(self):
+        """int16-массив (frames × channels) без учёта обрезания; может быть numpy.memmap
+
+        Для оконного клипа это только загруженный участок (см. data_window_ms).
+        """
+        asset = self._load()
+        return asset.samples if asset is not None else None
+
+    def close(self):
+        """Освобождает ссылку на декодированные данные в общем кэше"""
+        self.cancel_preload()
+        if self._finalizer:
+            self._finalizer()
+
+    def conform_to_rate(self, sample_rate):
+        """Переключает клип на кэшированную копию данных с частотой sample_rate"""
+        if self._load_failed or self.frame_rate == sample_rate:
+            return
+
+        with self._load_lock:
+            self._target_rate = sample_rate
+            self.frame_rate = sample_rate
+            self._update_frames()
+            if self._asset is None:
+                return
+            asset = self._cache.acquire(self.file_path, file_format=self._file_format,
+                                        frame_rate=sample_rate, window=self._window)
+            self._set_asset(asset, self._window)
 
     def get_audio_chunk(self, start_ms, duration_ms):
-        """Получает chunk аудио данных для указанного временного интервала"""
-        if not self.audio or start_ms >= self.duration:
+        """Получает chunk аудио данных для указанного временного интервала
+
+        Возвращает memoryview поверх общего буфера (без копирования).
+        """
+        chunk = self.get_chunk(start_ms, duration_ms)
+        return memoryview(chunk).cast('B') if chunk is not None else None
+
+    def get_chunk(self, start_ms, duration_ms):
+        """Кадры интервала [start_ms, start_ms + duration_ms) от начала обрезанного клипа
+
+        Возвращает неизменяемое представление (frames × channels) общего
+        буфера клипа без копирования или None, если данных в интервале нет.
+        """
+        asset = self._load()
+        if start_ms >= self.duration or asset is None:
             return None
 
         end_ms = min(start_ms + duration_ms, self.duration)
-        actual_start_ms = start_ms + self.trim_start
-        actual_end_ms = end_ms + self.trim_start
-        bytes_per_ms = self.frame_rate * self.sample_width * self.channels / 1000
-        start_byte = int(actual_start_ms * bytes_per_ms)
-        end_byte = int(actual_end_ms * bytes_per_ms)
-        sample_size = self.sample_width * self.channels
-        start_byte = (start_byte // sample_size) * sample_size
-        end_byte = (end_byte // sample_size) * sample_size
-
-        if start_byte >= len(self.raw_data) or start_byte >= end_byte:
+        offset_ms = self.trim_start - asset.start_ms
+        first = int((start_ms + offset_ms) * self.frame_rate / 1000)
+        last = int((end_ms + offset_ms) * self.frame_rate / 1000)
+        if first >= asset.frame_count or first >= last:
+            return None
+
+        return asset.samples[first:last]
+
+    def get_frames(self, first_frame, frame_count):
+        """Кадры [first_frame, first_frame + frame_count) слышимой части клипа
+
+        Отсчёт идёт от начала обрезанного клипа при частоте frame_rate.
+        Возвращает неизменяемое представление (frames × channels) без
+        копирования или None, если в интервале нет данных.
+        """
+        asset = self._load()
+        if asset is None:
+            return None
+
+        first = max(0, first_frame)
+        last = min(first_frame + frame_count, self.duration_frames)
+        if first >= last:
             return None
 
-        return self.raw_data[start_byte:end_byte]
+        offset = self.trim_start_frame - asset.start_frame
+        samples = asset.samples[offset + first:offset + last]
+        return samples if len(samples) else None
 
     def trim_left(self, amount_ms):
         """Обрезает слева на amount_ms миллисекунд"""
@@ -113,8 +369,10 @@ class AudioClip:
             amount_applied = new_trim - self.trim_start
             self.trim_start = new_trim
             self.duration = max(0, self.original_duration - self.trim_start - self.trim_end)
+            self.update_end_time()
             return amount_applied
 
+        self.update_end_time()
         return abs(amount_ms)
 
     def trim_right(self, amount_ms):
@@ -127,8 +385,10 @@ class AudioClip:
             amount_applied = new_trim - self.trim_end
             self.trim_end = new_trim
             self.duration = max(0, self.original_duration - self.trim_start - self.trim_end)
+            self.update_end_time()
             return amount_applied
 
+        self.update_end_time()
         return abs(amount_ms)
 
     def get_display_duration(self):
@@ -136,8 +396,11 @@ class AudioClip:
         return self.duration
 
     def update_end_time(self):
-        """Обновляет конечное время"""
+        """Обновляет конечное время и положение клипа в индексе дорожки"""
         self.end_time = self.start_time + self.duration
+        self._update_frames()
+        if self._track is not None:
+            self._track.update_clip(self)
 
     def export_to_format(self, output_path, format=None):
         """Экспортирует клип в указанный формат
@@ -146,7 +409,7 @@ class AudioClip:
             output_path: Путь для сохранения
             format: Формат файла (mp3, wav, flac и т.д.)
         """
-        if not self.audio:
+        if self._load() is None:
             return False
 
         try:
@@ -154,7 +417,9 @@ class AudioClip:
                 _, ext = os.path.splitext(output_path)
                 format = ext.lstrip('.').lower()
 
-            export_audio = self.audio[self.trim_start:len(self.audio) - self.trim_end]
+            audio = self.audio
+            offset = self.trim_start - self.data_window_ms[0]
+            export_audio = audio[offset:offset + self.duration]
             export_audio.export(output_path, format=format)
             return True
 
@@ -163,50 +428,102 @@ class AudioClip:
 
 
 class Track:
-    """Класс для представления аудиодорожки"""
+    """Класс для представления аудиодорожки
+
+    Клипы дополнительно хранятся в интервальном индексе, который
+    поддерживается в актуальном состоянии при добавлении, удалении,
+    перемещении и обрезании клипов. Индекс защищён блокировкой: клипы
+    добавляются и из потоков импорта, а поток воспроизведения в это время
+    выбирает клипы блока.
+    """
 
     def __init__(self, name="Track", volume=0.5, pan=0.0):
         self.name = name
         self.volume = volume
         self.pan = pan
-        self.clips = []
+        self._clips = []
+        self._index = ClipIntervalIndex()
+        self._lock = threading.RLock()
         self.muted = False
         self.solo = False
 
+    @property
+    def clips(self):
+        return self._clips
+
+    @clips.setter
+    def clips(self, clips):
+        clips = list(clips)
+        with self._lock:
+            kept = {id(clip) for clip in clips}
+            for clip in self._clips:
+                clip._track = None
+                if id(clip) not in kept:
+                    clip.cancel_preload()
+            self._clips = clips
+            self._index = ClipIntervalIndex(self._clips)
+            for clip in self._clips:
+                clip._track = self
+
     def add_clip(self, clip):
-        self.clips.append(clip)
+        with self._lock:
+            self._clips.append(clip)
+            self._index.add(clip)
+            clip._track = self
 
     def remove_clip(self, clip_index):
-        if 0 <= clip_index < len(self.clips):
-            return self.clips.pop(clip_index)
+        with self._lock:
+            if 0 <= clip_index < len(self._clips):
+                clip = self._clips.pop(clip_index)
+                self._index.remove(clip)
+                clip._track = None
+                clip.cancel_preload()
+                return clip
         return None
 
+    def move_clip(self, clip, start_time):
+        """Перемещает клип на дорожке в start_time"""
+        clip.start_time = start_time
+        clip.update_end_time()
+
+    def update_clip(self, clip):
+        """Обновляет индекс после изменения start_time/end_time клипа"""
+        with self._lock:
+            self._index.update(clip)
+
     def get_active_clips(self, current_time, lookahead_ms=50):
         """Возвращает клипы, активные в текущее время + lookahead"""
-        active_clips = []
-        for clip in self.clips:
-            if (clip.start_time <= current_time < clip.end_time or
-                    clip.start_time <= current_time + lookahead_ms < clip.end_time):
+        with self._lock:
+            active_clips = self._index.at(current_time)
+            ahead = self._index.at(current_time + lookahead_ms)
+        for clip in ahead:
+            if clip not in active_clips:
                 active_clips.append(clip)
         return active_clips
 
     def get_clips_sorted(self):
         """Возвращает клипы отсортированные по start_time"""
-        return sorted(self.clips, key=lambda c: c.start_time)
+        with self._lock:
+            return self._index.sorted_clips()
+
+    def get_clips_in_range(self, start_ms, end_ms):
+        """Возвращает клипы, пересекающие интервал [start_ms, end_ms)"""
+        with self._lock:
+            return self._index.overlapping(start_ms, end_ms)
 
     def check_overlap(self, clip):
         """Проверяет перекрывает ли клип другие клипы на дорожке"""
-        for other_clip in self.clips:
-            if other_clip is clip:
-                continue
-            if (clip.start_time < other_clip.end_time and
-                    clip.end_time > other_clip.start_time):
+        with self._lock:
+            overlapping = self._index.overlapping(clip.start_time, clip.end_time)
+        for other_clip in overlapping:
+            if other_clip is not clip:
                 return other_clip
         return None
 
     def find_clips_after(self, time_ms):
         """Находит все клипы, начинающиеся после time_ms"""
-        return [clip for clip in self.clips if clip.start_time >= time_ms]
+        with self._lock:
+            return self._index.starting_from(time_ms)
 
     def set_volume(self, volume):
         """Установить громкость дорожки (0.0 - 1.0)"""
@@ -216,11 +533,45 @@ class Track:
         """Получить текущую громкость"""
         return self.volume
 
+    def set_pan(self, pan):
+        """Установить панораму дорожки (-1.0 — левый канал, 1.0 — правый)"""
+        self.pan = max(-1.0, min(1.0, pan))
+
 
 class Project:
-    """Класс для управления проектом аудиоредактора"""
+    """Класс для управления проектом аудиоредактора
+
+    Воспроизведение устроено как конвейер: поток рендеринга микширует звук
+    на lookahead_ms вперёд в кольцевой буфер, а callback PyAudio только
+    копирует из него готовые кадры.
+
+    В режиме движка engine="frames" позиция рендеринга хранится в целых
+    кадрах и блоки микшируются по кадровым смещениям клипов, поэтому
+    записанное в буфер точно совпадает с пройденным временем. В
+    миллисекунды позиция переводится только для current_time (интерфейс).
+    Режим "ms" — прежний расчёт в миллисекундах.
+
+    Профиль задержки (LATENCY_PROFILES) согласованно задаёт размер блока
+    рендеринга, frames_per_buffer потока PortAudio и lookahead. При
+    adaptive_latency после ADAPTIVE_UNDERRUNS выпадений lookahead
+    увеличивается в полтора раза (до ADAPTIVE_MAX_LOOKAHEAD_MS).
+    """
 
-    def __init__(self, sample_rate=44100, channels=2):
+    DEFAULT_LOOKAHEAD_MS = 200
+    ENGINE_MODES = ("ms", "frames")
+    LATENCY_PROFILES = {
+        'low': {'block_ms': 10, 'frames_per_buffer': 256, 'lookahead_ms': 40},
+        'normal': {'block_ms': 50, 'frames_per_buffer': 1024, 'lookahead_ms': DEFAULT_LOOKAHEAD_MS},
+        'safe': {'block_ms': 100, 'frames_per_buffer': 4096, 'lookahead_ms': 500},
+    }
+    ADAPTIVE_UNDERRUNS = 3
+    ADAPTIVE_MAX_LOOKAHEAD_MS = 1000
+
+    def __init__(self, sample_rate=44100, channels=2, engine="ms", latency_profile="normal",
+                 adaptive_latency=False):
+        if engine not in self.ENGINE_MODES:
+            raise ValueError(f"Неизвестный режим движка: {engine}")
+        self.engine = engine
         self.tracks = []
         self.sample_rate = sample_rate
         self.channels = channels
@@ -230,15 +581,27 @@ class Project:
         self.seeking = False
         self.current_time = 0
         self.duration = 0
+        self.mixer = AudioMixer(sample_rate, channels, inline_loading=False)
 
-        import threading
         self.py_audio = pyaudio.PyAudio()
         self.stream = None
         self.stop_flag = False
         self.lock = threading.Lock()
         self.update_callback = None
 
+        self.underrun_count = 0
+        self.adaptive_latency = adaptive_latency
+        self.set_latency_profile(latency_profile)
+        self._ring = None
+        self._callback_buffer = None
+        self._render_finished = False
+        self._seek_generation = 0
+        self._seek_target = 0
+
     def add_track(self, track):
+        for clip in track.clips:
+            clip.conform_to_rate(self.sample_rate)
+            clip.preload()
         self.tracks.append(track)
         self._update_duration()
 
@@ -266,12 +629,47 @@ class Project:
     def set_update_callback(self, callback):
         self.update_callback = callback
 
+    def set_latency_profile(self, name):
+        """Применяет профиль задержки: размер блока, frames_per_buffer и lookahead
+
+        Размер блока и буфер PortAudio вступают в силу при следующем
+        открытии потока вывода (запуск или снятие с паузы).
+        """
+        if name not in self.LATENCY_PROFILES:
+            raise ValueError(f"Неизвестный профиль задержки: {name}")
+        profile = self.LATENCY_PROFILES[name]
+        self.latency_profile = name
+        self.block_ms = profile['block_ms']
+        self.frames_per_buffer = profile['frames_per_buffer']
+        self.lookahead_ms = profile['lookahead_ms']
+
+    def _adapt_latency(self, underruns_seen):
+        """Увеличивает lookahead после серии выпадений; возвращает учтённое число выпадений"""
+        if not self.adaptive_latency or self.underrun_count - underruns_seen < self.ADAPTIVE_UNDERRUNS:
+            return underruns_seen
+        self.lookahead_ms = min(self.ADAPTIVE_MAX_LOOKAHEAD_MS, self.lookahead_ms * 1.5)
+        return self.underrun_count
+
+    def get_output_latency_ms(self):
+        """Фактическая задержка вывода: lookahead плюс задержка устройства по данным PortAudio
+
+        Пока поток не открыт (или драйвер не сообщает задержку), вместо
+        задержки устройства берётся длительность frames_per_buffer.
+        """
+        device_ms = self.frames_per_buffer * 1000 / self.sample_rate
+        stream = self.stream
+        if stream is not None:
+            try:
+                device_ms = float(stream.get_output_latency()) * 1000
+            except Exception:
+                pass
+        return self.lookahead_ms + device_ms
+
     def toggle_play(self):
         if not self.playing:
             self.playing = True
             self.paused = False
             self.stop_flag = False
-            import threading
             threading.Thread(target=self._playback_loop, daemon=True).start()
         elif self.paused:
             self.paused = False
@@ -282,6 +680,8 @@ class Project:
     def set_playback_time(self, time_ms, seeking=False):
         """Устанавливает время воспроизведения"""
         self.current_time = max(0, min(time_ms, self.duration))
+        self._seek_target = self.current_time
+        self._seek_generation += 1
         self.seeking = seeking
         if self.update_callback:
             self.update_callback(self.current_time / self.duration if self.duration > 0 else 0)
@@ -305,105 +705,146 @@ class Project:
 
     def _mix_audio_chunk(self, start_time, chunk_duration_ms):
         """Микширует аудио из всех дорожек для указанного временного интервала"""
-        active_tracks = [track for track in self.tracks if not track.muted]
-
-        if not active_tracks:
-            return self._generate_silence(chunk_duration_ms)
-
-        target_bytes = int(self.sample_rate * self.sample_width * self.channels * chunk_duration_ms / 1000)
-        mixed_data = None
-
-        for track in active_tracks:
-            active_clips = track.get_active_clips(start_time, chunk_duration_ms)
-            for clip in active_clips:
-                clip_position = start_time - clip.start_time
-                if clip_position < 0:
-                    continue
-
-                audio_chunk = clip.get_audio_chunk(clip_position, chunk_duration_ms)
-
-                if audio_chunk:
-                    if clip.volume != 1.0 or track.volume != 1.0:
-                        audio_array = np.frombuffer(audio_chunk, dtype=np.int16)
-                        adjusted_array = (audio_array * clip.volume * track.volume).astype(np.int16)
-                        audio_chunk = adjusted_array.tobytes()
-
-                    if mixed_data is None:
-                        mixed_data = audio_chunk
-                    else:
-                        arr1 = np.frombuffer(mixed_data, dtype=np.int16)
-                        arr2 = np.frombuffer(audio_chunk, dtype=np.int16)
-                        min_len = min(len(arr1), len(arr2))
-                        arr1 = arr1[:min_len]
-                        arr2 = arr2[:min_len]
-                        mixed = np.clip(arr1 + arr2, -32768, 32767).astype(np.int16)
-                        mixed_data = mixed.tobytes()
-
-        if mixed_data is None:
-            return self._generate_silence(chunk_duration_ms)
-
-        if len(mixed_data) < target_bytes:
-            mixed_data += b'\x00' * (target_bytes - len(mixed_data))
-        elif len(mixed_data) > target_bytes:
-            mixed_data = mixed_data[:target_bytes]
-
-        return mixed_data
+        return self.mixer.mix(self.tracks, start_time, chunk_duration_ms)
+
+    def _position_of(self, time_ms):
+        """Позиция движка для времени time_ms: кадр в режиме frames, иначе мс"""
+        if self.engine == "frames":
+            return round(time_ms * self.sample_rate / 1000)
+        return time_ms
+
+    def _time_of(self, position):
+        """Время в мс для позиции движка"""
+        if self.engine == "frames":
+            return position * 1000 / self.sample_rate
+        return position
+
+    def _chunk_end(self, position, chunk_duration_ms):
+        """Позиция конца очередного блока, не дальше конца проекта"""
+        if self.engine == "frames":
+            return min(position + self.mixer.frames_for(chunk_duration_ms), self._position_of(self.duration))
+        return min(position + chunk_duration_ms, self.duration)
+
+    def _render_chunk(self, position, end_position):
+        """Микширует блок между позициями движка и возвращает int16-массив"""
+        if self.engine == "frames":
+            return self.mixer.mix_frames_into(self.tracks, position, end_position - position)
+        return self.mixer.mix_into(self.tracks, position, end_position - position)
+
+    def get_playback_stats(self):
+        """Возвращает параметры и счётчики конвейера воспроизведения"""
+        buffered_frames = self._ring.available() if self._ring else 0
+        return {
+            'latency_profile': self.latency_profile,
+            'adaptive': self.adaptive_latency,
+            'block_ms': self.block_ms,
+            'frames_per_buffer': self.frames_per_buffer,
+            'lookahead_ms': self.lookahead_ms,
+            'output_latency_ms': self.get_output_latency_ms(),
+            'buffered_ms': buffered_frames * 1000 / self.sample_rate,
+            'underruns': self.underrun_count,
+        }
+
+    def _open_stream(self):
+        """Открывает callback-поток PyAudio, если он ещё не открыт"""
+        with self.lock:
+            if self.stream:
+                return True
+            try:
+                self.stream = self.py_audio.open(
+                    format=pyaudio.paInt16,
+                    channels=self.channels,
+                    rate=self.sample_rate,
+                    output=True,
+                    frames_per_buffer=self.frames_per_buffer,
+                    stream_callback=self._audio_callback,
+                )
+                return True
+            except Exception:
+                return False
+
+    def _audio_callback(self, in_data, frame_count, time_info, status):
+        """Callback PyAudio: только копирует готовые кадры из кольцевого буфера"""
+        if self._callback_buffer is None or len(self._callback_buffer) < frame_count:
+            self._callback_buffer = np.zeros((frame_count, self.channels), dtype=np.int16)
+        out = self._callback_buffer[:frame_count]
+
+        if self.paused or self.seeking or self._ring is None:
+            out.fill(0)
+        else:
+            frames_read = self._ring.read_into(out)
+            if frames_read < frame_count:
+                out[frames_read:] = 0
+                if not self._render_finished:
+                    self.underrun_count += 1
+
+        return out.tobytes(), pyaudio.paContinue
 
     def _playback_loop(self):
-        """Основной цикл воспроизведения"""
+        """Поток рендеринга: держит кольцевой буфер заполненным на lookahead_ms вперёд"""
         self.stop_flag = False
-        chunk_duration_ms = 50
+        chunk_duration_ms = self.block_ms
+        chunk_frames = self.mixer.frames_for(chunk_duration_ms)
+
+        max_lookahead_ms = max(self.lookahead_ms, self.ADAPTIVE_MAX_LOOKAHEAD_MS if self.adaptive_latency else 0)
+        capacity = self.mixer.frames_for(max_lookahead_ms) + 2 * chunk_frames
+        if self._ring is None or self._ring.capacity < capacity:
+            self._ring = PcmRingBuffer(capacity, self.channels)
+        else:
+            self._ring.reset()
+
+        generation = self._seek_generation
+        position = self._position_of(self.current_time)
+        reported_time = None
+        underruns_seen = self.underrun_count
 
         while self.playing and not self.stop_flag:
+            if generation != self._seek_generation:
+                generation = self._seek_generation
+                position = self._position_of(self._seek_target)
+                reported_time = None
+                if self.stream:
+                    self._ring.discard()
+                else:
+                    self._ring.reset()
+
             if self.seeking or self.paused:
-                import time
                 time.sleep(0.01)
                 continue
 
-            if self.current_time >= self.duration:
+            underruns_seen = self._adapt_latency(underruns_seen)
+            buffered_frames = self._ring.available()
+            buffered_ms = buffered_frames * 1000 / self.sample_rate
+            self._render_finished = position >= self._position_of(self.duration)
+
+            if self._render_finished and buffered_frames == 0:
                 self.playing = False
                 self.current_time = 0
                 if self.update_callback:
                     self.update_callback(0.0)
                 break
 
-            try:
-                if self.current_time >= self.duration:
-                    break
-
-                chunk_end_time = min(self.current_time + chunk_duration_ms, self.duration)
-                actual_chunk_duration = chunk_end_time - self.current_time
-                mixed_audio = self._mix_audio_chunk(self.current_time, actual_chunk_duration)
-
-                with self.lock:
-                    if not self.stream:
-                        try:
-                            self.stream = self.py_audio.open(
-                                format=pyaudio.paInt16,
-                                channels=self.channels,
-                                rate=self.sample_rate,
-                                output=True
-                            )
-                        except Exception:
-                            break
-
-                    if self.stream:
-                        try:
-                            self.stream.write(mixed_audio)
-                            self.current_time += chunk_duration_ms
-                            if self.update_callback and self.duration > 0:
-                                progress = min(1.0, self.current_time / self.duration)
-                                self.update_callback(progress)
-                        except Exception:
-                            with self.lock:
-                                if self.stream:
-                                    self.stream.close()
-                                    self.stream = None
-                            continue
+            if (not self._render_finished and buffered_ms < self.lookahead_ms
+                    and self._ring.free() >= chunk_frames):
+                chunk_end = self._chunk_end(position, chunk_duration_ms)
+                try:
+                    self._ring.write(self._render_chunk(position, chunk_end))
+                except Exception:
+                    time.sleep(0.01)
+                position = chunk_end
+                continue
 
-            except Exception:
-                import time
-                time.sleep(0.01)
+            if not self.stream and not self._open_stream():
+                break
+
+            playing_position = position - (buffered_frames if self.engine == "frames" else buffered_ms)
+            self.current_time = max(0, min(self._time_of(playing_position), self.duration))
+            if reported_time is None or abs(self.current_time - reported_time) >= chunk_duration_ms:
+                reported_time = self.current_time
+                if self.update_callback and self.duration > 0:
+                    self.update_callback(min(1.0, self.current_time / self.duration))
+
+            time.sleep(0.005)
 
         self._stop_stream()
         if not self.paused:
@@ -423,9 +864,10 @@ class Project:
             return None
 
         try:
-            clip = AudioClip(filepath, start_time, name=name)
+            clip = AudioClip(filepath, start_time, name=name, target_rate=self.sample_rate)
             self.tracks[track_index].add_clip(clip)
             self._update_duration()
+            clip.preload()
             return clip
         except Exception:
             return None
@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+class PcmDiskStore:
+    """Дисковое хранилище PCM для клипов, отображаемых в память
+
+    Каждый импортированный файл один раз перекодируется в int16 PCM
+    (frames × channels) и сохраняется как .npy рядом с небольшим .json
+    с параметрами. Клип затем работает с numpy.memmap: чтение фрагментов
+    не копирует данные, а резидентностью управляет кэш страниц ОС.
+    """
+
+    def __init__(self, cache_dir, min_bytes=0):
+        self.cache_dir = cache_dir
+        self.min_bytes = min_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _base_path(self, key):
+        """Путь к файлам PCM ключа без расширения (.npy и .json рядом)"""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    def load(self, key):
+        """Открывает сохранённый PCM как memmap, возвращает (samples, frame_rate) или None"""
+        base = self._base_path(key)
+        try:
+            with open(base + '.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            samples = np.load(base + '.npy', mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return samples, meta['frame_rate']
+
+    def save(self, key, samples, frame_rate):
+        """Записывает PCM на диск и возвращает его memmap-представление"""
+        base = self._base_path(key)
+        directory = os.path.dirname(base)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.npy', dir=directory)
+        os.close(fd)
+        try:
+            mapped = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.int16, shape=samples.shape)
+            mapped[:] = samples
+            mapped.flush()
+            del mapped
+            os.replace(tmp_path, base + '.npy')
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'frame_rate': frame_rate, 'key': repr(key)}, f)
+
+        return np.load(base + '.npy', mmap_mode='r')
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class PcmRingBuffer:
+    """Кольцевой буфер int16-кадров для одного писателя и одного читателя
+
+    Писатель (поток рендеринга) меняет только позицию записи, читатель
+    (callback PyAudio) — только позицию чтения, поэтому блокировки не нужны:
+    обе позиции монотонно растут, а присваивание int атомарно под GIL.
+    Сброс содержимого при перемотке выполняет писатель через discard():
+    читатель сам перепрыгивает отброшенные кадры при следующем чтении.
+    """
+
+    def __init__(self, capacity_frames, channels=2):
+        self.capacity = max(1, int(capacity_frames))
+        self.channels = channels
+        self._buffer = np.zeros((self.capacity, channels), dtype=np.int16)
+        self._write_pos = 0
+        self._read_pos = 0
+        self._discard_until = 0
+
+    def available(self):
+        """Количество кадров, готовых к чтению"""
+        return self._write_pos - max(self._read_pos, self._discard_until)
+
+    def free(self):
+        """Количество кадров, которые можно записать без перезаписи непрочитанных"""
+        return self.capacity - (self._write_pos - self._read_pos)
+
+    def write(self, frames):
+        """Записывает frames (N × channels), возвращает число записанных кадров
+
+        Вызывается только потоком-писателем.
+        """
+        count = min(len(frames), self.free())
+        if count <= 0:
+            return 0
+
+        start = self._write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = frames[:first]
+        if count > first:
+            self._buffer[:count - first] = frames[first:count]
+        self._write_pos += count
+        return count
+
+    def read_into(self, out):
+        """Копирует до len(out) кадров в out, возвращает число прочитанных кадров
+
+        Вызывается только потоком-читателем.
+        """
+        if self._discard_until > self._read_pos:
+            self._read_pos = self._discard_until
+
+        count = min(len(out), self._write_pos - self._read_pos)
+        if count <= 0:
+            return 0
+
+        start = self._read_pos % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        if count > first:
+            out[first:count] = self._buffer[:count - first]
+        self._read_pos += count
+        return count
+
+    def discard(self):
+        """Отбрасывает все записанные, но ещё не прочитанные кадры
+
+        Вызывается только потоком-писателем.
+        """
+        self._discard_until = self._write_pos
+
+    def reset(self):
+        """Полностью очищает буфер; допустимо, только когда читатель остановлен"""
+        self._write_pos = 0
+        self._read_pos = 0
+        self._discard_until = 0
@@ -0,0 +1,102 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_HALF_TAPS = 48
+DEFAULT_KAISER_BETA = 10.0
+DEFAULT_ROLLOFF = 0.92
+BLOCK_FRAMES = 1 << 17
+
+
+@lru_cache(maxsize=16)
+def _polyphase_kernels(up, down, half_taps, beta, rolloff):
+    """Строит фазы windowed-sinc фильтра для коэффициента up/down
+
+    Прототип считается на частоте src_rate * up; частота среза — меньшая из
+    двух частот Найквиста, умноженная на rolloff. Возвращает (kernels, center):
+    kernels[phase] — отводы фазы в обратном порядке (float32), готовые для
+    скалярного произведения с окном входных кадров.
+    """
+    factor = max(up, down)
+    center = half_taps * factor
+    length = 2 * center + 1
+    cutoff = rolloff * 0.5 / factor
+
+    k = np.arange(length) - center
+    prototype = 2 * cutoff * np.sinc(2 * cutoff * k) * np.kaiser(length, beta) * up
+
+    taps = -(-length // up)
+    padded = np.zeros(taps * up)
+    padded[:length] = prototype
+    kernels = np.ascontiguousarray(padded.reshape(taps, up).T[:, ::-1], dtype=np.float32)
+    kernels.setflags(write=False)
+    return kernels, center
+
+
+def resample(samples, src_rate, dst_rate, half_taps=DEFAULT_HALF_TAPS,
+             beta=DEFAULT_KAISER_BETA, rolloff=DEFAULT_ROLLOFF):
+    """Передискретизация (frames × channels) из src_rate в dst_rate
+
+    Рациональный полифазный windowed-sinc ресемплер. Выходные кадры с одной
+    фазой фильтра идут с шагом up, а соответствующие им окна входа — с шагом
+    down, поэтому для каждой фазы свёртка сводится к одному умножению
+    матрицы окон (строится через strides, без копирования входа) на вектор
+    отводов. Вход переводится в float32 и дополняется нулями по блокам
+    около BLOCK_FRAMES кадров с перекрытием в taps кадров, так что
+    временный буфер зависит от размера блока, а не от длины входа.
+
+    int16 на входе даёт int16 на выходе (с округлением и ограничением),
+    остальные типы возвращаются как float32.
+    """
+    samples = np.asarray(samples)
+    if samples.ndim == 1:
+        return resample(samples[:, None], src_rate, dst_rate, half_taps, beta, rolloff)[:, 0]
+
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples.copy()
+
+    divisor = gcd(int(src_rate), int(dst_rate))
+    up, down = int(dst_rate) // divisor, int(src_rate) // divisor
+    kernels, center = _polyphase_kernels(up, down, half_taps, beta, rolloff)
+    taps = kernels.shape[1]
+
+    frames_in = len(samples)
+    frames_out = frames_in * up // down
+    is_int16 = samples.dtype == np.int16
+    out = np.empty((frames_out, samples.shape[1]), dtype=np.int16 if is_int16 else np.float32)
+
+    # Окно выходного кадра j начинается с кадра (j * down + center) // up + 1
+    # входа, дополненного taps нулями слева. Блок из целого числа периодов
+    # up сохраняет порядок фаз, поэтому окна считаются от начала блока.
+    block_out = up * max(1, -(-BLOCK_FRAMES // down))
+    scratch = np.empty((block_out * down // up + taps + 1, samples.shape[1]), dtype=np.float32)
+
+    for j0 in range(0, frames_out, block_out):
+        j1 = min(frames_out, j0 + block_out)
+        base = (j0 * down + center) // up + 1
+        span = (((j1 - 1) * down + center) // up + 1) + taps - base
+
+        lo = base - taps
+        src_lo = max(0, lo)
+        src_hi = max(src_lo, min(frames_in, lo + span))
+        chunk = scratch[:span]
+        chunk[:src_lo - lo] = 0
+        chunk[src_lo - lo:src_hi - lo] = samples[src_lo:src_hi]
+        chunk[src_hi - lo:] = 0
+        windows = sliding_window_view(chunk, taps, axis=0)
+
+        for first_out in range(j0, min(j0 + up, j1)):
+            position = first_out * down + center
+            first_in = position // up + 1 - base
+            kernel = kernels[position % up]
+            count = (j1 - first_out + up - 1) // up
+
+            block = windows[first_in:first_in + (count - 1) * down + 1:down] @ kernel
+            if is_int16:
+                np.rint(block, out=block)
+                np.clip(block, -32768, 32767, out=block)
+            out[first_out:first_out + (count - 1) * up + 1:up] = block
+
+    return out
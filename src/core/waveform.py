@@ -0,0 +1,305 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.core.audio_cache import content_hash, default_audio_cache, known_content_hash
+
+BASE_BUCKET_FRAMES = 256
+BLOCK_BUCKETS = 4096
+DEFAULT_PEAKS_DIR = os.path.join(os.path.expanduser('~'), '.sigmaudio', 'peaks')
+MEMORY_ENTRIES = 256
+
+
+class WaveformPeaks:
+    """Пирамида пиков волновой формы
+
+    Уровень k хранит для каждых BASE_BUCKET_FRAMES * 2**k кадров минимум,
+    максимум и RMS (int16, моно-свёртка каналов) — массив buckets × 3.
+    Для отрисовки выбирается самый грубый уровень, у которого на столбец
+    пикселей приходится не меньше одного бакета, поэтому объём работы
+    пропорционален ширине видимой области, а не длине файла.
+    """
+
+    def __init__(self, levels, frame_rate, frame_count, base_frames=BASE_BUCKET_FRAMES):
+        self.levels = levels
+        self.frame_rate = frame_rate
+        self.frame_count = frame_count
+        self.base_frames = base_frames
+
+    @property
+    def duration(self):
+        return round(1000 * self.frame_count / self.frame_rate) if self.frame_rate else 0
+
+    @classmethod
+    def from_samples(cls, samples, frame_rate, base_frames=BASE_BUCKET_FRAMES):
+        """Строит пирамиду по int16-сэмплам (frames × channels)"""
+        samples = np.asarray(samples)
+        step = BLOCK_BUCKETS * base_frames
+        return cls.from_blocks((samples[i:i + step] for i in range(0, len(samples), step)),
+                               frame_rate, base_frames)
+
+    @classmethod
+    def from_blocks(cls, blocks, frame_rate, base_frames=BASE_BUCKET_FRAMES):
+        """Строит пирамиду по последовательности int16-блоков (frames × channels)
+
+        Длина каждого блока, кроме последнего, должна быть кратна
+        base_frames. В памяти одновременно находится только один блок,
+        поэтому так можно посчитать пики файла, не декодируя его целиком.
+        """
+        parts = []
+        frame_count = 0
+        for chunk in blocks:
+            chunk = np.asarray(chunk)
+            if chunk.ndim == 1:
+                chunk = chunk[:, None]
+            if not len(chunk):
+                continue
+            frame_count += len(chunk)
+            rows = -(-len(chunk) // base_frames)
+            if len(chunk) < rows * base_frames:
+                chunk = np.concatenate([chunk, np.repeat(chunk[-1:], rows * base_frames - len(chunk), axis=0)])
+            chunk = chunk.reshape(rows, -1)
+            part = np.empty((rows, 3), dtype=np.int16)
+            part[:, 0] = chunk.min(axis=1)
+            part[:, 1] = chunk.max(axis=1)
+            part[:, 2] = np.sqrt(np.square(chunk, dtype=np.float64).mean(axis=1))
+            parts.append(part)
+        level = np.concatenate(parts) if parts else np.zeros((1, 3), dtype=np.int16)
+
+        levels = [level]
+        while len(level) > 1:
+            if len(level) % 2:
+                level = np.concatenate([level, level[-1:]])
+            pairs = level.reshape(-1, 2, 3)
+            rms = np.sqrt(np.square(pairs[:, :, 2], dtype=np.float64).mean(axis=1))
+            level = np.stack([pairs[:, :, 0].min(axis=1),
+                              pairs[:, :, 1].max(axis=1),
+                              rms.astype(np.int16)], axis=1)
+            levels.append(level)
+
+        return cls(levels, frame_rate, frame_count, base_frames)
+
+    def level_for(self, frames_per_column):
+        """Индекс самого грубого уровня, бакет которого не шире столбца"""
+        index = 0
+        while index + 1 < len(self.levels) and self.base_frames << (index + 1) <= frames_per_column:
+            index += 1
+        return index
+
+    def columns(self, start_ms, end_ms, count):
+        """Возвращает (count × 3) min/max/RMS для интервала [start_ms, end_ms)
+
+        Значения нормированы в -1..1. При увеличении сильнее базового
+        уровня соседние столбцы повторяют один и тот же бакет.
+        """
+        count = max(0, int(count))
+        if count == 0 or not self.frame_rate or end_ms <= start_ms:
+            return np.zeros((count, 3), dtype=np.float32)
+
+        start_frame = max(0, int(start_ms * self.frame_rate / 1000))
+        end_frame = min(self.frame_count, int(end_ms * self.frame_rate / 1000))
+        if end_frame <= start_frame:
+            return np.zeros((count, 3), dtype=np.float32)
+
+        index = self.level_for((end_frame - start_frame) / count)
+        level = self.levels[index]
+        bucket_frames = self.base_frames << index
+
+        first = start_frame // bucket_frames
+        last = min(len(level), -(-end_frame // bucket_frames))
+        edges = np.linspace(first, last, count + 1).astype(np.int64)
+        starts = np.minimum(edges[:-1], last - 1)
+
+        window = level[:last]
+        result = np.empty((count, 3), dtype=np.float32)
+        result[:, 0] = np.minimum.reduceat(window[:, 0], starts)
+        result[:, 1] = np.maximum.reduceat(window[:, 1], starts)
+        result[:, 2] = np.maximum.reduceat(window[:, 2], starts)
+        result /= 32768
+        return result
+
+    def save(self, path):
+        """Записывает пирамиду в один .npz (через временный файл)"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.npz', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, meta=np.array([self.frame_rate, self.frame_count, self.base_frames], dtype=np.int64),
+                         **{f'level{i}': level for i, level in enumerate(self.levels)})
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Читает пирамиду из .npz, возвращает None, если файла нет или он повреждён"""
+        try:
+            with np.load(path) as data:
+                frame_rate, frame_count, base_frames = (int(v) for v in data['meta'])
+                levels = []
+                while f'level{len(levels)}' in data:
+                    levels.append(data[f'level{len(levels)}'])
+        except (OSError, ValueError, KeyError):
+            return None
+        if not levels:
+            return None
+        return cls(levels, frame_rate, frame_count, base_frames)
+
+
+class WaveformPeakStore:
+    """Хранилище пирамид пиков в файлах-спутниках по хэшу содержимого
+
+    Пики считаются один раз на файл; при повторном открытии проекта
+    волновая форма берётся из <sha1>.peaks.npz без декодирования аудио.
+    Последние пирамиды держатся в памяти, чтобы перерисовка при
+    масштабировании и перетаскивании не читала диск.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_PEAKS_DIR, memory_entries=MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path_for(self, digest):
+        return os.path.join(self.cache_dir, digest + '.peaks.npz')
+
+    def cached(self, path):
+        """Пирамида из памяти или файла-спутника; None, если её ещё не считали"""
+        digest = content_hash(path)
+        with self._lock:
+            peaks = self._memory.get(digest)
+            if peaks is not None:
+                self._memory.move_to_end(digest)
+                return peaks
+
+        peaks = WaveformPeaks.load(self.path_for(digest))
+        if peaks is not None:
+            self._remember(digest, peaks)
+        return peaks
+
+    def peek(self, path):
+        """Пирамида из памяти без чтения файлов; None, если её там нет
+
+        Хэш берётся только из уже посчитанных, поэтому вызов не читает ни
+        аудиофайл, ни файл-спутник и не блокирует поток интерфейса.
+        """
+        digest = known_content_hash(path)
+        if digest is None:
+            return None
+        with self._lock:
+            peaks = self._memory.get(digest)
+            if peaks is not None:
+                self._memory.move_to_end(digest)
+            return peaks
+
+    def get(self, path, samples=None, frame_rate=None):
+        """Возвращает пирамиду для файла path
+
+        samples/frame_rate — уже декодированные данные, если они есть:
+        тогда при отсутствии файла-спутника файл не декодируется повторно.
+        samples может быть функцией без аргументов — она вызывается, только
+        если пирамиду действительно нужно считать.
+        """
+        peaks = self.cached(path)
+        if peaks is not None:
+            return peaks
+
+        if callable(samples):
+            samples = samples()
+        peaks = self._compute(path, samples, frame_rate)
+        digest = content_hash(path)
+        try:
+            peaks.save(self.path_for(digest))
+        except OSError:
+            pass
+        self._remember(digest, peaks)
+        return peaks
+
+    def _remember(self, digest, peaks):
+        with self._lock:
+            self._memory[digest] = peaks
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return peaks
+
+    @staticmethod
+    def _compute(path, samples, frame_rate):
+        if samples is not None and frame_rate:
+            return WaveformPeaks.from_samples(samples, frame_rate)
+
+        # файл читается блоками мимо кэша: пики строятся по всему файлу,
+        # а держать его декодированным целиком ради них незачем
+        frame_rate, blocks = default_audio_cache.decoders.decode_blocks(
+            path, block_frames=BLOCK_BUCKETS * BASE_BUCKET_FRAMES)
+        return WaveformPeaks.from_blocks(blocks, frame_rate)
+
+    def clear_memory(self):
+        """Забывает пирамиды в памяти (файлы-спутники остаются)"""
+        with self._lock:
+            self._memory.clear()
+
+
+default_peak_store = WaveformPeakStore()
+
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def peaks_for_clip(clip, store=None, on_ready=None):
+    """Пирамида пиков для клипа; использует сэмплы клипа, если их нужно считать
+
+    По умолчанию пики берутся из хранилища ресурсов кэша клипа, если оно
+    задано, иначе из default_peak_store. Пики всегда строятся по всему
+    файлу: если клип держит только окно, файл читается блоками мимо кэша
+    декодированного аудио.
+
+    Без on_ready функция блокирует до готовности пирамиды. С on_ready
+    в вызывающем потоке проверяется только память (см. peek): хэш файла,
+    чтение файла-спутника и расчёт пиков выполняются в фоне, функция
+    сразу возвращает None, а по готовности вызывается on_ready(peaks).
+    Повторные запросы того же файла до окончания расчёта не запускают
+    его ещё раз.
+    """
+    if store is None:
+        asset_store = getattr(getattr(clip, '_cache', None), 'asset_store', None)
+        store = asset_store.peaks if asset_store is not None else default_peak_store
+    if on_ready is None:
+        return store.get(clip.file_path, clip.full_samples, clip.frame_rate)
+
+    peaks = store.peek(clip.file_path)
+    if peaks is not None:
+        return peaks
+
+    key = (id(store), clip.file_path)
+    with _pending_lock:
+        waiting = _pending.get(key)
+        if waiting is not None:
+            waiting.append(on_ready)
+            return None
+        _pending[key] = [on_ready]
+
+    def compute():
+        try:
+            result = store.get(clip.file_path, clip.full_samples, clip.frame_rate)
+        except Exception:
+            result = None
+        with _pending_lock:
+            callbacks = _pending.pop(key, [])
+        if result is None:
+            return
+        for callback in callbacks:
+            try:
+                callback(result)
+            except Exception:
+                pass
+
+    threading.Thread(target=compute, daemon=True).start()
+    return None
@@ -1,6 +1,9 @@
 import flet as ft
+import os
 import threading
 import time
+from src.core.asset_store import AssetStore
+from src.core.audio_cache import default_audio_cache
 from src.managers.controllers import AudioEditorController
 from src.utils.utils import create_transport_controls
 from src.UI.ui_components import TrackManager
@@ -12,12 +15,16 @@ def main(page: ft.Page):
     page.padding = 20
     page.scroll = ft.ScrollMode.ADAPTIVE
 
-    editor = AudioEditorController()
-    track_manager = TrackManager(editor, page)
+    default_audio_cache.set_asset_store(AssetStore(min_bytes=64 * 1024 * 1024))
+    editor = AudioEditorController(engine=os.environ.get("SIGMAUDIO_ENGINE", "frames"),
+                                   latency_profile=os.environ.get("SIGMAUDIO_LATENCY", "normal"),
+                                   adaptive_latency=os.environ.get("SIGMAUDIO_ADAPTIVE_LATENCY", "1") == "1")
+    track_manager = TrackManager(editor, page, render_mode=os.environ.get("SIGMAUDIO_TIMELINE", "widgets"),
+                                 playhead_mode=os.environ.get("SIGMAUDIO_PLAYHEAD", "overlay"))
 
     editor.set_track_manager(track_manager)
 
-    transport_controls = create_transport_controls(editor, page)
+    transport_controls = create_transport_controls(editor, page, track_manager.ui_scheduler)
 
     def on_resize(e):
         print(f"Окно изменено: {page.width}x{page.height}")
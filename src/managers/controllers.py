@@ -1,13 +1,22 @@
+from src.core.import_queue import ImportQueue
 from src.core.models import Project, Track, AudioClip
 
 
 class AudioEditorController:
     """Контроллер аудио редактора - управляет логикой приложения"""
 
-    def __init__(self):
-        self.project = Project()
+    def __init__(self, engine="ms", latency_profile="normal", adaptive_latency=False):
+        self.project = Project(engine=engine, latency_profile=latency_profile, adaptive_latency=adaptive_latency)
         self.ui_update_callback = None
         self.track_manager = None
+        self._import_queue = None
+
+    @property
+    def import_queue(self):
+        """Пул потоков импорта; создаётся при первом импорте"""
+        if self._import_queue is None:
+            self._import_queue = ImportQueue()
+        return self._import_queue
 
     def create_track(self, name="Track"):
         track = Track(name)
@@ -18,14 +27,20 @@ class AudioEditorController:
         """Устанавливает ссылку на track_manager для обновления UI"""
         self.track_manager = track_manager
 
-    def add_audio_clip(self, track_index, file_path, start_time=0, name="Clip"):
+    def add_audio_clip(self, track_index, file_path, start_time=0, name="Clip", refresh_ui=True):
+        """Добавляет клип по заголовку файла; PCM декодируется в фоне (см. AudioClip.preload)
+
+        refresh_ui=False не перестраивает линейку и дорожки — для пакетного
+        добавления, после которого интерфейс обновляется один раз.
+        """
         if 0 <= track_index < len(self.project.tracks):
             try:
-                clip = AudioClip(file_path, start_time, name=name)
+                clip = AudioClip(file_path, start_time, name=name, target_rate=self.project.sample_rate)
                 self.project.tracks[track_index].add_clip(clip)
                 self.project._update_duration()
+                clip.preload()
 
-                if self.track_manager:
+                if self.track_manager and refresh_ui:
                     self.track_manager.time_ruler.update_ruler()
                     self.track_manager.update_all_visualizations()
 
@@ -34,6 +49,34 @@ class AudioEditorController:
                 return None
         return None
 
+    def import_clips(self, track_index, file_paths, start_time=None, on_clip_added=None,
+                     on_progress=None, on_complete=None):
+        """Импортирует файлы на дорожку в фоне и возвращает ImportJob
+
+        Клипы ставятся встык в порядке file_paths начиная с start_time (по
+        умолчанию — с конца дорожки) по мере готовности; on_clip_added(clip)
+        вызывается после размещения каждого из них.
+        """
+        if not 0 <= track_index < len(self.project.tracks):
+            return None
+
+        track = self.project.tracks[track_index]
+        if start_time is None:
+            start_time = max((clip.end_time for clip in track.clips), default=0)
+        position = [start_time]
+
+        def place(clip):
+            clip.start_time = position[0]
+            clip.update_end_time()
+            track.add_clip(clip)
+            self.project._update_duration()
+            position[0] = clip.end_time
+            if on_clip_added:
+                on_clip_added(clip)
+
+        return self.import_queue.submit(file_paths, place, target_rate=self.project.sample_rate,
+                                        on_progress=on_progress, on_complete=on_complete)
+
     def set_playback_position(self, percent, seeking=False):
         time_ms = percent * self.project.duration
         self.project.set_playback_time(time_ms, seeking)
@@ -48,4 +91,6 @@ class AudioEditorController:
         self.project.set_update_callback(callback)
 
     def cleanup(self):
+        if self._import_queue is not None:
+            self._import_queue.shutdown()
         self.project.cleanup()
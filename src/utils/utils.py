@@ -1,8 +1,12 @@
 import flet as ft
 
 
-def create_transport_controls(editor, page):
-    """Создает элементы управления воспроизведением"""
+def create_transport_controls(editor, page, scheduler):
+    """Создает элементы управления воспроизведением
+
+    Текст позиции пересчитывается хуком кадра планировщика scheduler, то
+    есть вместе с курсором и в том же page.update(), без отдельного потока.
+    """
     play_button = ft.IconButton("play_arrow", icon_size=40)
     position_text = ft.Text("00:00 / 00:00", size=16)
 
@@ -15,34 +19,18 @@ def create_transport_controls(editor, page):
         total_sec = int(total_time / 1000)
 
         position_text.value = f"{current_sec // 60:02d}:{current_sec % 60:02d} / {total_sec // 60:02d}:{total_sec % 60:02d}"
+        play_button.icon = "pause" if editor.is_playing() else "play_arrow"
 
     def toggle_play(e):
         editor.toggle_play()
-        play_button.icon = "pause" if editor.is_playing() else "play_arrow"
-
-        update_position_text()
-
-        if editor.is_playing():
-            import threading
-            import time
-
-            def update_loop():
-                while editor.is_playing() and editor.project.playing:
-                    update_position_text()
-                    page.update()
-                    time.sleep(0.1)
-                update_position_text()
-                page.update()
-
-            threading.Thread(target=update_loop, daemon=True).start()
-
-        page.update()
+        scheduler.submit("transport", update_position_text)
 
     play_button.on_click = toggle_play
+    scheduler.add_frame_hook("transport", update_position_text)
 
     update_position_text()
 
     return ft.Row([
         play_button,
         position_text
-    ], alignment=ft.MainAxisAlignment.CENTER)
\ No newline at end of file
+    ], alignment=ft.MainAxisAlignment.CENTER)
@@ -4,11 +4,40 @@ from pathlib import Path
 import numpy as np
 from unittest.mock import Mock, patch, MagicMock
 import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import soundfile as sf
+import flet as ft
 
 from src.core.models import Project, Track, AudioClip, SUPPORTED_FORMATS
 from src.managers.controllers import AudioEditorController
 from src.core.audio_exporter import AudioExporter
+from src.core.mixer import AudioMixer, pan_gains
+from src.core.clip_index import ClipIntervalIndex
+from src.core.playback import PcmRingBuffer
+from src.core.audio_cache import DecodedAudioCache, content_hash, default_audio_cache
+from src.core.pcm_store import PcmDiskStore
+from src.core.decoders import DecoderRegistry, FfmpegDecoder, SoundfileDecoder, default_decoders
+from src.core.asset_store import AssetStore
+from src.core.import_queue import ImportJob, ImportQueue
+from src.core.resampler import resample
+from src.core.waveform import WaveformPeaks, WaveformPeakStore, peaks_for_clip
+from src.core.audio_visualizer import MAX_WAVEFORM_COLUMNS, AudioWaveform
+from src.UI.clip_views import ClipViewRegistry, TimelineViewport
+from src.UI.drag_drop import DraggableClip
+from src.UI.ui_components import SizeManager, TimeRuler, TrackManager
+from src.UI.ui_scheduler import UiUpdateScheduler
+from src.UI.playhead import PlayheadOverlay
+from src.UI.canvas_timeline import CanvasTimelineRenderer, RULER_HEIGHT, TRACK_HEIGHT, TRACK_GAP
+
+
+def write_test_wav(path, samples, sample_rate=44100):
+    """Записывает int16-сэмплы (frames × channels) в WAV-файл"""
+    sf.write(str(path), np.asarray(samples, dtype=np.int16), sample_rate, subtype='PCM_16')
+    return str(path)
 
 
 class TestAudioClip(unittest.TestCase):
@@ -480,6 +509,197 @@ class TestAudioExporter(unittest.TestCase):
         self.assertTrue(callable(callback))
 
 
+class TestStreamingExport(unittest.TestCase):
+    """Тесты потокового блочного экспорта"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.project = Project()
+        self.track = Track(volume=1.0)
+        self.project.add_track(self.track)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _add_clip(self, name, value, start_time, frames=4410):
+        path = write_test_wav(self.temp_path / name, np.full((frames, 2), value))
+        clip = AudioClip(path, start_time=start_time)
+        self.track.add_clip(clip)
+        return clip
+
+    def test_blocks_place_clip_exactly(self):
+        """Тест что клип попадает в нужные кадры независимо от границ блоков"""
+        self._add_clip("a.wav", 16384, start_time=10)
+        exporter = AudioExporter(self.project, block_frames=1000)
+        output = str(self.temp_path / "out.wav")
+
+        exporter.export_streaming(output, 'wav', normalize=False)
+
+        data, sr = sf.read(output, dtype='int16')
+        self.assertEqual(sr, 44100)
+        self.assertEqual(len(data), 441000)
+        self.assertTrue(np.all(data[:441] == 0))
+        self.assertTrue(np.all(data[441:441 + 4410] == 16384))
+        self.assertTrue(np.all(data[441 + 4410:] == 0))
+
+    def test_peak_prepass_normalization(self):
+        """Тест нормализации по пику, найденному предварительным проходом"""
+        self._add_clip("a.wav", 30000, start_time=0)
+        self._add_clip("b.wav", 30000, start_time=50)
+        exporter = AudioExporter(self.project, block_frames=4096)
+        output = str(self.temp_path / "out.flac")
+
+        self.assertAlmostEqual(exporter.measure_peak(), 60000 / 32768, places=4)
+        exporter.export_streaming(output, 'flac')
+
+        data, _ = sf.read(output, dtype='float32')
+        self.assertAlmostEqual(float(np.max(np.abs(data))), 1 / 1.05, places=3)
+
+    def test_export_streaming_flag(self):
+        """Тест выбора потокового режима через export()"""
+        self._add_clip("a.wav", 1000, start_time=0)
+        exporter = AudioExporter(self.project)
+        output = str(self.temp_path / "out.wav")
+
+        self.assertTrue(exporter.export(output, 'wav', streaming=True))
+        self.assertTrue(os.path.exists(output))
+        with self.assertRaises(ValueError):
+            exporter.export_streaming(output, 'mp3')
+
+
+class TestExporterClipReuse(unittest.TestCase):
+    """Тесты рендера из уже декодированных данных клипов"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.project = Project()
+        self.track = Track(volume=1.0)
+        self.project.add_track(self.track)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_render_uses_resident_clip_data(self):
+        """Тест что рендер не читает файлы, уже загруженные в клипы"""
+        path = write_test_wav(self.temp_path / "a.wav", np.full((4410, 2), 8192))
+        clip = AudioClip(path, start_time=1000)
+        self.assertIsNotNone(clip.samples)
+        self.track.add_clip(clip)
+        exporter = AudioExporter(self.project)
+
+        with patch('src.core.audio_cache.AudioSegment.from_file', side_effect=AssertionError), \
+                patch('soundfile.read', side_effect=AssertionError):
+            audio, sr = exporter.render_to_array()
+
+        self.assertEqual(audio.shape, (441000, 2))
+        np.testing.assert_allclose(audio[44100:44100 + 4410], 0.25)
+        self.assertEqual(float(np.abs(audio[:44100]).max()), 0.0)
+        self.assertEqual(exporter.timings['decode'], 0.0)
+
+    def test_render_loads_non_resident_clip(self):
+        """Тест что клип без данных в памяти читается с диска"""
+        path = str(self.temp_path / "late.wav")
+        clip = AudioClip(path)
+        self.assertIsNone(clip.samples)
+        write_test_wav(path, np.full((4410, 2), 8192))
+        self.track.add_clip(clip)
+        exporter = AudioExporter(self.project)
+
+        audio, _ = exporter.render_to_array()
+
+        np.testing.assert_allclose(audio[:4410], 0.25)
+        self.assertGreater(exporter.timings['decode'], 0.0)
+        self.assertEqual(exporter._borrowed, [])
+
+    def test_render_times_lazy_clip_load(self):
+        """Тест что загрузка ещё не прочитанного клипа учитывается в decode"""
+        cache = DecodedAudioCache()
+        path = write_test_wav(self.temp_path / "a.wav", np.full((4410, 2), 8192))
+        clip = AudioClip(path, cache=cache)
+        self.track.add_clip(clip)
+        exporter = AudioExporter(self.project)
+        decode = cache.decoders.decode
+
+        def slow_decode(*args):
+            time.sleep(0.05)
+            return decode(*args)
+
+        with patch.object(cache.decoders, 'decode', side_effect=slow_decode):
+            audio, _ = exporter.render_to_array()
+
+        np.testing.assert_allclose(audio[:4410], 0.25)
+        self.assertGreaterEqual(exporter.timings['decode'], 0.05)
+        self.assertTrue(clip.is_ready(44100))
+
+    def test_render_decodes_other_rate_clip_once(self):
+        """Тест что клип в другой частоте декодируется один раз, сразу в частоте проекта"""
+        cache = DecodedAudioCache()
+        path = write_test_wav(self.temp_path / "a.wav", np.full((4800, 2), 8192), 48000)
+        clip = AudioClip(path, cache=cache)
+        self.track.add_clip(clip)
+
+        AudioExporter(self.project).render_to_array()
+        clip.conform_to_rate(44100)
+        self.assertIsNotNone(clip.samples)
+
+        stats = cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['assets'], 1)
+
+    def test_export_records_timings(self):
+        """Тест разбивки времени экспорта"""
+        path = write_test_wav(self.temp_path / "a.wav", np.full((4410, 2), 100))
+        self.track.add_clip(AudioClip(path))
+        exporter = AudioExporter(self.project)
+        callback = Mock()
+
+        self.assertTrue(exporter.export(str(self.temp_path / "out.wav"), 'wav', callback))
+
+        self.assertEqual(set(exporter.timings), {'decode', 'mix', 'encode'})
+        self.assertGreater(exporter.timings['encode'], 0.0)
+        self.assertIn("encode", callback.call_args[0][1])
+
+
+class TestParallelExport(unittest.TestCase):
+    """Тесты параллельного рендера по временным срезам"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.project = Project()
+        rng = np.random.default_rng(3)
+        for t in range(6):
+            track = Track(volume=0.3 + 0.1 * t)
+            for c in range(3):
+                noise = rng.integers(-20000, 20000, size=(int(rng.integers(3000, 30000)), 2))
+                path = write_test_wav(self.temp_path / f"t{t}c{c}.wav", noise)
+                track.add_clip(AudioClip(path, start_time=float(rng.integers(0, 9000)), volume=0.9))
+            self.project.add_track(track)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_render_to_array_bit_identical(self):
+        """Тест что параллельный рендер совпадает с последовательным бит-в-бит"""
+        serial, _ = AudioExporter(self.project, block_frames=5000).render_to_array()
+        parallel, _ = AudioExporter(self.project, block_frames=3000, workers=4).render_to_array()
+
+        self.assertEqual(serial.tobytes(), parallel.tobytes())
+
+    def test_streaming_bit_identical(self):
+        """Тест что параллельный потоковый экспорт даёт тот же файл"""
+        outputs = []
+        for workers in (1, 3):
+            output = str(self.temp_path / f"out{workers}.wav")
+            AudioExporter(self.project, block_frames=4096, workers=workers).export_streaming(output, 'wav')
+            with open(output, 'rb') as f:
+                outputs.append(f.read())
+
+        self.assertEqual(outputs[0], outputs[1])
+
+
 class TestTrackClipInteractions(unittest.TestCase):
     """Интеграционные тесты взаимодействия Track и Clip"""
 
@@ -600,5 +820,1729 @@ class TestProjectTimeline(unittest.TestCase):
         self.assertEqual(len(active_at_5000), 3)  # все три дорожки активны
 
 
+class TestClipIntervalIndex(unittest.TestCase):
+    """Тесты интервального индекса клипов"""
+
+    def _clip(self, start, duration):
+        clip = AudioClip("dummy.wav", start_time=start)
+        clip.duration = duration
+        clip.end_time = start + duration
+        return clip
+
+    def test_queries_match_linear_scan(self):
+        """Тест что запросы индекса совпадают с линейным перебором"""
+        rng = np.random.default_rng(1)
+        clips = [self._clip(float(s), float(d))
+                 for s, d in zip(rng.integers(0, 100000, 500), rng.integers(1, 5000, 500))]
+        index = ClipIntervalIndex(clips)
+
+        for t in rng.integers(0, 105000, 200):
+            t = float(t)
+            expected = {id(c) for c in clips if c.start_time <= t < c.end_time}
+            self.assertEqual({id(c) for c in index.at(t)}, expected)
+
+            expected = {id(c) for c in clips if c.start_time < t + 700 and c.end_time > t}
+            self.assertEqual({id(c) for c in index.overlapping(t, t + 700)}, expected)
+
+            expected = {id(c) for c in clips if c.start_time >= t}
+            self.assertEqual({id(c) for c in index.starting_from(t)}, expected)
+
+    def test_track_index_follows_move_and_trim(self):
+        """Тест синхронизации индекса дорожки при перемещении и обрезании"""
+        track = Track()
+        clip = self._clip(0, 2000)
+        track.add_clip(clip)
+
+        track.move_clip(clip, 5000)
+        self.assertEqual(track.get_active_clips(1000), [])
+        self.assertEqual(track.get_active_clips(6000), [clip])
+
+        clip.original_duration = 2000
+        clip.trim_right(1500)
+        self.assertEqual(clip.end_time, 5500)
+        self.assertEqual(track.get_active_clips(5600, lookahead_ms=0), [])
+
+    def test_track_remove_and_reassign_clips(self):
+        """Тест удаления клипа и замены списка клипов"""
+        track = Track()
+        clip1 = self._clip(0, 1000)
+        clip2 = self._clip(500, 1000)
+        track.add_clip(clip1)
+        track.add_clip(clip2)
+
+        track.remove_clip(0)
+        self.assertEqual(track.get_active_clips(100, lookahead_ms=0), [])
+        self.assertIsNone(track.check_overlap(clip2))
+
+        track.clips = [clip1]
+        self.assertEqual(track.find_clips_after(0), [clip1])
+        self.assertEqual(track.get_active_clips(700, lookahead_ms=0), [clip1])
+
+    def test_track_index_concurrent_add_and_query(self):
+        """Тест что клипы из потоков импорта не ломают выборку потока воспроизведения"""
+        track = Track()
+        clips = [[self._clip(float(i * 4 + worker), 10.0) for i in range(300)] for worker in range(4)]
+        errors = []
+
+        def place(batch):
+            for clip in batch:
+                track.add_clip(clip)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            workers = [threading.Thread(target=place, args=(batch,)) for batch in clips]
+            for worker in workers:
+                worker.start()
+            while any(worker.is_alive() for worker in workers):
+                try:
+                    found = track.get_clips_in_range(0, 1200)
+                    self.assertEqual(found, sorted(found, key=lambda clip: clip.start_time))
+                except Exception as e:
+                    errors.append(e)
+            for worker in workers:
+                worker.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(track.get_clips_in_range(0, 1300)), 1200)
+
+
+class TestDecodedAudioCache(unittest.TestCase):
+    """Тесты общего кэша декодированного аудио"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.cache = DecodedAudioCache()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _wav(self, name, frames=4410):
+        return write_test_wav(self.temp_path / name, np.zeros((frames, 2)))
+
+    def test_same_file_decoded_once(self):
+        """Тест что клипы одного файла делят декодированные данные"""
+        path = self._wav("a.wav")
+        clips = [AudioClip(path, cache=self.cache) for _ in range(3)]
+        for clip in clips:
+            clip.samples
+
+        self.assertIs(clips[0].raw_data, clips[2].raw_data)
+        stats = self.cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['resident_bytes'], 4410 * 4)
+
+    def test_concurrent_acquires_decode_once(self):
+        """Тест что одновременные запросы одного файла ждут первое декодирование"""
+        path = self._wav("a.wav")
+        decode = self.cache.decoders.decode
+        started = threading.Event()
+        calls = []
+
+        def slow_decode(*args):
+            calls.append(args)
+            started.set()
+            time.sleep(0.1)
+            return decode(*args)
+
+        assets = []
+        with patch.object(self.cache.decoders, 'decode', side_effect=slow_decode):
+            first = threading.Thread(target=lambda: assets.append(self.cache.acquire(path)))
+            first.start()
+            started.wait(5)
+            others = [threading.Thread(target=lambda: assets.append(self.cache.acquire(path))) for _ in range(7)]
+            for thread in others:
+                thread.start()
+            for thread in [first] + others:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(assets), 8)
+        self.assertTrue(all(asset is assets[0] for asset in assets))
+        self.assertEqual(assets[0].refcount, 8)
+        self.assertEqual((self.cache.stats()['misses'], self.cache.stats()['hits']), (1, 7))
+
+    def test_concurrent_acquire_shares_decode_error(self):
+        """Тест что ошибка декодирования получают все ожидающие, а следующий запрос декодирует снова"""
+        path = self._wav("a.wav")
+        started = threading.Event()
+
+        def failing_decode(*args):
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("broken")
+
+        errors = []
+
+        def acquire():
+            try:
+                self.cache.acquire(path)
+            except ValueError as e:
+                errors.append(e)
+
+        with patch.object(self.cache.decoders, 'decode', side_effect=failing_decode):
+            threads = [threading.Thread(target=acquire)]
+            threads[0].start()
+            started.wait(5)
+            threads.append(threading.Thread(target=acquire))
+            threads[1].start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(self.cache.acquire(path).refcount, 1)
+
+    def test_lru_eviction_skips_referenced_assets(self):
+        """Тест что вытесняются только записи без ссылок"""
+        self.cache.set_memory_budget(4410 * 4)
+        clip_a = AudioClip(self._wav("a.wav"), cache=self.cache)
+        clip_b = AudioClip(self._wav("b.wav"), cache=self.cache)
+        clip_a.samples, clip_b.samples
+
+        self.assertEqual(self.cache.stats()['assets'], 2)
+
+        clip_a.close()
+        stats = self.cache.stats()
+        self.assertEqual(stats['assets'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['resident_bytes'], 4410 * 4)
+        self.assertIsNotNone(clip_b.audio)
+
+    def test_modified_file_gets_new_entry(self):
+        """Тест что изменённый файл декодируется заново"""
+        path = self._wav("a.wav")
+        AudioClip(path, cache=self.cache).samples
+        write_test_wav(path, np.zeros((8820, 2)))
+        os.utime(path, ns=(0, 12345))
+
+        clip = AudioClip(path, cache=self.cache)
+        clip.samples
+
+        self.assertEqual(clip.duration, 200)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+
+class TestPcmDiskStore(unittest.TestCase):
+    """Тесты клипов, отображённых в память из дискового хранилища PCM"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.store = PcmDiskStore(str(self.temp_path / "pcm"))
+        ramp = np.arange(44100 * 2, dtype=np.int16).reshape(-1, 2) % 2000
+        self.path = write_test_wav(self.temp_path / "ramp.wav", ramp)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_clip_backed_by_memmap(self):
+        """Тест что клип работает поверх memmap без копирования фрагментов"""
+        cache = DecodedAudioCache(pcm_store=self.store)
+        clip = AudioClip(self.path, cache=cache)
+
+        self.assertIsInstance(clip.samples, np.memmap)
+        chunk = clip.get_audio_chunk(100, 50)
+        self.assertIsInstance(chunk, memoryview)
+        self.assertTrue(np.shares_memory(np.frombuffer(chunk, dtype=np.int16), clip.samples))
+        self.assertEqual(cache.stats()['resident_bytes'], 0)
+        self.assertEqual(cache.stats()['mapped_bytes'], 44100 * 4)
+
+    def test_mixer_output_matches_in_memory_clip(self):
+        """Тест что микшер даёт одинаковый результат для memmap и памяти"""
+        mapped = AudioClip(self.path, cache=DecodedAudioCache(pcm_store=self.store))
+        in_memory = AudioClip(self.path, cache=DecodedAudioCache())
+        outputs = []
+        for clip in (mapped, in_memory):
+            track = Track(volume=0.7)
+            track.add_clip(clip)
+            outputs.append(AudioMixer().mix([track], 200, 50))
+
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_transcoded_once(self):
+        """Тест что повторное открытие берёт PCM с диска без декодирования"""
+        AudioClip(self.path, cache=DecodedAudioCache(pcm_store=self.store))
+
+        with patch('src.core.audio_cache.AudioSegment.from_file', side_effect=AssertionError):
+            clip = AudioClip(self.path, cache=DecodedAudioCache(pcm_store=self.store))
+
+        self.assertEqual(clip.duration, 1000)
+        self.assertIsInstance(clip.samples, np.memmap)
+
+
+class TestAudioMixer(unittest.TestCase):
+    """Тесты для float32-микшера"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _make_clip(self, name, value, frames=44100, channels=2):
+        path = write_test_wav(self.temp_path / name, np.full((frames, channels), value))
+        return AudioClip(path, start_time=0, name=name)
+
+    def _make_track(self, *clips, volume=1.0):
+        track = Track(volume=volume)
+        for clip in clips:
+            track.add_clip(clip)
+        return track
+
+    def test_mix_no_intermediate_clipping(self):
+        """Тест что клиппинг применяется один раз на выходе"""
+        tracks = [
+            self._make_track(self._make_clip("a.wav", 30000)),
+            self._make_track(self._make_clip("b.wav", 30000)),
+            self._make_track(self._make_clip("c.wav", -30000)),
+        ]
+        mixer = AudioMixer(44100, 2)
+
+        out = mixer.mix_into(tracks, 0, 50)
+
+        self.assertEqual(out.shape, (2205, 2))
+        self.assertTrue(np.all(out == 30000))
+
+    def test_mix_applies_clip_and_track_gain(self):
+        """Тест применения громкости клипа и дорожки"""
+        clip = self._make_clip("a.wav", 10000)
+        clip.volume = 0.5
+        mixer = AudioMixer(44100, 2)
+
+        out = mixer.mix_into([self._make_track(clip, volume=0.5)], 0, 50)
+
+        self.assertTrue(np.all(out == 2500))
+
+    def test_mix_mono_clip_to_stereo_bus(self):
+        """Тест что моно-клип попадает в оба канала"""
+        clip = self._make_clip("mono.wav", 1000, channels=1)
+        mixer = AudioMixer(44100, 2)
+
+        out = mixer.mix_into([self._make_track(clip)], 0, 50)
+
+        self.assertTrue(np.all(out == 1000))
+
+    def test_mix_muted_and_empty_is_silence(self):
+        """Тест что заглушенные дорожки дают тишину нужной длины"""
+        track = self._make_track(self._make_clip("a.wav", 1000))
+        track.muted = True
+        project = Project()
+        project.add_track(track)
+
+        data = project._mix_audio_chunk(0, 50)
+
+        self.assertEqual(len(data), 2205 * 2 * 2)
+        self.assertEqual(data, b'\x00' * len(data))
+
+
+class TestPlaybackPipeline(unittest.TestCase):
+    """Тесты кольцевого буфера и конвейера воспроизведения"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_ring_buffer_wraparound(self):
+        """Тест записи и чтения через границу кольцевого буфера"""
+        ring = PcmRingBuffer(8, channels=2)
+        out = np.zeros((8, 2), dtype=np.int16)
+
+        self.assertEqual(ring.write(np.full((6, 2), 1, dtype=np.int16)), 6)
+        self.assertEqual(ring.read_into(out[:5]), 5)
+        self.assertEqual(ring.write(np.arange(14, dtype=np.int16).reshape(7, 2)), 7)
+        self.assertEqual(ring.free(), 0)
+
+        self.assertEqual(ring.read_into(out), 8)
+        self.assertTrue(np.all(out[0] == 1))
+        np.testing.assert_array_equal(out[1:], np.arange(14).reshape(7, 2))
+
+    def test_ring_buffer_discard(self):
+        """Тест что читатель пропускает отброшенные кадры"""
+        ring = PcmRingBuffer(16, channels=1)
+        ring.write(np.full((10, 1), 1, dtype=np.int16))
+        ring.discard()
+        ring.write(np.full((3, 1), 2, dtype=np.int16))
+
+        self.assertEqual(ring.available(), 3)
+        out = np.zeros((16, 1), dtype=np.int16)
+        self.assertEqual(ring.read_into(out), 3)
+        self.assertTrue(np.all(out[:3] == 2))
+
+    def test_render_thread_fills_lookahead(self):
+        """Тест что поток рендеринга заполняет буфер до открытия потока вывода"""
+        path = write_test_wav(self.temp_path / "a.wav", np.full((44100, 2), 1000))
+        project = Project()
+        track = Track(volume=1.0)
+        clip = AudioClip(path)
+        track.add_clip(clip)
+        project.add_track(track)
+        project.lookahead_ms = 100
+        self.assertIsNotNone(clip.samples)
+
+        opened = {}
+
+        def fake_open(**kwargs):
+            opened.update(kwargs)
+            return Mock()
+
+        project.py_audio.open = Mock(side_effect=fake_open)
+        project.toggle_play()
+        try:
+            deadline = time.time() + 5
+            while 'stream_callback' not in opened and time.time() < deadline:
+                time.sleep(0.01)
+
+            self.assertGreaterEqual(project.get_playback_stats()['buffered_ms'], 100)
+            data, flag = opened['stream_callback'](None, 1024, {}, 0)
+            samples = np.frombuffer(data, dtype=np.int16)
+            self.assertEqual(len(samples), 2048)
+            self.assertTrue(np.all(samples == 1000))
+            self.assertEqual(project.underrun_count, 0)
+        finally:
+            project.cleanup()
+
+    def test_underrun_counted_when_buffer_empty(self):
+        """Тест подсчёта выпадений при пустом буфере"""
+        project = Project()
+        project._ring = PcmRingBuffer(1024, channels=2)
+
+        data, _ = project._audio_callback(None, 256, {}, 0)
+
+        self.assertEqual(data, b'\x00' * 256 * 4)
+        self.assertEqual(project.get_playback_stats()['underruns'], 1)
+
+    def test_playback_mixer_loads_clips_in_background(self):
+        """Тест что микшер воспроизведения не декодирует клип сам, а звучит после фоновой загрузки"""
+        path = write_test_wav(self.temp_path / "a.wav", np.full((48000, 2), 1000), sample_rate=48000)
+        clip = AudioClip(path, cache=DecodedAudioCache())
+        track = Track(volume=1.0)
+        track.add_clip(clip)
+        mixer = AudioMixer(44100, 2, inline_loading=False)
+
+        self.assertFalse(np.any(mixer.mix_into([track], 500, 50)))
+        clip._preload_future.result(5)
+
+        self.assertTrue(clip.is_ready(44100))
+        out = mixer.mix_into([track], 500, 50)
+        self.assertTrue(np.all(np.abs(out.astype(np.int32) - 1000) <= 1))
+
+    def test_preloads_share_bounded_pool_and_cancel_on_remove(self):
+        """Тест что загрузки идут через общий пул, а загрузка удалённого клипа отменяется"""
+        paths = [write_test_wav(self.temp_path / f"{name}.wav", np.full((4410, 2), 1000)) for name in "abc"]
+        cache = DecodedAudioCache()
+        track = Track()
+        for path in paths:
+            track.add_clip(AudioClip(path, cache=cache))
+        pool = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+
+        with patch('src.core.models._preload_executor', return_value=pool):
+            pool.submit(release.wait, 5)
+            for clip in track.clips:
+                clip.preload()
+            removed = track.remove_clip(2)
+            release.set()
+            for clip in track.clips:
+                clip._preload_future.result(5)
+        pool.shutdown()
+
+        self.assertTrue(removed._preload_future.cancelled())
+        self.assertFalse(removed.is_loaded)
+        self.assertTrue(all(clip.is_loaded for clip in track.clips))
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_project_preloads_added_clips(self):
+        """Тест что проект запускает загрузку клипов при добавлении"""
+        path = write_test_wav(self.temp_path / "a.wav", np.full((4410, 2), 1000))
+        project = Project()
+        project.add_track(Track())
+
+        clip = project.add_audio_clip(0, path)
+        clip._preload_future.result(5)
+
+        self.assertTrue(clip.is_ready(project.sample_rate))
+        project.cleanup()
+
+
+class TestLatencyProfiles(unittest.TestCase):
+    """Тесты профилей задержки и адаптивного буфера воспроизведения"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_profile_configures_stream_and_ring(self):
+        """Тест что профиль задаёт блок, frames_per_buffer потока и lookahead"""
+        path = write_test_wav(self.temp_path / "a.wav", np.full((44100, 2), 1000))
+        project = Project(engine="frames", latency_profile="low")
+        track = Track(volume=1.0)
+        track.add_clip(AudioClip(path))
+        project.add_track(track)
+
+        opened = {}
+
+        def fake_open(**kwargs):
+            opened.update(kwargs)
+            return Mock()
+
+        project.py_audio.open = Mock(side_effect=fake_open)
+        project.toggle_play()
+        try:
+            deadline = time.time() + 5
+            while 'stream_callback' not in opened and time.time() < deadline:
+                time.sleep(0.01)
+
+            self.assertEqual(opened['frames_per_buffer'], 256)
+            self.assertEqual(project._ring.capacity, 1764 + 2 * 441)
+            stats = project.get_playback_stats()
+            self.assertEqual((stats['latency_profile'], stats['block_ms'], stats['lookahead_ms']), ("low", 10, 40))
+            self.assertGreaterEqual(stats['buffered_ms'], 40)
+            self.assertLess(stats['buffered_ms'], 40 + 2 * 10)
+        finally:
+            project.cleanup()
+
+    def test_unknown_profile(self):
+        """Тест что неизвестный профиль задержки отклоняется"""
+        with self.assertRaises(ValueError):
+            Project(latency_profile="ultra")
+        project = Project()
+        with self.assertRaises(ValueError):
+            project.set_latency_profile("ultra")
+        self.assertEqual(project.latency_profile, "normal")
+
+    def test_adaptive_lookahead_grows_after_underruns(self):
+        """Тест что адаптивный режим увеличивает буфер после серии выпадений"""
+        project = Project(latency_profile="low", adaptive_latency=True)
+        project.underrun_count = 2
+        self.assertEqual(project._adapt_latency(0), 0)
+        self.assertEqual(project.lookahead_ms, 40)
+
+        project.underrun_count = 3
+        self.assertEqual(project._adapt_latency(0), 3)
+        self.assertEqual(project.lookahead_ms, 60)
+
+        project.underrun_count = 100
+        for _ in range(20):
+            project._adapt_latency(0)
+        self.assertEqual(project.lookahead_ms, Project.ADAPTIVE_MAX_LOOKAHEAD_MS)
+
+        fixed = Project(latency_profile="low")
+        fixed.underrun_count = 10
+        fixed._adapt_latency(0)
+        self.assertEqual(fixed.lookahead_ms, 40)
+
+    def test_reports_effective_output_latency(self):
+        """Тест что фактическая задержка складывается из lookahead и задержки устройства"""
+        project = Project(latency_profile="safe")
+        self.assertAlmostEqual(project.get_output_latency_ms(), 500 + 4096 * 1000 / 44100)
+
+        project.stream = Mock()
+        project.stream.get_output_latency.return_value = 0.0925
+        self.assertAlmostEqual(project.get_playback_stats()['output_latency_ms'], 592.5)
+        project.stream = None
+
+
+class TestResampler(unittest.TestCase):
+    """Тесты полифазного ресемплера"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def tone(freq, rate, seconds=0.5, amplitude=0.5):
+        t = np.arange(int(rate * seconds)) / rate
+        return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+    @staticmethod
+    def level_db(signal, reference):
+        edge = len(signal) // 10
+        signal = signal[edge:-edge]
+        return 20 * np.log10(np.sqrt(np.mean(signal ** 2)) / np.sqrt(np.mean(reference ** 2)))
+
+    def test_aliasing_rejection_better_than_interp(self):
+        """Тест подавления наложения при 48k→44.1k по сравнению с np.interp"""
+        source = self.tone(23500, 48000)
+        polyphase = resample(source, 48000, 44100)
+
+        positions = np.arange(len(source) * 44100 // 48000) * 48000 / 44100
+        linear = np.interp(positions, np.arange(len(source)), source)
+
+        polyphase_db = self.level_db(polyphase, source)
+        linear_db = self.level_db(linear, source)
+        self.assertLess(polyphase_db, -60)
+        self.assertLess(polyphase_db, linear_db - 20)
+
+    def test_passband_and_length(self):
+        """Тест длины результата и сохранения уровня в полосе пропускания"""
+        source = self.tone(1000, 48000)
+        result = resample(source, 48000, 44100)
+
+        self.assertEqual(len(result), len(source) * 44100 // 48000)
+        self.assertAlmostEqual(self.level_db(result, source), 0, delta=0.1)
+
+    def test_int16_stereo(self):
+        """Тест что int16-стерео остаётся int16 с тем же числом каналов"""
+        source = (np.stack([self.tone(440, 22050), self.tone(880, 22050)], axis=1) * 32767).astype(np.int16)
+        result = resample(source, 22050, 44100)
+
+        self.assertEqual(result.dtype, np.int16)
+        self.assertEqual(result.shape, (len(source) * 2, 2))
+
+    def test_blocks_match_single_pass(self):
+        """Тест что разбиение входа на блоки не меняет результат на стыках"""
+        source = np.stack([self.tone(440, 48000), self.tone(6000, 48000)], axis=1)
+        for src_rate, dst_rate in [(48000, 44100), (44100, 48000), (22050, 44100)]:
+            whole = resample(source, src_rate, dst_rate)
+            with patch('src.core.resampler.BLOCK_FRAMES', 1000):
+                blocked = resample(source, src_rate, dst_rate)
+
+            np.testing.assert_allclose(blocked, whole, atol=1e-5)
+
+    def test_clip_conformed_to_project_rate(self):
+        """Тест что клип с другой частотой приводится к частоте проекта"""
+        cache = DecodedAudioCache()
+        path = write_test_wav(self.temp_path / "a.wav", np.full((48000, 2), 1000), sample_rate=48000)
+        clip = AudioClip(path, cache=cache)
+        self.assertEqual(clip.frame_rate, 48000)
+
+        track = Track(volume=1.0)
+        track.add_clip(clip)
+        project = Project(sample_rate=44100)
+        project.add_track(track)
+
+        self.assertEqual(clip.frame_rate, 44100)
+        self.assertEqual(len(clip.samples), 44100)
+        self.assertEqual(cache.stats()['referenced_assets'], 1)
+
+        chunk = np.frombuffer(project.mixer.mix(project.tracks, 500, 100), dtype=np.int16)
+        self.assertEqual(len(chunk), 4410 * 2)
+        self.assertTrue(np.all(np.abs(chunk.astype(np.int32) - 1000) <= 1))
+        project.cleanup()
+
+
+class TestWaveformPeaks(unittest.TestCase):
+    """Тесты пирамиды пиков волновой формы"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        rng = np.random.default_rng(0)
+        self.samples = (rng.standard_normal((44100 * 3, 2)) * 4000).astype(np.int16)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_levels_halve_down_to_one_bucket(self):
+        """Тест что каждый уровень вдвое грубее предыдущего"""
+        peaks = WaveformPeaks.from_samples(self.samples, 44100)
+
+        self.assertEqual(len(peaks.levels[0]), -(-len(self.samples) // peaks.base_frames))
+        self.assertEqual(len(peaks.levels[-1]), 1)
+        self.assertEqual(peaks.levels[-1][0, 0], self.samples.min())
+        self.assertEqual(peaks.levels[-1][0, 1], self.samples.max())
+
+    def test_columns_match_brute_force(self):
+        """Тест что столбцы совпадают с min/max по сэмплам и их число равно ширине"""
+        peaks = WaveformPeaks.from_samples(self.samples, 44100, base_frames=441)
+        columns = peaks.columns(0, 3000, 300)
+        expected = self.samples.reshape(300, -1)
+
+        self.assertEqual(columns.shape, (300, 3))
+        np.testing.assert_array_equal(columns[:, 0] * 32768, expected.min(axis=1))
+        np.testing.assert_array_equal(columns[:, 1] * 32768, expected.max(axis=1))
+
+    def test_level_follows_zoom(self):
+        """Тест выбора уровня по числу кадров на пиксель"""
+        peaks = WaveformPeaks.from_samples(self.samples, 44100)
+
+        self.assertEqual(peaks.level_for(44100 / 500), 0)
+        self.assertEqual(peaks.level_for(44100 / 50), 1)
+        self.assertEqual(peaks.level_for(44100 / 10), 4)
+
+    def test_sidecar_reused_without_decoding(self):
+        """Тест что при повторном открытии пики читаются с диска без декодирования"""
+        path = write_test_wav(self.temp_path / "a.wav", self.samples)
+        peaks_dir = str(self.temp_path / "peaks")
+        first = WaveformPeakStore(peaks_dir).get(path)
+
+        with patch('src.core.waveform.default_audio_cache.acquire', side_effect=AssertionError), \
+                patch.object(default_decoders, 'decode_blocks', side_effect=AssertionError):
+            second = WaveformPeakStore(peaks_dir).get(path)
+            waveform = AudioWaveform(path, width=200, height=30, store=WaveformPeakStore(peaks_dir)).build()
+
+        self.assertEqual(len(os.listdir(peaks_dir)), 1)
+        self.assertEqual(second.frame_count, first.frame_count)
+        for a, b in zip(first.levels, second.levels):
+            np.testing.assert_array_equal(a, b)
+        self.assertEqual(waveform.content.width, 200)
+
+    def test_file_peaks_streamed_past_cache(self):
+        """Тест что пики файла считаются блоками и не оставляют его декодированным в кэше"""
+        path = write_test_wav(self.temp_path / "a.wav", self.samples)
+        resident = default_audio_cache.resident_bytes()
+
+        with patch('src.core.waveform.BLOCK_BUCKETS', 16):
+            peaks = WaveformPeakStore(str(self.temp_path / "peaks")).get(path)
+
+        expected = WaveformPeaks.from_samples(self.samples, 44100)
+        self.assertEqual(default_audio_cache.resident_bytes(), resident)
+        self.assertEqual(peaks.frame_count, len(self.samples))
+        for a, b in zip(peaks.levels, expected.levels):
+            np.testing.assert_array_equal(a, b)
+
+
+class TestClipViewRegistry(unittest.TestCase):
+    """Тесты реестра визуальных элементов клипов"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.peak_store = WaveformPeakStore(os.path.join(self.temp_dir.name, "peaks"))
+        self.peaks_patch = patch('src.core.waveform.default_peak_store', self.peak_store)
+        self.peaks_patch.start()
+        path = write_test_wav(Path(self.temp_dir.name) / "a.wav", np.zeros((4410, 2)))
+        self.peak_store.get(path)
+        editor = Mock()
+        editor.project.duration = 60000
+        self.time_ruler = TimeRuler(editor, SizeManager(None))
+        self.track = Track()
+        for i in range(4):
+            self.track.add_clip(AudioClip(path, start_time=i * 1000))
+        self.stack = ft.Stack([])
+        self.registry = ClipViewRegistry(self.time_ruler)
+        self.registry.sync(self.track, self.stack)
+        self.registry.reset_counters()
+
+    def tearDown(self):
+        self.peaks_patch.stop()
+        self.temp_dir.cleanup()
+
+    def test_sync_without_changes_keeps_controls(self):
+        """Тест что повторная синхронизация ничего не пересоздаёт"""
+        controls = list(self.stack.controls)
+        self.registry.sync(self.track, self.stack)
+
+        self.assertEqual(len(self.stack.controls), 4)
+        self.assertTrue(all(a is b for a, b in zip(controls, self.stack.controls)))
+        self.assertEqual((self.registry.created, self.registry.relaid, self.registry.removed), (0, 0, 0))
+
+    def test_moved_clip_relaid_only(self):
+        """Тест что после перемещения пересчитывается только изменённый клип"""
+        clip = self.track.clips[1]
+        self.track.move_clip(clip, 5000)
+        self.registry.sync(self.track, self.stack)
+
+        self.assertEqual((self.registry.created, self.registry.relaid), (0, 1))
+        self.assertEqual(self.registry.view_for(clip).spacer_left.width, self.time_ruler.time_to_pixels(5000))
+
+    def test_zoom_relayouts_without_rebuild(self):
+        """Тест что изменение масштаба только пересчитывает геометрию"""
+        self.time_ruler.pixels_per_second = 200
+        self.registry.sync(self.track, self.stack)
+
+        self.assertEqual((self.registry.created, self.registry.relaid), (0, 4))
+        clip = self.track.clips[3]
+        self.assertEqual(self.registry.view_for(clip).spacer_left.width, 600)
+
+    def test_removed_and_added_clips(self):
+        """Тест что удалённый клип убирается из Stack, а его элемент достаётся новому"""
+        removed = self.track.clips[0]
+        self.track.remove_clip(0)
+        self.track.add_clip(AudioClip(removed.file_path, start_time=9000))
+        self.registry.sync(self.track, self.stack)
+
+        self.assertEqual((self.registry.created, self.registry.recycled, self.registry.removed), (0, 1, 1))
+        self.assertEqual(len(self.stack.controls), 4)
+        self.assertIsNone(self.registry.view_for(removed))
+
+    def _path_elements(self, view):
+        canvas = view.waveform_holder.content.content
+        return sum(len(shape.elements) for shape in canvas.shapes)
+
+    def test_waveform_built_for_window_only(self):
+        """Тест что контур длинного клипа строится только для окна дорожки и не длиннее предела"""
+        path = write_test_wav(Path(self.temp_dir.name) / "long.wav", np.zeros((600000, 1)), sample_rate=1000)
+        self.peak_store.get(path)
+        clip = AudioClip(path)
+
+        windowed = DraggableClip(clip, self.track, self.time_ruler, window_ms=(0, 30000))
+        whole = DraggableClip(clip, self.track, self.time_ruler)
+
+        self.assertEqual(self.time_ruler.time_to_pixels(clip.duration), 60000)
+        self.assertLessEqual(self._path_elements(windowed), 2 * (2 * 3000 + 2))
+        self.assertLessEqual(self._path_elements(whole), 2 * (2 * MAX_WAVEFORM_COLUMNS + 2))
+
+    def test_trim_drag_shifts_waveform_without_rebuild(self):
+        """Тест что во время обрезания контур сдвигается, а перестраивается после отпускания"""
+        path = write_test_wav(Path(self.temp_dir.name) / "b.wav", np.zeros((44100, 2)))
+        self.peak_store.get(path)
+        clip = AudioClip(path, start_time=20000)
+        self.track.add_clip(clip)
+        self.registry.sync(self.track, self.stack)
+        view = self.registry.view_for(clip)
+        content = view.clip_container.content
+        handle = view.left_border
+
+        handle._on_pan_start(Mock())
+        handle._on_pan_update(Mock(delta_x=10))
+        self.registry.sync(self.track, self.stack)
+
+        self.assertIs(view.clip_container.content, content)
+        self.assertEqual(view.waveform_holder.left, -10)
+        handle._on_pan_end(Mock())
+        self.assertIsNot(view.clip_container.content, content)
+        self.assertEqual(view.waveform_holder.left, 0)
+
+
+class TestTimelineViewport(unittest.TestCase):
+    """Тесты виртуализации таймлайна по окну видимости"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.peak_store = WaveformPeakStore(os.path.join(self.temp_dir.name, "peaks"))
+        self.peaks_patch = patch('src.core.waveform.default_peak_store', self.peak_store)
+        self.peaks_patch.start()
+        path = write_test_wav(Path(self.temp_dir.name) / "a.wav", np.zeros((4410, 2)))
+        self.peak_store.get(path)
+        editor = Mock()
+        editor.project.duration = 600000
+        self.time_ruler = TimeRuler(editor, SizeManager(None))
+        self.track = Track()
+        for i in range(300):
+            self.track.add_clip(AudioClip(path, start_time=i * 2000))
+        self.viewport = TimelineViewport(self.time_ruler, width_px=1000)
+        self.registry = ClipViewRegistry(self.time_ruler)
+        self.stack = ft.Stack([])
+
+    def tearDown(self):
+        self.peaks_patch.stop()
+        self.temp_dir.cleanup()
+
+    def test_window_includes_margin(self):
+        """Тест окна материализации: видимая область плюс запас с каждой стороны"""
+        self.viewport.scroll_to(5000)
+        self.assertEqual(self.viewport.refresh(), (40000, 70000))
+
+    def test_small_scroll_does_not_resync(self):
+        """Тест что прокрутка внутри окна не требует синхронизации"""
+        self.viewport.refresh()
+        self.assertFalse(self.viewport.scroll_to(300))
+        self.assertTrue(self.viewport.scroll_to(1000))
+
+    def test_materialized_clips_bounded(self):
+        """Тест что число элементов не зависит от длины проекта"""
+        self.registry.sync(self.track, self.stack, self.viewport.refresh())
+
+        self.assertEqual(len(self.stack.controls), 10)
+        self.assertEqual(self.registry.materialized(), 10)
+
+    def test_scroll_recycles_views(self):
+        """Тест что при прокрутке элементы переиспользуются для новых клипов"""
+        self.registry.sync(self.track, self.stack, self.viewport.refresh())
+        self.registry.reset_counters()
+
+        self.viewport.scroll_to(30000)
+        self.registry.sync(self.track, self.stack, self.viewport.refresh())
+
+        self.assertEqual(len(self.stack.controls), 15)
+        self.assertEqual((self.registry.recycled, self.registry.created), (10, 5))
+        clip = self.track.clips[150]
+        self.assertEqual(self.registry.view_for(clip).spacer_left.width, self.time_ruler.time_to_pixels(clip.start_time))
+
+
+class TestCanvasTimeline(unittest.TestCase):
+    """Тесты canvas-отрисовки таймлайна"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.peak_store = WaveformPeakStore(os.path.join(self.temp_dir.name, "peaks"))
+        self.peaks_patch = patch('src.core.waveform.default_peak_store', self.peak_store)
+        self.peaks_patch.start()
+        self.path = write_test_wav(Path(self.temp_dir.name) / "a.wav", np.full((44100, 2), 1000))
+        self.peak_store.get(self.path)
+
+    def tearDown(self):
+        self.peaks_patch.stop()
+        self.temp_dir.cleanup()
+
+    def make_renderer(self, num_clips):
+        editor = Mock()
+        editor.project = Project()
+        track = Track()
+        for i in range(num_clips):
+            track.add_clip(AudioClip(self.path, start_time=i * 2000, name=f"c{i}"))
+        editor.project.add_track(track)
+        time_ruler = TimeRuler(editor, SizeManager(None))
+        time_ruler.calculate_ruler_width()
+        return CanvasTimelineRenderer(editor, time_ruler, TimelineViewport(time_ruler, width_px=1000))
+
+    def test_shape_count_independent_of_length(self):
+        """Тест что число фигур не растёт с длиной проекта"""
+        short = self.make_renderer(20).render()
+        long = self.make_renderer(2000).render()
+
+        self.assertEqual(len(short.shapes), len(long.shapes))
+        self.assertLess(len(long.shapes), 60)
+
+    def test_clip_hit_test_and_drag(self):
+        """Тест поиска клипа под указателем и его перетаскивания"""
+        renderer = self.make_renderer(3)
+        renderer.render()
+        track = renderer.editor.project.tracks[0]
+        y = RULER_HEIGHT + TRACK_HEIGHT / 2
+
+        self.assertIs(renderer.clip_at(250, y)[1], track.clips[1])
+        self.assertEqual(renderer.clip_at(150, y), (None, None))
+        self.assertEqual(renderer.clip_at(250, RULER_HEIGHT + TRACK_HEIGHT + TRACK_GAP / 2), (None, None))
+
+        renderer._on_pan_start(Mock(local_x=250, local_y=y))
+        renderer._on_pan_update(Mock(local_x=550, local_y=y))
+        renderer._on_pan_end(Mock())
+        self.assertEqual(track.clips[1].start_time, 5000)
+
+    def test_playhead_moves_without_rerender(self):
+        """Тест что курсор сдвигается без перестроения остальных фигур"""
+        renderer = self.make_renderer(3)
+        canvas = renderer.render()
+        shapes = list(canvas.shapes)
+
+        renderer.set_playhead(1500)
+
+        self.assertEqual(renderer.playhead.x1, 150)
+        self.assertTrue(all(a is b for a, b in zip(shapes, canvas.shapes)))
+
+    def test_unknown_render_mode(self):
+        """Тест ошибки при неизвестном режиме отрисовки"""
+        with self.assertRaises(ValueError):
+            TrackManager(Mock(), None, render_mode="svg")
+
+
+class TestUiUpdateScheduler(unittest.TestCase):
+    """Тесты планировщика обновлений страницы"""
+
+    def test_stale_updates_dropped(self):
+        """Тест что из серии изменений с одним ключом применяется только последнее"""
+        page = Mock()
+        scheduler = UiUpdateScheduler(page, fps=30)
+        applied = []
+        scheduler._ensure_thread = Mock()
+
+        for i in range(100):
+            scheduler.submit("position", lambda i=i: applied.append(i))
+        scheduler.submit("transport", lambda: applied.append("t"))
+
+        self.assertTrue(scheduler.flush())
+        self.assertEqual(applied, [99, "t"])
+        self.assertEqual(page.update.call_count, 1)
+        self.assertEqual(scheduler.dropped, 99)
+        self.assertFalse(scheduler.flush())
+
+    def test_update_rate_limited(self):
+        """Тест что page.update() вызывается не чаще fps раз в секунду"""
+        page = Mock()
+        scheduler = UiUpdateScheduler(page, fps=20)
+        try:
+            deadline = time.monotonic() + 0.5
+            while time.monotonic() < deadline:
+                scheduler.submit("position", lambda: None)
+                time.sleep(0.001)
+        finally:
+            scheduler.stop()
+
+        self.assertLessEqual(page.update.call_count, 13)
+        self.assertGreaterEqual(page.update.call_count, 5)
+        self.assertLessEqual(scheduler.stats()['updates_per_second'], 21)
+
+    def test_frame_hooks_run_with_frames(self):
+        """Тест что хук кадра вызывается только в отправленном кадре"""
+        scheduler = UiUpdateScheduler(Mock())
+        scheduler._ensure_thread = Mock()
+        hook = Mock()
+        scheduler.add_frame_hook("transport", hook)
+
+        scheduler.flush()
+        hook.assert_not_called()
+        scheduler.submit("position", lambda: None)
+        scheduler.flush()
+        hook.assert_called_once()
+
+    def test_track_manager_position_coalesced(self):
+        """Тест что позиция воспроизведения применяется к слайдерам в кадре планировщика"""
+        page = MagicMock()
+        page.width = 1200
+        manager = TrackManager(AudioEditorController(), page)
+        manager.ui_scheduler._ensure_thread = Mock()
+        page.update.reset_mock()
+
+        for progress in (0.1, 0.2, 0.5):
+            manager._on_playback_position_changed(progress)
+        page.update.assert_not_called()
+
+        manager.ui_scheduler.flush()
+        self.assertEqual(page.update.call_count, 1)
+        expected = 0.5 * manager.time_ruler.ruler_width
+        self.assertTrue(all(s.progress_container.width == expected for s in manager.sync_sliders))
+
+
+class TestPlayheadOverlay(unittest.TestCase):
+    """Тесты общего курсора воспроизведения поверх дорожек"""
+
+    def _manager(self, tracks=6):
+        page = MagicMock()
+        page.width = 1200
+        editor = AudioEditorController()
+        editor.project.duration = 60000
+        manager = TrackManager(editor, page, playhead_mode="overlay")
+        while len(editor.project.tracks) < tracks:
+            manager.add_track()
+        manager.ui_scheduler._ensure_thread = Mock()
+        return editor, page, manager
+
+    def test_single_control_per_frame(self):
+        """Тест что кадр воспроизведения меняет только левую координату курсора"""
+        editor, page, manager = self._manager()
+        self.assertEqual(manager.sync_sliders, [])
+        self.assertIsInstance(manager.playhead_overlay, PlayheadOverlay)
+
+        editor.project.current_time = 30000
+        manager._on_playback_position_changed(0.5)
+        page.update.reset_mock()
+        manager.ui_scheduler.flush()
+
+        self.assertEqual(page.update.call_count, 1)
+        line = manager.playhead_overlay.line
+        self.assertAlmostEqual(line.left, TrackManager.TRACK_CONTENT_LEFT + manager.time_ruler.time_to_pixels(30000))
+        self.assertTrue(line.visible)
+
+    def test_click_to_seek_on_any_track(self):
+        """Тест перемотки по клику на полосе любой дорожки через общий hit test"""
+        editor, page, manager = self._manager(tracks=3)
+        editor.set_playback_position = Mock()
+        self.assertEqual(len(manager.track_listviews), 3)
+
+        x = manager.time_ruler.time_to_pixels(15000)
+        manager.playhead_overlay.seek_at(x)
+        editor.set_playback_position.assert_called_once()
+        self.assertAlmostEqual(editor.set_playback_position.call_args[0][0], 0.25)
+
+        detector = manager.track_listviews[2].controls[0].content.controls[1].content
+        self.assertIsInstance(detector, ft.GestureDetector)
+        detector.on_tap_down(Mock(local_x=manager.time_ruler.time_to_pixels(45000)))
+        self.assertAlmostEqual(editor.set_playback_position.call_args[0][0], 0.75)
+
+    def test_scroll_shifts_overlay_and_syncs_tracks(self):
+        """Тест что прокрутка дорожки сдвигает курсор и остальные дорожки"""
+        editor, page, manager = self._manager(tracks=3)
+        for list_view in manager.track_listviews:
+            list_view.scroll_to = Mock()
+        overlay = manager.playhead_overlay
+        overlay.set_time(1000)
+
+        manager._on_timeline_scroll(0, Mock(pixels=500, viewport_dimension=1000))
+
+        self.assertEqual(overlay.scroll_px, 500)
+        manager.track_listviews[0].scroll_to.assert_not_called()
+        manager.track_listviews[1].scroll_to.assert_called_once_with(offset=500, duration=0)
+        expected = manager.time_ruler.time_to_pixels(1000) - 500
+        self.assertAlmostEqual(overlay.line.left, TrackManager.TRACK_CONTENT_LEFT + expected)
+        self.assertEqual(overlay.line.visible, expected >= 0)
+
+    def test_unknown_playhead_mode(self):
+        """Тест ошибки для неизвестного режима курсора"""
+        with self.assertRaises(ValueError):
+            TrackManager(AudioEditorController(), MagicMock(), playhead_mode="bogus")
+
+
+class TestLazyClipLoading(unittest.TestCase):
+    """Тесты создания клипа по заголовку файла с отложенным декодированием"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.cache = DecodedAudioCache()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_clip_created_without_decoding(self):
+        """Тест что клип появляется без декодирования, а PCM читается при первом обращении"""
+        path = write_test_wav(self.temp_path / "a.wav", np.full((22050, 2), 100))
+        with patch('src.core.audio_cache.AudioSegment.from_file', side_effect=AssertionError):
+            clip = AudioClip(path, cache=self.cache)
+
+        self.assertFalse(clip.is_loaded)
+        self.assertEqual(clip.duration, 500)
+        self.assertEqual((clip.frame_rate, clip.channels), (44100, 2))
+        self.assertEqual(self.cache.stats()['misses'], 0)
+
+        self.assertEqual(clip.samples.shape, (22050, 2))
+        self.assertTrue(clip.is_loaded)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_probed_duration_matches_resampled_data(self):
+        """Тест что длительность по заголовку совпадает с длительностью передискретизированных данных"""
+        path = write_test_wav(self.temp_path / "b.wav", np.zeros((48123, 1)), sample_rate=48000)
+        clip = AudioClip(path, cache=self.cache, target_rate=44100)
+
+        self.assertEqual(clip.frame_rate, 44100)
+        probed = clip.duration
+        self.assertEqual(probed, clip._load().duration)
+        self.assertEqual(len(clip.samples), 48123 * 44100 // 48000)
+
+    def test_conform_before_load_is_lazy(self):
+        """Тест что смена частоты незагруженного клипа не декодирует файл"""
+        path = write_test_wav(self.temp_path / "c.wav", np.zeros((4800, 2)), sample_rate=48000)
+        clip = AudioClip(path, cache=self.cache)
+        clip.conform_to_rate(44100)
+
+        self.assertFalse(clip.is_loaded)
+        self.assertEqual(clip.samples.shape[0], 4410)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_peaks_computed_in_background(self):
+        """Тест что пики незагруженного клипа считаются в фоне с обратным вызовом"""
+        path = write_test_wav(self.temp_path / "d.wav", np.full((44100, 2), 1000))
+        store = WaveformPeakStore(str(self.temp_path / "peaks"))
+        clip = AudioClip(path, cache=self.cache)
+        ready = []
+        done = threading.Event()
+
+        self.assertIsNone(peaks_for_clip(clip, store, on_ready=lambda p: (ready.append(p), done.set())))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(ready[0].frame_count, 44100)
+        self.assertIs(peaks_for_clip(clip, store, on_ready=Mock()), ready[0])
+
+    def test_background_peaks_hash_off_caller_thread(self):
+        """Тест что хэш файла и файл-спутник пиков читаются не в вызывающем потоке"""
+        path = write_test_wav(self.temp_path / "e.wav", np.full((44100, 2), 1000))
+        store = WaveformPeakStore(str(self.temp_path / "peaks"))
+        store.get(path)
+        store.clear_memory()
+        hashing_threads = []
+
+        def record_hash(file_path):
+            hashing_threads.append(threading.current_thread())
+            return content_hash(file_path)
+
+        ready = threading.Event()
+        with patch('src.core.waveform.content_hash', side_effect=record_hash), \
+                patch('src.core.waveform.known_content_hash', return_value=None):
+            self.assertIsNone(peaks_for_clip(AudioClip(path, cache=self.cache), store,
+                                             on_ready=lambda p: ready.set()))
+            self.assertTrue(ready.wait(5))
+
+        self.assertTrue(hashing_threads)
+        self.assertNotIn(threading.current_thread(), hashing_threads)
+
+
+class TestImportQueue(unittest.TestCase):
+    """Тесты фоновой очереди импорта"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_clips_placed_in_selection_order(self):
+        """Тест что клипы, готовые не по порядку, размещаются в порядке выбора"""
+        placed, progress = [], []
+        job = ImportJob(["a", "b", "c"], placed.append,
+                        on_progress=lambda done, total, path, ok: progress.append((done, path, ok)))
+        clip_a, clip_c = Mock(), Mock()
+
+        job._complete(2, clip_c)
+        job._complete(1, None)
+        self.assertEqual(placed, [])
+        job._complete(0, clip_a)
+
+        self.assertEqual(placed, [clip_a, clip_c])
+        self.assertEqual(progress, [(1, "c", True), (2, "b", False), (3, "a", True)])
+        self.assertEqual((job.done, job.failed), (3, 1))
+        self.assertTrue(job.wait(0))
+
+    def test_cancel_drops_pending_clips(self):
+        """Тест что после отмены готовые, но не размещённые клипы освобождаются"""
+        placed, completed = [], []
+        job = ImportJob(["a", "b", "c"], placed.append, on_complete=completed.append)
+        clip_b, clip_c = Mock(), Mock()
+
+        job._complete(1, clip_b)
+        job.cancel()
+        job._complete(2, clip_c)
+
+        self.assertEqual(placed, [])
+        clip_b.close.assert_called_once()
+        clip_c.close.assert_called_once()
+        self.assertEqual(completed, [job])
+        self.assertTrue(job.cancelled)
+
+    def test_controller_imports_back_to_back(self):
+        """Тест импорта через контроллер: клипы встык с конца дорожки, нечитаемые пропускаются"""
+        editor = AudioEditorController()
+        track = editor.create_track("T")
+        paths = [write_test_wav(self.temp_path / f"{i}.wav", np.full((4410 * (i + 1), 2), 100)) for i in range(3)]
+        broken = str(self.temp_path / "broken.wav")
+        Path(broken).write_bytes(b"not audio")
+        added = []
+        try:
+            job = editor.import_clips(0, [paths[0], broken, paths[1], paths[2]], start_time=1000,
+                                      on_clip_added=added.append)
+            self.assertTrue(job.wait(10))
+        finally:
+            editor.cleanup()
+
+        self.assertEqual([clip.start_time for clip in track.get_clips_sorted()], [1000, 1100, 1300])
+        self.assertEqual([clip.name for clip in added], ["0", "1", "2"])
+        self.assertTrue(all(clip.is_loaded for clip in added))
+        self.assertEqual(job.failed, 1)
+        self.assertEqual(added[-1].end_time, 1600)
+
+    def test_invalid_worker_count(self):
+        """Тест ошибки для неположительного числа потоков"""
+        with self.assertRaises(ValueError):
+            ImportQueue(workers=0)
+
+
+class TestDecoderRegistry(unittest.TestCase):
+    """Тесты выбора декодера по формату"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.registry = DecoderRegistry()
+        self.soundfile = SoundfileDecoder()
+        self.ffmpeg = FfmpegDecoder()
+        self.registry.register(self.soundfile)
+        self.registry.register(self.ffmpeg)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_decoder_chosen_by_format(self):
+        """Тест что WAV/FLAC/OGG/AIFF читаются libsndfile, а MP3/M4A — через ffmpeg"""
+        for name in ("a.wav", "a.flac", "a.ogg", "a.aiff"):
+            self.assertIs(self.registry.decoder_for(name), self.soundfile)
+        for name in ("a.mp3", "a.m4a", "a.wma"):
+            self.assertIs(self.registry.decoder_for(name), self.ffmpeg)
+        self.assertIs(self.registry.decoder_for("a.bin", "flac"), self.soundfile)
+        self.assertIsNone(self.registry.decoder_for("a.bin"))
+
+    def test_soundfile_block_decode_matches_source(self):
+        """Тест что блочное чтение FLAC и моно-файлов даёт исходные сэмплы"""
+        ramp = (np.arange(200000) % 30000 - 15000).astype(np.int16)
+        flac = str(self.temp_path / "ramp.flac")
+        sf.write(flac, np.stack([ramp, -ramp], axis=1), 48000, subtype='PCM_16')
+        mono = write_test_wav(self.temp_path / "mono.wav", ramp[:, None])
+
+        samples, rate = self.registry.decode(flac)
+        self.assertEqual(rate, 48000)
+        np.testing.assert_array_equal(samples[:, 0], ramp)
+        np.testing.assert_array_equal(samples[:, 1], -ramp)
+        samples, _ = self.registry.decode(mono)
+        self.assertEqual(samples.shape, (200000, 1))
+
+    def test_falls_back_to_next_decoder(self):
+        """Тест перехода к запасному декодеру, если основной не справился"""
+        path = write_test_wav(self.temp_path / "a.wav", np.ones((100, 2)))
+        with patch.object(self.soundfile, 'decode', side_effect=RuntimeError("bad")), \
+                patch.object(self.ffmpeg, 'decode', return_value=(np.zeros((5, 2), np.int16), 8000)) as fallback:
+            samples, rate = self.registry.decode(path)
+        fallback.assert_called_once()
+        self.assertEqual(rate, 8000)
+
+        with patch.object(self.ffmpeg, 'decode', side_effect=RuntimeError("bad")):
+            with self.assertRaises(ValueError):
+                self.registry.decode(str(self.temp_path / "broken.mp3"))
+
+    def test_cache_decodes_flac_without_ffmpeg(self):
+        """Тест что кэш читает FLAC без pydub и сводит каналы по запросу"""
+        flac = str(self.temp_path / "a.flac")
+        sf.write(flac, np.full((4410, 2), 1000, dtype=np.int16), 44100, subtype='PCM_16')
+        cache = DecodedAudioCache()
+        with patch('src.core.decoders.AudioSegment.from_file', side_effect=AssertionError):
+            asset = cache.acquire(flac, file_format="flac", channels=1)
+        self.assertEqual(asset.samples.shape, (4410, 1))
+        self.assertEqual(int(asset.samples[0, 0]), 1000)
+
+
+class TestWindowedDecoding(unittest.TestCase):
+    """Тесты декодирования только обрезанной части длинного файла"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.ramp = (np.arange(60 * 8000) % 20000).astype(np.int16)
+        self.path = write_test_wav(self.temp_path / "long.wav", np.stack([self.ramp, -self.ramp], axis=1), 8000)
+        self.cache = DecodedAudioCache()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _trimmed_clip(self, trim_start=30000, trim_end=25000):
+        clip = AudioClip(self.path, cache=self.cache)
+        clip.trim_left(trim_start)
+        clip.trim_right(trim_end)
+        return clip
+
+    def test_decode_range_seeks(self):
+        """Тест чтения участка файла с перемоткой"""
+        samples, rate, start_ms = SoundfileDecoder().decode_range(self.path, None, 10000, 10500)
+        self.assertEqual((rate, start_ms), (8000, 10000))
+        np.testing.assert_array_equal(samples[:, 0], self.ramp[80000:84000])
+
+    def test_trimmed_clip_keeps_only_window(self):
+        """Тест что память обрезанного клипа определяется слышимой частью, а не файлом"""
+        clip = self._trimmed_clip()
+        chunk = clip.get_audio_chunk(1000, 100)
+
+        self.assertEqual(clip.data_window_ms, (28000, 37000))
+        self.assertEqual(len(clip.samples), 9 * 8000)
+        self.assertLess(self.cache.resident_bytes(), 60 * 8000 * 4 / 5)
+        got = np.frombuffer(chunk, dtype=np.int16).reshape(-1, 2)
+        np.testing.assert_array_equal(got[:, 0], self.ramp[31 * 8000:31 * 8000 + 800])
+        self.assertIsNone(clip.full_samples())
+
+    def test_widened_trim_redecodes(self):
+        """Тест что раздвинутая за пределы окна ручка обрезания перечитывает участок"""
+        clip = self._trimmed_clip()
+        clip.samples
+        clip.trim_left(-10000)
+
+        chunk = clip.get_audio_chunk(0, 100)
+        self.assertLessEqual(clip.data_window_ms[0], 20000)
+        got = np.frombuffer(chunk, dtype=np.int16).reshape(-1, 2)
+        np.testing.assert_array_equal(got[:, 0], self.ramp[20 * 8000:20 * 8000 + 800])
+
+        clip.trim_left(-20000)
+        clip.trim_right(-25000)
+        clip.samples
+        self.assertEqual(clip.data_window_ms, (0, 60000))
+        self.assertEqual(len(clip.samples), 60 * 8000)
+
+    def test_export_matches_full_decode(self):
+        """Тест что экспорт оконного клипа совпадает с экспортом из целиком декодированного файла"""
+        rendered = []
+        for windowed in (True, False):
+            project = Project(sample_rate=8000)
+            track = Track(volume=1.0)
+            project.add_track(track)
+            clip = self._trimmed_clip(trim_start=12345, trim_end=33333)
+            clip.windowed_decoding = windowed
+            clip.start_time = 500
+            track.add_clip(clip)
+            rendered.append(AudioExporter(project).render_to_array()[0])
+            self.assertEqual(clip.data_window_ms[1] - clip.data_window_ms[0] < 60000, windowed)
+
+        np.testing.assert_array_equal(rendered[0], rendered[1])
+
+
+class TestAssetStore(unittest.TestCase):
+    """Тесты хранилища ресурсов по хэшу содержимого"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.store = AssetStore(str(self.temp_path / "assets"))
+        self.data = (np.arange(8820 * 2) % 5000).astype(np.int16).reshape(-1, 2)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _copies(self, *names):
+        return [write_test_wav(self.temp_path / name, self.data) for name in names]
+
+    def test_pcm_saved_in_asset_dir(self):
+        """Тест что PCM ресурса пишется и читается как в PcmDiskStore, но в каталоге ресурса"""
+        key = (('asset', 'abc'), (44100, 2, 2))
+        saved = self.store.save(key, self.data, 44100)
+
+        self.assertIsInstance(self.store, PcmDiskStore)
+        self.assertTrue(os.path.exists(os.path.join(self.store.asset_dir('abc'), 'pcm-44100-2.npy')))
+        samples, frame_rate = self.store.load(key)
+        self.assertIsInstance(samples, np.memmap)
+        np.testing.assert_array_equal(samples, saved)
+        self.assertEqual(frame_rate, 44100)
+        self.assertEqual([f for f in os.listdir(self.store.asset_dir('abc')) if f.startswith('tmp')], [])
+
+    def test_copies_share_one_asset(self):
+        """Тест что одинаковые файлы под разными путями декодируются один раз"""
+        path_a, path_b = self._copies("a.wav", "b.wav")
+        cache = DecodedAudioCache(asset_store=self.store)
+        clip_a = AudioClip(path_a, cache=cache)
+        clip_b = AudioClip(path_b, cache=cache)
+
+        self.assertIs(clip_a.samples, clip_b.samples)
+        self.assertEqual((cache.stats()['misses'], cache.stats()['hits']), (1, 1))
+        self.assertEqual(clip_a.asset_id, clip_b.asset_id)
+        self.assertEqual(self.store.entries(), [clip_a.asset_id])
+        self.assertEqual(self.store.refcount(clip_a.asset_id), 2)
+
+        peaks_for_clip(clip_a)
+        self.assertTrue(os.path.exists(os.path.join(self.store.asset_dir(clip_a.asset_id), 'peaks.npz')))
+        clip_a.close()
+        clip_b.close()
+        self.assertEqual(self.store.refcount(clip_a.asset_id), 0)
+
+    def test_pcm_and_analysis_reused_by_new_cache(self):
+        """Тест что PCM и анализ из хранилища используются другим кэшем без декодирования"""
+        path, = self._copies("a.wav")
+        AudioClip(path, cache=DecodedAudioCache(asset_store=self.store)).samples
+
+        cache = DecodedAudioCache(asset_store=self.store)
+        with patch.object(cache.decoders, 'decode', side_effect=AssertionError):
+            asset = cache.acquire(path)
+        self.assertTrue(asset.mapped)
+        np.testing.assert_array_equal(asset.samples, self.data)
+
+        analysis = self.store.analysis(asset.asset_id)
+        self.assertEqual((analysis['frames'], analysis['duration_ms'], analysis['channels']), (8820, 200, 2))
+        self.assertAlmostEqual(analysis['peak_dbfs'], 20 * np.log10(4999 / 32768), places=2)
+
+    def test_gc_removes_only_orphans(self):
+        """Тест что gc удаляет ресурсы без ссылок и без существующих исходных файлов"""
+        orphan, kept, referenced = (self.temp_path / name for name in ("o.wav", "k.wav", "r.wav"))
+        write_test_wav(orphan, np.ones((100, 2)))
+        write_test_wav(kept, np.full((100, 2), 2))
+        write_test_wav(referenced, np.full((100, 2), 3))
+        ids = [self.store.asset_id(str(path)) for path in (orphan, kept, referenced)]
+        self.store.retain(ids[2])
+        orphan.unlink()
+        referenced.unlink()
+
+        self.assertEqual([d for d, _ in self.store.gc(dry_run=True)], [ids[0]])
+        self.assertEqual(len(self.store.entries()), 3)
+        self.assertEqual([d for d, _ in self.store.gc(keep={ids[0]})], [])
+
+        self.store.gc()
+        self.assertEqual(self.store.entries(), sorted(ids[1:]))
+        self.store.release(ids[2])
+        self.store.gc()
+        self.assertEqual(self.store.entries(), [ids[1]])
+
+
+class TestFrameEngine(unittest.TestCase):
+    """Тесты режима движка с позициями в целых кадрах"""
+
+    RATE = 22050
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        marked = np.zeros((60 * self.RATE, 1))
+        marked[0] = 20000
+        self.path = write_test_wav(self.temp_path / "minute.wav", marked, self.RATE)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _hour_project(self, engine):
+        """Час материала: 60 минутных клипов подряд, первый кадр каждого помечен"""
+        project = Project(sample_rate=self.RATE, channels=1, engine=engine)
+        track = Track(volume=1.0)
+        for minute in range(60):
+            track.add_clip(AudioClip(self.path, start_time=minute * 60000, target_rate=self.RATE))
+        project.add_track(track)
+        for clip in track.clips:
+            self.assertIsNotNone(clip.samples)
+        return project
+
+    def _render(self, project, max_chunks=None):
+        """Рендерит блоками по 50 мс, как поток воспроизведения; возвращает (кадров, метки, позиция в мс)"""
+        position, end = project._position_of(0), project._position_of(project.duration)
+        written, marks, chunks = 0, [], 0
+        while position < end and chunks != max_chunks:
+            chunk_end = project._chunk_end(position, 50)
+            out = project._render_chunk(position, chunk_end)
+            marks.extend(written + np.flatnonzero(out[:, 0]))
+            written += len(out)
+            position = chunk_end
+            chunks += 1
+        return written, marks, project._time_of(position)
+
+    def test_hour_render_has_no_drift(self):
+        """Тест что за час записано ровно столько кадров, сколько прошло времени"""
+        project = self._hour_project("frames")
+        with patch.object(AudioClip, 'get_audio_chunk', side_effect=AssertionError):
+            written, marks, position_ms = self._render(project)
+
+        self.assertEqual(written, 3600 * self.RATE)
+        self.assertEqual(marks, [minute * 60 * self.RATE for minute in range(60)])
+        self.assertEqual(position_ms, 3600000)
+
+    def test_ms_engine_drifts_on_fractional_chunks(self):
+        """Тест что прежний режим отстаёт на полкадра за блок 50 мс при 22050 Гц, а frames — нет"""
+        written, _, position_ms = self._render(self._hour_project("ms"), max_chunks=1000)
+        self.assertEqual(position_ms * self.RATE / 1000 - written, 500)
+
+        written, _, position_ms = self._render(self._hour_project("frames"), max_chunks=1000)
+        self.assertEqual(position_ms * self.RATE / 1000, written)
+
+    def test_clip_frames_follow_move_and_trim(self):
+        """Тест что кадровые смещения клипа пересчитываются при перемещении и обрезании"""
+        project = self._hour_project("frames")
+        track = project.tracks[0]
+        clip = track.clips[1]
+
+        track.move_clip(clip, 61000.5)
+        clip.trim_left(1000)
+        self.assertEqual((clip.start_frame, clip.trim_start_frame), (round(61000.5 * 22.05), 22050))
+        self.assertEqual(clip.duration_frames, 59 * self.RATE)
+
+        clip.conform_to_rate(44100)
+        self.assertEqual((clip.start_frame, clip.trim_start_frame), (round(61000.5 * 44.1), 44100))
+
+    def test_unknown_engine(self):
+        """Тест что неизвестный режим движка отклоняется"""
+        with self.assertRaises(ValueError):
+            Project(engine="samples")
+
+
+class TestChunkViews(unittest.TestCase):
+    """Тесты выдачи данных клипа представлениями без копирования"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.data = (np.arange(44100 * 2) % 20000).astype(np.int16).reshape(-1, 2)
+        self.path = write_test_wav(self.temp_path / "ramp.wav", self.data)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _peak_allocation(self, call, repeat=200):
+        """Пик памяти (байт), выделенной за repeat вызовов после прогрева"""
+        import tracemalloc
+        call()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            for _ in range(repeat):
+                call()
+            return tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+
+    def test_chunks_are_readonly_views_with_trim(self):
+        """Тест что get_chunk и get_frames отдают неизменяемые представления с учётом обрезания"""
+        clip = AudioClip(self.path)
+        clip.trim_left(100)
+
+        chunk = clip.get_chunk(0, 50)
+        frames = clip.get_frames(0, 2205)
+        for view in (chunk, frames):
+            self.assertTrue(np.shares_memory(view, clip.samples))
+            self.assertFalse(view.flags.writeable)
+            np.testing.assert_array_equal(view, self.data[4410:4410 + 2205])
+        with self.assertRaises(ValueError):
+            chunk[0, 0] = 1
+        self.assertEqual(bytes(clip.get_audio_chunk(0, 50)), self.data[4410:4410 + 2205].tobytes())
+
+    def test_mixer_hot_path_allocates_nothing(self):
+        """Тест что блок микшера не выделяет массивов сверх шины"""
+        track = Track(volume=1.0)
+        track.add_clip(AudioClip(self.path))
+        mixer = AudioMixer(44100, 1)
+        bus_bytes = 2205 * 4
+
+        self.assertLess(self._peak_allocation(lambda: mixer.mix_into([track], 100, 50)), bus_bytes)
+        self.assertLess(self._peak_allocation(lambda: mixer.mix_frames_into([track], 4410, 2205)), bus_bytes)
+        np.testing.assert_array_equal(mixer.mix_frames_into([track], 4410, 2205)[:, 0],
+                                      self.data[4410:6615].astype(np.float32).mean(axis=1).astype(np.int16))
+
+    def test_exporter_renders_from_views(self):
+        """Тест что экспорт читает клипы через представления и не выделяет память на блок"""
+        project = Project()
+        track = Track(volume=1.0)
+        clip = AudioClip(self.path, start_time=500)
+        clip.trim_left(250)
+        track.add_clip(clip)
+        project.add_track(track)
+        exporter = AudioExporter(project, block_frames=4096)
+
+        placements = exporter._clip_placements(44100)
+        view, _, _, start_frame = placements[0]
+        self.assertTrue(np.shares_memory(view, clip.samples))
+        self.assertEqual((start_frame, len(view)), (22050, 44100 - 11025))
+
+        block = np.zeros((4096, 2), dtype=np.float32)
+        self.assertLess(self._peak_allocation(lambda: exporter._render_block(placements, 22050, block)), 4096)
+        np.testing.assert_array_equal(block, self.data[11025:11025 + 4096] * np.float32(1 / 32768))
+
+
+class TestFrameAccurateMixing(unittest.TestCase):
+    """Тесты размещения клипов с точностью до кадра внутри блока"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        rng = np.random.default_rng(0)
+        self.stereo = write_test_wav(self.temp_path / "stereo.wav",
+                                     rng.integers(-12000, 12000, (22050, 2)))
+        self.mono = write_test_wav(self.temp_path / "mono.wav", rng.integers(-12000, 12000, (1323, 1)))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _tracks(self):
+        first = Track(volume=1.0)
+        first.add_clip(AudioClip(self.stereo, start_time=10.3))
+        first.add_clip(AudioClip(self.mono, start_time=523.4, volume=0.8))
+        trimmed = AudioClip(self.stereo, start_time=517.7)
+        trimmed.trim_left(123.4)
+        trimmed.trim_right(200.1)
+        second = Track(volume=0.7)
+        second.add_clip(trimmed)
+        second.add_clip(AudioClip(self.mono, start_time=1.1))
+        return [first, second]
+
+    def test_chunked_mix_matches_offline_render(self):
+        """Тест что рендер блоками разного размера бит-в-бит совпадает с рендером за один проход"""
+        tracks = self._tracks()
+        total = 44100
+        offline = AudioMixer(44100, 2).mix_frames_into(tracks, 0, total).copy()
+        self.assertTrue(np.any(offline[:455]))
+
+        for chunk_frames in (7, 441, 1000, 2205, 4096):
+            mixer = AudioMixer(44100, 2)
+            chunked = np.concatenate([mixer.mix_frames_into(tracks, start, min(chunk_frames, total - start)).copy()
+                                      for start in range(0, total, chunk_frames)])
+            np.testing.assert_array_equal(chunked, offline, err_msg=f"блок {chunk_frames} кадров")
+
+    def test_clip_enters_mid_chunk(self):
+        """Тест что клип, начинающийся внутри блока, звучит с точного кадра"""
+        clip = AudioClip(self.stereo, start_time=10)
+        track = Track(volume=1.0)
+        track.add_clip(clip)
+
+        out = AudioMixer(44100, 2).mix_into([track], 0, 50)
+
+        self.assertFalse(np.any(out[:441]))
+        np.testing.assert_array_equal(out[441:], clip.samples[:2205 - 441])
+
+    def test_short_clip_inside_chunk_and_clip_end(self):
+        """Тест что клип короче блока и конец клипа внутри блока пишутся частично"""
+        track = Track(volume=1.0)
+        short = AudioClip(self.mono, start_time=5)
+        track.add_clip(short)
+        out = AudioMixer(44100, 1).mix_into([track], 0, 50)
+
+        np.testing.assert_array_equal(out[220:220 + 1323], short.samples)
+        self.assertFalse(np.any(out[:220]) or np.any(out[220 + 1323:]))
+
+    def test_export_matches_chunked_playback(self):
+        """Тест что экспорт размещает клипы на тех же кадрах, что и воспроизведение"""
+        project = Project(sample_rate=44100, channels=2)
+        for track in self._tracks():
+            track.set_volume(track.volume * 0.5)
+            project.add_track(track)
+        project.tracks[0].add_clip(AudioClip(self.mono, start_time=600.7, volume=0.5))
+        project._update_duration()
+
+        exported, _ = AudioExporter(project).render_to_array()
+        total = len(exported)
+        mixer = AudioMixer(44100, 2)
+        played = np.concatenate([mixer.mix_frames_into(project.tracks, start, min(441, total - start)).copy()
+                                 for start in range(0, total, 441)])
+
+        np.testing.assert_allclose(exported * 32768, played, atol=1)
+
+
+class TestSoloAndPan(unittest.TestCase):
+    """Тесты солирования, панорамы и пропуска беззвучных дорожек"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.path = write_test_wav(self.temp_path / "a.wav", np.full((44100, 2), 10000))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _track(self, **attrs):
+        track = Track(volume=1.0)
+        track.add_clip(AudioClip(self.path))
+        for name, value in attrs.items():
+            setattr(track, name, value)
+        return track
+
+    def test_solo_excludes_other_tracks_before_decoding(self):
+        """Тест что при солировании остальные дорожки не декодируются и не микшируются"""
+        soloed, other = self._track(solo=True, volume=0.5), self._track()
+
+        out = AudioMixer(44100, 2).mix_frames_into([other, soloed], 0, 2205)
+
+        self.assertTrue(np.all(out == 5000))
+        self.assertTrue(soloed.clips[0].is_loaded)
+        self.assertFalse(other.clips[0].is_loaded)
+
+    def test_constant_power_pan(self):
+        """Тест закона постоянной мощности и панорамы на шине"""
+        for pan in (-1.0, -0.3, 0.5, 1.0):
+            left, right = pan_gains(pan, 2)
+            self.assertAlmostEqual(left ** 2 + right ** 2, 2.0)
+        self.assertEqual(pan_gains(-1.0, 2), (np.sqrt(2), 0.0))
+        self.assertIsNone(pan_gains(0.0, 2))
+        self.assertIsNone(pan_gains(0.7, 1))
+
+        track = self._track()
+        track.set_pan(-5)
+        out = AudioMixer(44100, 2).mix_frames_into([track], 0, 2205)
+        self.assertEqual(track.pan, -1.0)
+        self.assertTrue(np.all(out[:, 0] == round(10000 * np.sqrt(2))))
+        self.assertTrue(np.all(out[:, 1] == 0))
+
+    def test_silent_tracks_cost_nothing(self):
+        """Тест что заглушённые и беззвучные дорожки не ищут клипы"""
+        tracks = [self._track(muted=True), self._track(volume=0.0), Track()]
+        for track in tracks:
+            track.get_clips_in_range = Mock(side_effect=AssertionError)
+
+        out = AudioMixer(44100, 2).mix_frames_into(tracks, 0, 2205)
+
+        self.assertFalse(np.any(out))
+        self.assertFalse(any(track.clips and track.clips[0].is_loaded for track in tracks))
+
+    def test_export_follows_solo_and_pan(self):
+        """Тест что экспорт учитывает солирование и панораму так же, как воспроизведение"""
+        project = Project()
+        project.add_track(self._track(solo=True, pan=1.0))
+        project.add_track(self._track())
+
+        audio, _ = AudioExporter(project).render_to_array()
+
+        self.assertFalse(np.any(audio[:44100, 0]))
+        np.testing.assert_allclose(audio[:44100, 1], 10000 * np.sqrt(2) / 32768, rtol=1e-6)
+
+    def test_export_downmixes_like_playback(self):
+        """Тест что многоканальный клип сводится при экспорте так же, как при воспроизведении"""
+        rng = np.random.default_rng(0)
+        path = write_test_wav(self.temp_path / "quad.wav", rng.integers(-8000, 8000, (4410, 4)))
+        project = Project()
+        track = Track(volume=1.0, pan=-0.5)
+        track.add_clip(AudioClip(path))
+        project.add_track(track)
+
+        audio, _ = AudioExporter(project).render_to_array()
+        played = AudioMixer(44100, 2).mix_frames_into(project.tracks, 0, 4410)
+
+        np.testing.assert_allclose(audio[:4410] * 32768, played, atol=1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file